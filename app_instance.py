@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Single running app instance
+The first launch keeps running and listens on a Unix domain socket; every
+later launch (right-click service, quick_spam_response.py, run_app.py) just
+hands the phone number to it and exits, so the window comes up pre-filled in
+milliseconds instead of starting Python, Tk and the template library again.
+
+Usage: python3 app_instance.py [phone]    (starts the app if it isn't running)
+"""
+
+import fcntl
+import json
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app_paths import user_cache_dir
+from applescript_handlers import Handler
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Override for the socket location (e.g. to run two independent copies)
+SOCKET_ENV = "SPAM_APP_SOCKET"
+
+# Seconds a launcher waits for the running app to accept a request
+HANDOVER_TIMEOUT = 0.5
+
+# Seconds a second launch waits for an instance that is still starting up
+STARTUP_WAIT = 10.0
+
+MAX_REQUEST_BYTES = 64 * 1024
+
+# Tk can't take focus from Messages on its own; argv is the process id
+FRONTMOST = Handler("bring_to_front", '''on run argv
+    tell application "System Events" to set frontmost of (first process whose unix id is ((item 1 of argv) as integer)) to true
+end run''')
+
+
+def socket_path() -> str:
+    return os.environ.get(SOCKET_ENV) or os.path.join(user_cache_dir(), "app.sock")
+
+
+def hand_over(request: Dict, path: Optional[str] = None,
+              timeout: float = HANDOVER_TIMEOUT) -> bool:
+    """Pass request to the running app; False if no app is listening"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path or socket_path())
+        sock.sendall(json.dumps(request).encode('utf-8') + b"\n")
+        reply = sock.makefile('rb').readline()
+        return json.loads(reply.decode('utf-8')).get("ok", False)
+    except (OSError, ValueError):
+        return False
+    finally:
+        sock.close()
+
+
+class InstanceServer:
+    """Listening side, owned by the running app
+
+    acquire() takes the single-instance lock; start() accepts requests on a
+    background thread; the Tk thread collects them with poll().
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or socket_path()
+        self.lock_path = self.path + ".lock"
+        self._lock_file = None
+        self._sock = None
+        self._requests = queue.Queue()
+        self._thread = None
+        self._closed = threading.Event()
+
+    def acquire(self) -> bool:
+        """Become the one running instance; False if another app holds the lock"""
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def start(self):
+        """Listen for launches (call after acquire(); any old socket file is stale)"""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o077)
+        try:
+            self._sock.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        self._sock.listen(8)
+        self._thread = threading.Thread(target=self._serve, name="app-instance", daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while not self._closed.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            with conn:
+                conn.settimeout(HANDOVER_TIMEOUT)
+                try:
+                    line = conn.makefile('rb').readline(MAX_REQUEST_BYTES)
+                    request = json.loads(line.decode('utf-8'))
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except (OSError, ValueError) as e:
+                    self._reply(conn, {"ok": False, "error": str(e)})
+                    continue
+                self._requests.put(request)
+                self._reply(conn, {"ok": True})
+
+    @staticmethod
+    def _reply(conn: socket.socket, reply: Dict):
+        try:
+            conn.sendall(json.dumps(reply).encode('utf-8') + b"\n")
+        except OSError:
+            pass
+
+    def poll(self) -> List[Dict]:
+        """Requests received since the last poll"""
+        requests = []
+        while True:
+            try:
+                requests.append(self._requests.get_nowait())
+            except queue.Empty:
+                return requests
+
+    def close(self):
+        self._closed.set()
+        if self._sock is not None:
+            try:
+                # Wakes the accept() in the serving thread
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self._sock = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def wait_and_hand_over(request: Dict, wait: float = STARTUP_WAIT) -> bool:
+    """Hand over to an instance that holds the lock but may still be starting"""
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if hand_over(request):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def bring_to_front(pid: Optional[int] = None):
+    """Make a process (this one by default) the frontmost app, without waiting (macOS)"""
+    # Off the caller's thread: the first call may still have to compile the script
+    threading.Thread(target=_bring_to_front, args=(pid or os.getpid(),),
+                     name="bring-to-front", daemon=True).start()
+
+
+def _bring_to_front(pid: int):
+    subprocess.Popen(FRONTMOST.command(str(pid)),
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def launch(request: Dict) -> bool:
+    """Show request in the running app, or start the app in the background with it
+
+    Returns True if a running app took the request.
+    """
+    if hand_over(request):
+        return True
+    subprocess.Popen([sys.executable, os.path.join(APP_DIR, 'run_app.py'),
+                      '--request', json.dumps(request)],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True, cwd=APP_DIR)
+    return False
+
+
+def main():
+    """Bring up the app (pre-filled with a phone number if given) and return at once"""
+    phone = " ".join(sys.argv[1:]).strip()
+    request = {"phone": phone, "status": f"📱 Phone number from Messages: {phone}"} if phone else {}
+    if launch(request):
+        print("🦆 Handed over to the running app")
+    else:
+        print("🚀 Starting Spam Response Assistant...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Per-user storage locations
+Caches live in ~/Library/Caches on macOS (XDG_CACHE_HOME elsewhere) and data
+that must be kept (the delivery ledger, number lists) in ~/Library/Application
+Support (XDG_DATA_HOME), so they survive restarts without cluttering the app folder
+"""
+
+import os
+import sys
+
+APP_NAME = "SpamResponseAssistant"
+
+# Override for every cache location, e.g. when benchmarking
+CACHE_DIR_ENV = "SPAM_CACHE_DIR"
+# Override for the data folder
+DATA_DIR_ENV = "SPAM_DATA_DIR"
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def user_cache_dir(*parts: str) -> str:
+    """Return (and create) a directory under the per-user cache root"""
+    root = os.environ.get(CACHE_DIR_ENV)
+    if not root:
+        if sys.platform == "darwin":
+            root = os.path.join(os.path.expanduser("~/Library/Caches"), APP_NAME)
+        else:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+            root = os.path.join(base, APP_NAME)
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def user_data_dir(*parts: str) -> str:
+    """Return (and create) a directory under the per-user data root"""
+    root = os.environ.get(DATA_DIR_ENV)
+    if not root:
+        if sys.platform == "darwin":
+            root = os.path.join(os.path.expanduser("~/Library/Application Support"), APP_NAME)
+        else:
+            base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+            root = os.path.join(base, APP_NAME)
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def user_data_path(name: str) -> str:
+    """name in the data folder, or next to the app if an older version put it there"""
+    legacy = os.path.join(APP_DIR, name)
+    if os.path.exists(legacy):
+        return legacy
+    return os.path.join(user_data_dir(), name)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Precompiled AppleScript handlers
+Every script the app runs is compiled once with osacompile into a .scpt in the
+per-user cache, named by the SHA-256 of its source (so an edited script is
+rebuilt), and run as `osascript handler.scpt <args>`. Parameters arrive in the
+script's run handler as argv, so no text is ever spliced into script source -
+quotes in a message can't break anything - and nothing is compiled per call.
+Without osacompile the source runs with -e and the same argv.
+
+Usage: python3 applescript_handlers.py    (compile every handler now, e.g. after an update)
+"""
+
+import hashlib
+import importlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+import metrics
+from app_paths import user_cache_dir
+
+# Environment overrides for the executables, e.g. the stand-ins in
+# benchmarks/fakebin when measuring throughput on Linux
+OSASCRIPT_ENV = "SPAM_OSASCRIPT"
+OSACOMPILE_ENV = "SPAM_OSACOMPILE"
+
+COMPILE_TIMEOUT = 60.0
+
+SOURCE_SUFFIXES = {"AppleScript": ".applescript", "JavaScript": ".js"}
+
+# Modules that define handlers
+HANDLER_MODULES = ("app_instance", "batch_send", "messages_bridge", "quick_spam_response")
+
+# Every handler, by name (filled in as the modules defining them are imported)
+HANDLERS: Dict[str, "Handler"] = {}
+
+
+def osascript_executable() -> str:
+    """Return the osascript executable to use (overridable via environment)"""
+    return os.environ.get(OSASCRIPT_ENV, "osascript")
+
+
+def osacompile_for(osascript: str) -> Optional[str]:
+    """The osacompile matching an osascript: the one beside it, or on PATH for a bare name"""
+    override = os.environ.get(OSACOMPILE_ENV)
+    if override:
+        return override
+    directory = os.path.dirname(osascript)
+    if directory:
+        sibling = os.path.join(directory, "osacompile")
+        return sibling if os.access(sibling, os.X_OK) else None
+    return shutil.which("osacompile")
+
+
+class Handler:
+    """One script, compiled on first use and run with arguments"""
+
+    def __init__(self, name: str, source: str, language: str = "AppleScript"):
+        self.name = name
+        self.source = source
+        self.language = language
+        # Compiler -> .scpt path, or None once compiling has failed
+        self._compiled: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        HANDLERS[name] = self
+
+    def _path(self, compiler: str) -> str:
+        digest = hashlib.sha256(f"{self.language}\0{compiler}\0{self.source}".encode('utf-8'))
+        return os.path.join(user_cache_dir("applescript"),
+                            f"{self.name}-{digest.hexdigest()[:16]}.scpt")
+
+    def compiled(self, executable: Optional[str] = None) -> Optional[str]:
+        """Path of the compiled script (compiling it if needed), or None to run from source"""
+        compiler = osacompile_for(executable or osascript_executable())
+        if compiler is None:
+            return None
+        path = self._compiled.get(compiler)
+        if path and os.path.exists(path):
+            return path
+        if compiler in self._compiled and path is None:
+            return None
+
+        with self._lock:
+            path = self._path(compiler)
+            if not os.path.exists(path):
+                path = self._compile(compiler, path)
+            self._compiled[compiler] = path
+            return path
+
+    def _compile(self, compiler: str, path: str) -> Optional[str]:
+        directory = os.path.dirname(path)
+        fd, source_path = tempfile.mkstemp(dir=directory, suffix=SOURCE_SUFFIXES[self.language])
+        output_path = path + ".tmp"
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.source)
+            with metrics.timer("applescript.compile"):
+                result = subprocess.run([compiler, '-l', self.language, '-o', output_path,
+                                         source_path],
+                                        capture_output=True, text=True, timeout=COMPILE_TIMEOUT)
+            if result.returncode != 0:
+                raise OSError(result.stderr.strip() or f"exit status {result.returncode}")
+            os.replace(output_path, path)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Could not precompile the {self.name} script, running it from source: {e}")
+            return None
+        finally:
+            for leftover in (source_path, output_path):
+                try:
+                    os.unlink(leftover)
+                except OSError:
+                    pass
+
+        # Versions compiled from older source are no longer needed
+        for entry in os.listdir(directory):
+            if entry.startswith(f"{self.name}-") and entry.endswith(".scpt") \
+                    and entry != os.path.basename(path):
+                try:
+                    os.unlink(os.path.join(directory, entry))
+                except OSError:
+                    pass
+        return path
+
+    def command(self, *args: str, executable: Optional[str] = None) -> List[str]:
+        """argv that runs the handler with args"""
+        executable = executable or osascript_executable()
+        compiled = self.compiled(executable)
+        if compiled:
+            return [executable, compiled, *args]
+        return [executable, '-l', self.language, '-e', self.source, *args]
+
+    def run(self, args: List[str], timeout: float) -> subprocess.CompletedProcess:
+        """Run the handler and wait for it"""
+        return subprocess.run(self.command(*args), capture_output=True, text=True, timeout=timeout)
+
+
+def compile_in_background(*handlers: Handler) -> threading.Thread:
+    """Compile handlers on a daemon thread, so their first use never waits for osacompile"""
+    def compile_all():
+        for handler in handlers:
+            handler.compiled()
+
+    thread = threading.Thread(target=compile_all, name="applescript-compile", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    # Importing these defines their handlers; they register with the imported
+    # applescript_handlers module, not this __main__ copy
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+    handlers = importlib.import_module("applescript_handlers").HANDLERS
+
+    failed = 0
+    for name, handler in sorted(handlers.items()):
+        path = handler.compiled()
+        if path:
+            print(f"✅ {name}: {path}")
+        else:
+            print(f"❌ {name}: not compiled (runs from source)")
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
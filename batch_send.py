@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Batch sending for spam waves
+Sends one response to many numbers, packing N recipients into each osascript
+call so the cost scales with the number of chunks, not the number of numbers.
+The sending script is a precompiled handler (applescript_handlers.py) that gets
+the numbers and messages as arguments, so chunks don't compile or quote anything.
+"""
+
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+import metrics
+from applescript_handlers import Handler
+from phone_numbers import clean_phone
+from templates import render_batch
+
+DEFAULT_CHUNK_SIZE = 25
+
+# First line of the batch script; the stand-in osascript keys off it
+BATCH_MARKER = "-- spam-response-batch"
+
+# argv is phone, message, phone, message, ...; returns one line per pair, in
+# order: "OK" or "ERR <reason>"
+BATCH_SCRIPT = BATCH_MARKER + '''
+on run argv
+    set batchResults to {}
+    tell application "Messages"
+        set targetService to 1st service whose service type = iMessage
+        repeat with i from 1 to (count of argv) - 1 by 2
+            try
+                set targetBuddy to buddy (item i of argv) of targetService
+                send (item (i + 1) of argv) to targetBuddy
+                set end of batchResults to "OK"
+            on error errorMessage
+                set end of batchResults to "ERR " & errorMessage
+            end try
+        end repeat
+    end tell
+    set AppleScript's text item delimiters to linefeed
+    return batchResults as text
+end run
+'''
+
+BATCH_HANDLER = Handler("batch_send", BATCH_SCRIPT)
+
+# Reported for recipients on the never-send list
+NEVER_SEND_ERROR = "On the never-send list"
+
+# Seconds allowed per osascript call, plus a little per recipient in the chunk
+BASE_TIMEOUT = 30.0
+PER_RECIPIENT_TIMEOUT = 2.0
+
+
+class BatchResult:
+    """Outcome of sending to a single recipient
+
+    message is the text it was sent, wait the seconds its chunk waited for the
+    rate limit and duration the seconds its chunk's osascript call took.
+    """
+
+    def __init__(self, phone: str, ok: bool, error: str = ""):
+        self.phone = phone
+        self.ok = ok
+        self.error = error
+        self.message = None
+        self.wait = 0.0
+        self.duration = 0.0
+
+    def __repr__(self):
+        status = "OK" if self.ok else f"ERR {self.error}"
+        return f"BatchResult({self.phone!r}, {status})"
+
+
+def parse_recipients(text: str) -> List[str]:
+    """Split pasted text into recipients (one per line, or comma/semicolon separated)"""
+    recipients = []
+    for part in re.split(r'[\n,;]+', text):
+        part = part.strip()
+        if part:
+            recipients.append(part)
+    return recipients
+
+
+def batch_arguments(items: List[tuple]) -> List[str]:
+    """The batch handler's argv: phone, message, phone, message, ..."""
+    return [field for item in items for field in item]
+
+
+def run_osascript(args: List[str], timeout: float) -> subprocess.CompletedProcess:
+    """Run the precompiled batch handler over one chunk's arguments"""
+    return BATCH_HANDLER.run(args, timeout)
+
+
+def send_chunk(items: List[tuple], runner: Callable = run_osascript) -> List[BatchResult]:
+    """Send one chunk in a single osascript call and report per recipient"""
+    timeout = BASE_TIMEOUT + PER_RECIPIENT_TIMEOUT * len(items)
+    try:
+        result = runner(batch_arguments(items), timeout)
+    except subprocess.TimeoutExpired:
+        return [BatchResult(phone, False, f"osascript timed out after {timeout:.0f}s")
+                for phone, _ in items]
+    except OSError as e:
+        return [BatchResult(phone, False, f"Could not run osascript: {e}") for phone, _ in items]
+
+    if result.returncode != 0:
+        error = f"AppleScript error: {result.stderr.strip()}"
+        return [BatchResult(phone, False, error) for phone, _ in items]
+
+    outcomes = result.stdout.splitlines()
+    results = []
+    for i, (phone, _) in enumerate(items):
+        outcome = outcomes[i].strip() if i < len(outcomes) else ""
+        if outcome == "OK":
+            results.append(BatchResult(phone, True))
+        elif outcome.startswith("ERR"):
+            results.append(BatchResult(phone, False, outcome[3:].strip()))
+        else:
+            results.append(BatchResult(phone, False, "No result reported by AppleScript"))
+    return results
+
+
+def send_batch(recipients: Iterable[str], message: str,
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               runner: Callable = run_osascript,
+               on_chunk: Optional[Callable[[List[BatchResult]], None]] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None,
+               variables: Optional[Dict[str, str]] = None,
+               concurrency: int = 1,
+               scheduler=None,
+               exclude=None) -> List[BatchResult]:
+    """Send message to every recipient, chunk_size buddies per osascript call
+
+    If variables is given, message is a template: its placeholders are filled
+    from variables, with [SENDER NUMBER] set to each recipient's number.
+    Duplicate numbers are sent to once. on_chunk, if given, is called with the
+    results of each chunk as it completes (useful for progress reporting).
+    is_cancelled is checked between chunks; recipients not yet sent when it
+    returns True are reported as failed with "Cancelled". Up to concurrency
+    osascript calls run at once; results always come back in recipient order.
+    With a scheduler (send_scheduler.SendScheduler), each chunk waits for its
+    rate-limit tokens first and chunks are capped at one burst. Numbers in
+    exclude (a container of E.164 numbers, e.g. the never-send list) are not
+    sent to; they are reported as failed, first, without an osascript call.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    seen = set()
+    phones = []
+    excluded = []
+    for recipient in recipients:
+        phone = clean_phone(recipient.strip())
+        if phone and phone not in seen:
+            seen.add(phone)
+            if exclude is not None and phone in exclude:
+                excluded.append(BatchResult(phone, False, NEVER_SEND_ERROR))
+            else:
+                phones.append(phone)
+
+    if variables is not None:
+        items = render_batch(message, phones, variables)
+    else:
+        items = [(phone, message) for phone in phones]
+
+    if scheduler is not None and scheduler.max_batch:
+        chunk_size = min(chunk_size, scheduler.max_batch)
+    chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+    def run_chunk(chunk: List[tuple]) -> List[BatchResult]:
+        if is_cancelled and is_cancelled():
+            return [BatchResult(phone, False, "Cancelled") for phone, _ in chunk]
+        start = time.monotonic()
+        if scheduler is not None and not scheduler.acquire([phone for phone, _ in chunk],
+                                                           is_cancelled=is_cancelled):
+            return [BatchResult(phone, False, "Cancelled") for phone, _ in chunk]
+        sending = time.monotonic()
+        chunk_results = send_chunk(chunk, runner)
+        finished = time.monotonic()
+        failed = 0
+        for result, (_, message) in zip(chunk_results, chunk):
+            result.message = message
+            result.wait = sending - start
+            result.duration = finished - sending
+            failed += not result.ok
+        metrics.observe("batch.wait", sending - start)
+        # One osascript call: spawn, compile and every send in the chunk
+        metrics.observe("batch.chunk", finished - sending)
+        metrics.count("batch.sent", len(chunk_results) - failed)
+        if failed:
+            metrics.count("batch.failed", failed)
+        return chunk_results
+
+    results = list(excluded)
+    if excluded and on_chunk:
+        on_chunk(excluded)
+    if concurrency == 1 or len(chunks) < 2:
+        outcomes = map(run_chunk, chunks)
+        executor = None
+    else:
+        executor = ThreadPoolExecutor(max_workers=min(concurrency, len(chunks)),
+                                      thread_name_prefix="batch-send")
+        outcomes = executor.map(run_chunk, chunks)
+    try:
+        for chunk_results in outcomes:
+            results.extend(chunk_results)
+            if on_chunk:
+                on_chunk(chunk_results)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+    return results
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Messages send throughput: one osascript per message vs the persistent bridge
+Runs against the stand-in osascript in benchmarks/fakebin, so it works on Linux
+
+Usage: python3 benchmarks/bench_bridge.py [count] [compile_ms]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+FAKE_OSASCRIPT = os.path.join(BENCH_DIR, "fakebin", "osascript")
+
+from app_paths import CACHE_DIR_ENV
+from messages_bridge import MessagesBridge
+
+
+def one_shot_sends(count: int) -> float:
+    """The original send_imessage path: a fresh osascript per message"""
+    start = time.perf_counter()
+    for i in range(count):
+        applescript = f'''
+        tell application "Messages"
+            set targetService to 1st service whose service type = iMessage
+            set targetBuddy to buddy "+1555000{i:04d}" of targetService
+            send "QUACK {i}" to targetBuddy
+        end tell
+        '''
+        result = subprocess.run([FAKE_OSASCRIPT, '-e', applescript],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr)
+    return time.perf_counter() - start
+
+
+def bridge_sends(count: int) -> float:
+    """Persistent worker: startup is paid once and included in the timing"""
+    start = time.perf_counter()
+    bridge = MessagesBridge(executable=FAKE_OSASCRIPT)
+    for i in range(count):
+        bridge.send_text(f"+1555000{i:04d}", f"QUACK {i}")
+    bridge.close()
+    return time.perf_counter() - start
+
+
+def run(count: int = 200) -> dict:
+    """Both send paths over the same messages"""
+    one_shot = one_shot_sends(count)
+    with tempfile.TemporaryDirectory() as tmp:
+        # The worker is precompiled by the stand-in osacompile; keep that out of the real cache
+        os.environ[CACHE_DIR_ENV] = tmp
+        bridge = bridge_sends(count)
+    return {
+        "count": count,
+        "compile_ms": float(os.environ.get("FAKE_OSASCRIPT_COMPILE_MS", "0") or 0),
+        "one_shot_s": one_shot,
+        "one_shot_msg_per_s": count / one_shot,
+        "bridge_s": bridge,
+        "bridge_msg_per_s": count / bridge,
+        "bridge_ms_per_msg": bridge / count * 1000,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    if len(sys.argv) > 2:
+        os.environ["FAKE_OSASCRIPT_COMPILE_MS"] = sys.argv[2]
+
+    print(f"🦆 Sending {count} messages through the stand-in osascript")
+    stats = run(count)
+    for label, key in (("one-shot osascript", "one_shot_s"), ("persistent bridge", "bridge_s")):
+        elapsed = stats[key]
+        print(f"{label:>20}: {elapsed:7.3f}s  {count / elapsed:9.1f} msg/s  "
+              f"{elapsed / count * 1000:7.2f} ms/msg")
+
+
+if __name__ == "__main__":
+    main()
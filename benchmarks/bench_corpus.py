@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Local duck corpus scan and pick speed
+Fills a folder with small PNG ducks (plus some duplicates and non-images),
+then times the first scan, a rescan with nothing changed, a rescan after 1%
+of the files changed, and picks - and checks that a full cycle of picks
+never repeats an image
+
+Usage: python3 benchmarks/bench_corpus.py [images]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_transcode import write_png
+from duck_corpus import DuckCorpus
+
+SIDE = 128
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(images: int = 5000, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, "ducks")
+        os.makedirs(os.path.join(folder, "more"))
+        paths = []
+        for i in range(images):
+            path = os.path.join(folder, "more" if i % 4 == 0 else "", f"duck_{i}.png")
+            write_png(path, SIDE, SIDE, i)
+            paths.append(path)
+        # Copies of the same duck count once; other files are ignored
+        duplicates = images // 20
+        for i in range(duplicates):
+            shutil.copy(paths[i], os.path.join(folder, f"copy_{i}.png"))
+        with open(os.path.join(folder, "notes.txt"), 'w') as f:
+            f.write("not a duck\n")
+
+        index_path = os.path.join(tmp, "index.json")
+        corpus = DuckCorpus(folder, index_path=index_path, rescan_interval=3600, rng=rng)
+        start = time.perf_counter()
+        first = corpus.scan()
+        first_scan = time.perf_counter() - start
+
+        # A restart: everything comes from the index
+        corpus = DuckCorpus(folder, index_path=index_path, rescan_interval=3600, rng=rng)
+        start = time.perf_counter()
+        unchanged = corpus.scan()
+        rescan = time.perf_counter() - start
+
+        for path in rng.sample(paths, max(1, images // 100)):
+            write_png(path, SIDE, SIDE, rng.randint(0, 255))
+        start = time.perf_counter()
+        changed = corpus.scan()
+        changed_scan = time.perf_counter() - start
+
+        picks, latencies = [], []
+        for _ in range(corpus.stats()["unique"]):
+            start = time.perf_counter()
+            picks.append(corpus.next_image())
+            latencies.append(time.perf_counter() - start)
+        stats = corpus.stats()
+
+    return {
+        "images": images,
+        "files": first["files"],
+        "unique": stats["unique"],
+        "first_scan_ms": first_scan * 1000,
+        "rescan_ms": rescan * 1000,
+        "rescan_hashed": unchanged["hashed"],
+        "changed_scan_ms": changed_scan * 1000,
+        "changed_hashed": changed["hashed"],
+        "pick_p50_us": percentile(latencies, 50) * 1e6,
+        "pick_p99_us": percentile(latencies, 99) * 1e6,
+        "repeats_in_cycle": len(picks) - len(set(picks)),
+    }
+
+
+def main():
+    images = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    stats = run(images)
+    print(f"🦆 {stats['files']} files, {stats['unique']} different duck images")
+    print(f"{'first scan':>16}: {stats['first_scan_ms']:10.1f} ms")
+    print(f"{'rescan':>16}: {stats['rescan_ms']:10.1f} ms ({stats['rescan_hashed']} hashed)")
+    print(f"{'1% changed':>16}: {stats['changed_scan_ms']:10.1f} ms ({stats['changed_hashed']} hashed)")
+    for key in ("pick_p50_us", "pick_p99_us"):
+        print(f"{key:>16}: {stats[key]:10.2f} µs")
+    if stats["repeats_in_cycle"]:
+        print(f"❌ {stats['repeats_in_cycle']} images repeated within one cycle")
+        sys.exit(1)
+    print(f"✅ {stats['unique']} picks without a repeat")
+
+
+if __name__ == "__main__":
+    main()
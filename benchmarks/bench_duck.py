@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Duck image send path
+Times send_remote_duck_image end to end (SpamResponder.send_duck_image:
+download or cache hit, then the bridge's send_file) against
+benchmarks/local_image_server.py and the stand-in osascript, for new images
+(each one downloaded) and repeats (served from the on-disk cache)
+
+Usage: python3 benchmarks/bench_duck.py [count]
+"""
+
+import contextlib
+import io
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+FAKE_OSASCRIPT = os.path.join(BENCH_DIR, "fakebin", "osascript")
+
+from app_paths import CACHE_DIR_ENV
+from delivery_ledger import IMAGE, DeliveryLedger
+from local_image_server import base_url, start_server
+from messages_bridge import MessagesBridge
+from number_lists import NumberLists
+from send_scheduler import SendScheduler
+from spam_core import SpamResponder
+
+IMAGES = 10
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def timed_sends(core: SpamResponder, count: int) -> list:
+    latencies = []
+    # send_duck_image narrates every step on stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(count):
+            start = time.perf_counter()
+            core.send_duck_image(f"555-201-{i:04d}")
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run(count: int = 100) -> dict:
+    server = start_server()
+    root = base_url(server)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ[CACHE_DIR_ENV] = os.path.join(tmp, "cache")
+        serial = itertools.count()
+        mode = {"new": True}
+
+        def duck_url() -> str:
+            i = next(serial)
+            path = f"/duck_{i % IMAGES}.{'jpg' if i % 2 == 0 else 'png'}"
+            # A query string makes every URL a cache miss; the server ignores it
+            return f"{root}{path}?n={i}" if mode["new"] else f"{root}{path}"
+
+        core = SpamResponder(config_file=os.path.join(tmp, "responses.json"),
+                             bridge=MessagesBridge(executable=FAKE_OSASCRIPT),
+                             scheduler=SendScheduler(None, None),
+                             ledger=DeliveryLedger(os.path.join(tmp, "ledger.db")),
+                             number_lists=NumberLists(tmp),
+                             duck_url_source=duck_url)
+        try:
+            core.ping()
+            downloaded = timed_sends(core, count)
+            mode["new"] = False
+            timed_sends(core, IMAGES)
+            cached = timed_sends(core, count)
+            images = sum(1 for row in core.ledger.recent(0, limit=3 * count)
+                         if row["kind"] == IMAGE and row["ok"])
+            cache = core.image_cache
+            client = cache.client.stats()
+            hits, misses = cache.hits, cache.misses
+        finally:
+            core.close()
+            server.shutdown()
+
+    return {
+        "count": count,
+        "download_p50_ms": percentile(downloaded, 50) * 1000,
+        "download_p95_ms": percentile(downloaded, 95) * 1000,
+        "cached_p50_ms": percentile(cached, 50) * 1000,
+        "cached_p95_ms": percentile(cached, 95) * 1000,
+        "images_sent": images,
+        "fallbacks": 2 * count + IMAGES - images,
+        "cache_hits": hits,
+        "cache_misses": misses,
+        "connections_opened": client["connections_opened"],
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    stats = run(count)
+    print(f"🦆 {count} duck images downloaded and sent, then {count} from the cache")
+    for key in ("download_p50_ms", "download_p95_ms", "cached_p50_ms", "cached_p95_ms"):
+        print(f"{key:>16}: {stats[key]:8.2f} ms")
+    print(f"{'cache':>16}: {stats['cache_hits']} hits, {stats['cache_misses']} misses, "
+          f"{stats['connections_opened']} connection(s)")
+    if stats["fallbacks"]:
+        print(f"❌ {stats['fallbacks']} sends fell back to a duck message")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
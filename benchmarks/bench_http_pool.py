@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Image fetch latency: a new connection per download (urllib) vs the pooled client
+Runs against benchmarks/local_image_server.py and reports connection reuse
+
+Usage: python3 benchmarks/bench_http_pool.py [count]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from http_pool import HTTPClient
+from image_download import download_image
+from local_image_server import base_url, start_server
+
+
+def urllib_fetches(urls, dest_dir) -> float:
+    """The original path: urlopen + read() for every image"""
+    start = time.perf_counter()
+    for url in urls:
+        with urllib.request.urlopen(url, timeout=15) as response:
+            with open(os.path.join(dest_dir, 'urllib.bin'), 'wb') as f:
+                f.write(response.read())
+    return time.perf_counter() - start
+
+
+def pooled_fetches(urls, dest_dir, client) -> float:
+    start = time.perf_counter()
+    for url in urls:
+        result = download_image(url, dest_dir, client=client)
+        os.unlink(result.path)
+    return time.perf_counter() - start
+
+
+def run(count: int = 300) -> dict:
+    """Fetch count images both ways from a local server"""
+    server = start_server()
+    urls = [f"{base_url(server)}/duck_{i % 10}.{'jpg' if i % 2 == 0 else 'png'}" for i in range(count)]
+    try:
+        with tempfile.TemporaryDirectory() as dest_dir:
+            client = HTTPClient()
+            client.set_timeouts('127.0.0.1', connect=1.0, read=5.0)
+            try:
+                unpooled = urllib_fetches(urls, dest_dir)
+                pooled = pooled_fetches(urls, dest_dir, client)
+                pool_stats = client.stats()
+            finally:
+                client.close()
+    finally:
+        server.shutdown()
+    return {
+        "count": count,
+        "urllib_ms_per_image": unpooled / count * 1000,
+        "pooled_ms_per_image": pooled / count * 1000,
+        "pool": pool_stats,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    print(f"🦆 Fetching {count} images from a local duck server")
+    stats = run(count)
+    for label, key in (("urllib (no reuse)", "urllib_ms_per_image"),
+                       ("pooled client", "pooled_ms_per_image")):
+        print(f"{label:>20}: {stats[key] * count / 1000:7.3f}s  {stats[key]:6.2f} ms/image")
+    print(f"{'pool stats':>20}: {stats['pool']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Delivery ledger at scale
+Records a few million sends spread over a year (timing how long record()
+holds up the sender), then times the everyday queries and fails (exit 1) if
+their p95 latency is above the target
+
+Usage: python3 benchmarks/bench_ledger.py [rows] [max_p95_ms]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from delivery_ledger import DeliveryLedger
+
+TEMPLATES = ("Polite Decline", "Duck Club Welcome", "Random duck message", "Duck image",
+             "Political PAC", "Stop Request")
+
+YEAR = 365 * 24 * 3600
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(rows: int = 2000000, queries: int = 2000, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    numbers = [f"+1555{rng.randint(0, 9999999):07d}" for _ in range(max(rows // 20, 1))]
+    now = time.time()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = DeliveryLedger(os.path.join(tmp, "ledger.db"))
+        try:
+            record_times = []
+            start = time.perf_counter()
+            for i in range(rows):
+                phone = rng.choice(numbers)
+                ok = rng.random() > 0.02
+                sent_at = now - YEAR * (1 - i / rows)
+                t = time.perf_counter()
+                ledger.record(phone, ok, template=rng.choice(TEMPLATES), message="QUACK",
+                              error="" if ok else "AppleScript error: buddy not found",
+                              wait=rng.random(), duration=0.05, sent_at=sent_at)
+                record_times.append(time.perf_counter() - t)
+            recorded = time.perf_counter() - start
+            ledger.flush(timeout=None)
+            written = time.perf_counter() - start
+
+            last_send = []
+            hour_count = []
+            history = []
+            for _ in range(queries):
+                phone = rng.choice(numbers)
+                t = time.perf_counter()
+                ledger.last_send(phone)
+                last_send.append(time.perf_counter() - t)
+
+                t = time.perf_counter()
+                ledger.history(phone)
+                history.append(time.perf_counter() - t)
+
+                t = time.perf_counter()
+                ledger.sends_in_last_hour()
+                hour_count.append(time.perf_counter() - t)
+            size = os.path.getsize(os.path.join(tmp, "ledger.db"))
+        finally:
+            ledger.close()
+
+    return {
+        "rows": rows,
+        "record_p50_us": percentile(record_times, 50) * 1e6,
+        "record_p99_us": percentile(record_times, 99) * 1e6,
+        "record_s": recorded,
+        "committed_s": written,
+        "rows_per_s": rows / written,
+        "db_mb": size / 1e6,
+        "last_send_p95_ms": percentile(last_send, 95) * 1000,
+        "history_p95_ms": percentile(history, 95) * 1000,
+        "last_hour_p95_ms": percentile(hour_count, 95) * 1000,
+    }
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    stats = run(rows)
+    print(f"🦆 Recorded {stats['rows']} sends in {stats['record_s']:.1f}s, all committed after "
+          f"{stats['committed_s']:.1f}s ({stats['rows_per_s']:.0f} rows/s, {stats['db_mb']:.0f} MB)")
+    for key in ("record_p50_us", "record_p99_us"):
+        print(f"{key:>18}: {stats[key]:8.1f} µs")
+    for key in ("last_send_p95_ms", "history_p95_ms", "last_hour_p95_ms"):
+        print(f"{key:>18}: {stats[key]:8.3f} ms")
+    worst = max(stats["last_send_p95_ms"], stats["history_p95_ms"], stats["last_hour_p95_ms"])
+    if worst > target:
+        print(f"❌ p95 query latency above {target:.1f} ms")
+        sys.exit(1)
+    print(f"✅ p95 query latency within {target:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Number list load and lookup speed
+Imports a synthetic spam feed of millions of numbers, then times opening the
+list and membership checks (hits and misses, E.164 and pasted formats), and
+fails (exit 1) if a lookup's p99 is above the target
+
+Usage: python3 benchmarks/bench_number_lists.py [numbers] [max_p99_us]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from number_lists import KNOWN_SPAM, NumberLists, NumberSet
+
+LOOKUPS = 100000
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def random_number(rng: random.Random) -> str:
+    return f"+1{rng.randint(2, 9)}{rng.randint(0, 99):02d}{rng.randint(2, 9)}{rng.randint(0, 999999):06d}"
+
+
+def run(count: int = 5000000, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        feed = os.path.join(tmp, "feed.txt")
+        listed = []
+        with open(feed, 'w') as f:
+            for i in range(count):
+                number = random_number(rng)
+                if i % 50 == 0:
+                    listed.append(number)
+                # Feeds come in every format, sometimes with extra columns
+                f.write(f"{number[2:5]}-{number[5:8]}-{number[8:]},robocall\n" if i % 3 else
+                        f"{number}\n")
+
+        lists = NumberLists(tmp)
+        start = time.perf_counter()
+        with open(feed, 'r') as f:
+            counts = lists.import_feeds(KNOWN_SPAM, [f])
+        imported = time.perf_counter() - start
+        path = lists.get(KNOWN_SPAM).path
+        size = os.path.getsize(path)
+        lists.close()
+
+        start = time.perf_counter()
+        numbers = NumberSet(path)
+        opened = time.perf_counter() - start
+
+        probes = [rng.choice(listed) for _ in range(LOOKUPS // 2)]
+        probes += [random_number(rng) for _ in range(LOOKUPS // 2)]
+        rng.shuffle(probes)
+        e164 = []
+        hits = 0
+        for phone in probes:
+            t = time.perf_counter()
+            hits += phone in numbers
+            e164.append(time.perf_counter() - t)
+
+        pasted = []
+        for phone in probes[:LOOKUPS // 10]:
+            raw = f"({phone[2:5]}) {phone[5:8]}-{phone[8:]}"
+            t = time.perf_counter()
+            raw in numbers
+            pasted.append(time.perf_counter() - t)
+        numbers.close()
+
+    return {
+        "numbers": counts["after"],
+        "import_s": imported,
+        "file_mb": size / 1e6,
+        "open_ms": opened * 1000,
+        "hit_rate": hits / len(probes),
+        "lookup_p50_us": percentile(e164, 50) * 1e6,
+        "lookup_p99_us": percentile(e164, 99) * 1e6,
+        "pasted_p50_us": percentile(pasted, 50) * 1e6,
+        "pasted_p99_us": percentile(pasted, 99) * 1e6,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000000
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else 50.0
+    stats = run(count)
+    print(f"🦆 Imported {stats['numbers']} numbers in {stats['import_s']:.1f}s "
+          f"({stats['file_mb']:.0f} MB), opened in {stats['open_ms']:.2f} ms")
+    for key in ("lookup_p50_us", "lookup_p99_us", "pasted_p50_us", "pasted_p99_us"):
+        print(f"{key:>14}: {stats[key]:8.2f} µs")
+    worst = max(stats["lookup_p99_us"], stats["pasted_p99_us"])
+    if worst > target:
+        print(f"❌ p99 lookup above {target:.0f} µs")
+        sys.exit(1)
+    print(f"✅ p99 lookup within {target:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Phone normalization throughput
+Normalizes a few hundred thousand numbers in mixed formats, cold and warm,
+and fails (exit 1) if throughput drops below the target
+
+Usage: python3 benchmarks/bench_phone.py [count] [min_per_sec]
+"""
+
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import phone_numbers
+from phone_numbers import normalize, normalize_many
+
+FORMATS = (
+    "({a}) {b}-{c}",
+    "{a}-{b}-{c}",
+    "+1 {a} {b} {c}",
+    "1{a}{b}{c}",
+    "{a}.{b}.{c}",
+    "+1 ({a}) {b}-{c} ext 42",
+    "tel:+1{a}{b}{c}",
+    "0044 20 {b}{c}",
+    "+33 6 {c} {c}",
+)
+
+
+def make_numbers(count: int, unique: int, seed: int = 42) -> list:
+    """count inputs drawn from `unique` distinct numbers in random formats"""
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(unique):
+        fmt = rng.choice(FORMATS)
+        pool.append(fmt.format(a=rng.randint(200, 999), b=rng.randint(200, 999),
+                               c=f"{rng.randint(0, 9999):04d}"))
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def run(count: int = 300000, unique: int = 50000) -> dict:
+    """Time normalize_many over fresh and repeated input; returns numbers per second"""
+    numbers = make_numbers(count, unique)
+    normalize.cache_clear()
+
+    start = time.perf_counter()
+    results = normalize_many(numbers)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    normalize_many(numbers)
+    warm = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for raw in numbers[:50000]:
+        normalize(raw)
+    single = time.perf_counter() - start
+
+    return {
+        "count": count,
+        "unique": unique,
+        "normalized": sum(1 for r in results if r),
+        "normalize_many_cold_per_sec": count / cold,
+        "normalize_many_warm_per_sec": count / warm,
+        "normalize_cached_per_sec": 50000 / single,
+        "lru_cache_size": phone_numbers.CACHE_SIZE,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    stats = run(count)
+    print(f"🦆 Normalized {stats['count']} numbers ({stats['unique']} distinct, "
+          f"{stats['normalized']} valid)")
+    for key in ("normalize_many_cold_per_sec", "normalize_many_warm_per_sec", "normalize_cached_per_sec"):
+        print(f"{key:>30}: {stats[key]:12,.0f} numbers/s")
+    if stats["normalize_many_cold_per_sec"] < target:
+        print(f"❌ Below target of {target:,.0f} numbers/s")
+        sys.exit(1)
+    print(f"✅ Above target of {target:,.0f} numbers/s")
+
+
+if __name__ == "__main__":
+    main()
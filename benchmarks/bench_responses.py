@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Response library load and save times
+For each library size, times load_responses (opening the store: the JSON
+snapshot, or just the row ids for SQLite), a single edit (what the Edit/Add
+buttons cost) and save_responses (a full snapshot rewrite for JSON)
+
+Usage: python3 benchmarks/bench_responses.py [size ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_search import make_library
+from response_store import _serialize, open_response_store
+
+SIZES = (100, 1000, 10000, 50000)
+
+# Edits made before each save
+EDITS = 100
+
+
+def time_store(path: str) -> dict:
+    start = time.perf_counter()
+    store = open_response_store(path)
+    load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(EDITS):
+        store.edit(i % len(store), f"Edited {i}", "An edited quack")
+    edit = (time.perf_counter() - start) / EDITS
+
+    stats = {"load_ms": load * 1000, "edit_ms": edit * 1000}
+    if hasattr(store, "compact"):
+        # SQLite commits every edit; the JSON store rewrites its snapshot here
+        start = time.perf_counter()
+        store.compact(wait=True)
+        stats["save_ms"] = (time.perf_counter() - start) * 1000
+    store.close()
+    return stats
+
+
+def run(sizes=SIZES) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            library = make_library(size)
+            json_path = os.path.join(tmp, f"responses_{size}.json")
+            with open(json_path, 'wb') as f:
+                f.write(_serialize(library))
+            db_path = os.path.join(tmp, f"responses_{size}.db")
+            open_response_store(db_path, defaults=library).close()
+
+            stats = {"json_mb": os.path.getsize(json_path) / 1e6}
+            for kind, path in (("json", json_path), ("sqlite", db_path)):
+                for key, value in time_store(path).items():
+                    stats[f"{kind}_{key}"] = value
+            results[str(size)] = stats
+    return results
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    results = run(sizes)
+    print(f"{'templates':>10} {'json load':>10} {'json edit':>10} {'json save':>10} "
+          f"{'db load':>10} {'db edit':>10}   (ms)")
+    for size, stats in results.items():
+        print(f"{size:>10} {stats['json_load_ms']:10.2f} {stats['json_edit_ms']:10.3f} "
+              f"{stats['json_save_ms']:10.2f} {stats['sqlite_load_ms']:10.2f} "
+              f"{stats['sqlite_edit_ms']:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Type-ahead search latency
+Builds the response search index over a synthetic template library, then
+replays queries one keystroke at a time (with a typo or two) and fails (exit 1)
+if the p95 per-keystroke latency is above the target
+
+Usage: python3 benchmarks/bench_search.py [templates] [max_p95_ms]
+"""
+
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from response_search import ResponseSearchIndex
+
+WORDS = (
+    "duck rubber yellow quack club welcome member squad pond bath bathtub feather "
+    "waddle beak mallard decoy squeak council oracle prophecy initiate command survivor "
+    "contestant lifetime membership political action committee candidate policy truth "
+    "department waterfowl affairs notice emergency containment breach drill stop remove "
+    "unsubscribe number message reply text spam offer loan vehicle warranty prize winner "
+    "congratulations approved application memo corporate quarterly synergy pipeline "
+    "bread crumbs lake river migration flock gaggle paddle float bubble soap toy"
+).split()
+
+QUERIES = ("yellow duck", "rubber quack club", "waterfowl department", "warranty",
+           "membreship", "quak", "political candidate", "bathtub squeak", "emergency breach",
+           "stop", "d", "co")
+
+
+def make_library(count: int, seed: int = 7) -> list:
+    """count templates: 3-word names and 15-40 word messages with a long-tail vocabulary"""
+    rng = random.Random(seed)
+    # Zipf-ish word frequencies plus rare made-up words, like real templates
+    weights = [1.0 / (rank + 1) for rank in range(len(WORDS))]
+    library = []
+    for i in range(count):
+        name = " ".join(rng.choices(WORDS, weights, k=3)) + f" {i}"
+        body = rng.choices(WORDS, weights, k=rng.randint(15, 40))
+        body.append(f"duck{rng.randint(0, count)}")
+        library.append({"name": name, "message": " ".join(body)})
+    return library
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(count: int = 100000) -> dict:
+    """Index build time, per-keystroke latencies and incremental update cost"""
+    library = make_library(count)
+
+    start = time.perf_counter()
+    index = ResponseSearchIndex(library)
+    build = time.perf_counter() - start
+
+    latencies = []
+    results = 0
+    for query in QUERIES:
+        for end in range(1, len(query) + 1):
+            # Fresh query each keystroke: the result cache is cleared by an update
+            index.edit(0, library[0])
+            start = time.perf_counter()
+            results += len(index.search(query[:end]))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(1000):
+        index.add({"name": f"new duck {i}", "message": "a freshly added quack template"})
+    add = (time.perf_counter() - start) / 1000
+
+    start = time.perf_counter()
+    for i in range(1000):
+        index.delete(len(index) // 2)
+    delete = (time.perf_counter() - start) / 1000
+
+    return {
+        "templates": count,
+        "build_s": build,
+        "keystrokes": len(latencies),
+        "results": results,
+        "keystroke_p50_ms": percentile(latencies, 50) * 1000,
+        "keystroke_p95_ms": percentile(latencies, 95) * 1000,
+        "keystroke_max_ms": max(latencies) * 1000,
+        "add_ms": add * 1000,
+        "delete_ms": delete * 1000,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    stats = run(count)
+    print(f"🦆 Indexed {stats['templates']} templates in {stats['build_s']:.2f}s, "
+          f"replayed {stats['keystrokes']} keystrokes")
+    for key in ("keystroke_p50_ms", "keystroke_p95_ms", "keystroke_max_ms", "add_ms", "delete_ms"):
+        print(f"{key:>20}: {stats[key]:8.3f} ms")
+    if stats["keystroke_p95_ms"] > target:
+        print(f"❌ p95 keystroke latency above {target:.1f} ms")
+        sys.exit(1)
+    print(f"✅ p95 keystroke latency within {target:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
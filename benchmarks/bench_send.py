@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+End-to-end send latency and throughput
+Times send_imessage's full path (SpamResponder.send_text: normalization,
+never-send check, rate limiter, bridge, ledger) per message, and batch sends,
+against the stand-in osascript in benchmarks/fakebin. Rate limits are off so
+the numbers show the code's own cost.
+
+Usage: python3 benchmarks/bench_send.py [count] [compile_ms]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+FAKE_OSASCRIPT = os.path.join(BENCH_DIR, "fakebin", "osascript")
+
+from delivery_ledger import DeliveryLedger
+from app_paths import CACHE_DIR_ENV
+from applescript_handlers import OSASCRIPT_ENV
+from messages_bridge import MessagesBridge
+from number_lists import NumberLists
+from send_scheduler import SendScheduler
+from spam_core import SpamResponder
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(count: int = 200, batch: int = 1000) -> dict:
+    os.environ[OSASCRIPT_ENV] = FAKE_OSASCRIPT
+    with tempfile.TemporaryDirectory() as tmp:
+        # The stand-in osacompile's "compiled" handlers stay out of the real cache
+        os.environ[CACHE_DIR_ENV] = os.path.join(tmp, "cache")
+        core = SpamResponder(config_file=os.path.join(tmp, "responses.json"),
+                             bridge=MessagesBridge(executable=FAKE_OSASCRIPT),
+                             scheduler=SendScheduler(None, None),
+                             ledger=DeliveryLedger(os.path.join(tmp, "ledger.db")),
+                             number_lists=NumberLists(tmp))
+        try:
+            start = time.perf_counter()
+            core.ping()
+            startup = time.perf_counter() - start
+
+            latencies = []
+            start = time.perf_counter()
+            for i in range(count):
+                t = time.perf_counter()
+                core.send_text(f"(555) 201-{i % 10000:04d}", f"QUACK {i}", template="bench")
+                latencies.append(time.perf_counter() - t)
+            single = time.perf_counter() - start
+
+            recipients = [f"555-301-{i:04d}" for i in range(batch)]
+            start = time.perf_counter()
+            results = core.send_to_many(recipients, "QUACK [SENDER NUMBER]",
+                                        variables={"date": "today"}, template="bench")
+            batched = time.perf_counter() - start
+            failed = sum(1 for r in results if not r.ok)
+        finally:
+            core.close()
+
+    return {
+        "count": count,
+        "compile_ms": float(os.environ.get("FAKE_OSASCRIPT_COMPILE_MS", "0") or 0),
+        "bridge_startup_ms": startup * 1000,
+        "send_p50_ms": percentile(latencies, 50) * 1000,
+        "send_p95_ms": percentile(latencies, 95) * 1000,
+        "send_max_ms": max(latencies) * 1000,
+        "send_msg_per_s": count / single,
+        "batch_recipients": batch,
+        "batch_failed": failed,
+        "batch_msg_per_s": batch / batched,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    if len(sys.argv) > 2:
+        os.environ["FAKE_OSASCRIPT_COMPILE_MS"] = sys.argv[2]
+    stats = run(count)
+    print(f"🦆 {count} single sends and a {stats['batch_recipients']}-number batch "
+          f"(bridge ready in {stats['bridge_startup_ms']:.0f} ms)")
+    for key in ("send_p50_ms", "send_p95_ms", "send_max_ms"):
+        print(f"{key:>16}: {stats[key]:8.3f} ms")
+    print(f"{'single sends':>16}: {stats['send_msg_per_s']:8.0f} msg/s")
+    print(f"{'batch send':>16}: {stats['batch_msg_per_s']:8.0f} msg/s")
+    if stats["batch_failed"]:
+        print(f"❌ {stats['batch_failed']} batch sends failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Outgoing image transcoding
+Writes camera-sized PNG "photos" (some saved as .jpg, the way duck hosts
+serve them), then times ImageTranscoder.prepare converting each one the
+first time and finding its cached variant on repeat sends, and reports how
+many bytes Messages is spared. Needs Pillow or sips to do anything.
+
+Usage: python3 benchmarks/bench_transcode.py [images] [width]
+"""
+
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from app_paths import CACHE_DIR_ENV
+from image_transcode import ImageTranscoder, default_backend
+
+REPEATS = 20
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def write_png(path: str, width: int, height: int, seed: int):
+    """A yellow gradient with some noise, as a valid RGB PNG"""
+    size = width * 3
+    # Noise keeps it from compressing to nothing, like a real photo
+    mask = int.from_bytes(b'\x1f' * size, 'big')
+    rows = []
+    for y in range(height):
+        shade = 255 - (y * 96 // height)
+        row = int.from_bytes(bytes((shade, (shade * 5 // 6 + seed) & 0xFF, 0)) * width, 'big')
+        noise = int.from_bytes(os.urandom(size), 'big') & mask
+        rows.append(b'\x00' + (row ^ noise).to_bytes(size, 'big'))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(b''.join(rows), 1)))
+        f.write(chunk(b'IEND', b''))
+
+
+def run(images: int = 6, width: int = 3000) -> dict:
+    backend = default_backend()
+    if backend is None:
+        return {"backend": None}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ[CACHE_DIR_ENV] = os.path.join(tmp, "cache")
+        sources = []
+        for i in range(images):
+            path = os.path.join(tmp, f"duck_{i}.{'jpg' if i % 2 else 'png'}")
+            write_png(path, width, width * 3 // 4, i)
+            sources.append(path)
+
+        transcoder = ImageTranscoder(backend=backend)
+        first, before, after = [], 0, 0
+        for path in sources:
+            start = time.perf_counter()
+            variant = transcoder.prepare(path)
+            first.append(time.perf_counter() - start)
+            before += os.path.getsize(path)
+            after += os.path.getsize(variant)
+
+        repeat = []
+        for _ in range(REPEATS):
+            for path in sources:
+                start = time.perf_counter()
+                transcoder.prepare(path)
+                repeat.append(time.perf_counter() - start)
+
+    return {
+        "backend": backend.name,
+        "images": images,
+        "width": width,
+        "transcode_p50_ms": percentile(first, 50) * 1000,
+        "transcode_max_ms": max(first) * 1000,
+        "cached_p50_us": percentile(repeat, 50) * 1e6,
+        "cached_p99_us": percentile(repeat, 99) * 1e6,
+        "source_kib": before / 1024 / images,
+        "variant_kib": after / 1024 / images,
+    }
+
+
+def main():
+    images = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    stats = run(images, width)
+    if stats["backend"] is None:
+        print("❌ No image converter - install Pillow (pip install Pillow) or run on macOS")
+        sys.exit(1)
+    print(f"🦆 {images} images of {width}px converted with {stats['backend']}, "
+          f"then sent {REPEATS} more times each")
+    for key in ("transcode_p50_ms", "transcode_max_ms"):
+        print(f"{key:>16}: {stats[key]:10.2f} ms")
+    for key in ("cached_p50_us", "cached_p99_us"):
+        print(f"{key:>16}: {stats[key]:10.2f} µs")
+    print(f"{'upload size':>16}: {stats['source_kib']:.0f} KiB -> {stats['variant_kib']:.0f} KiB per image")
+
+
+if __name__ == "__main__":
+    main()
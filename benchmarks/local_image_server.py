@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the duck image hosts
+HTTP/1.1 keep-alive server that serves generated images from memory, with
+ETag/If-None-Match support, so the download path can be measured offline
+
+Usage: python3 benchmarks/local_image_server.py [port]
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+JPEG_HEADER = b'\xff\xd8\xff\xe0\x00\x10JFIF\x00'
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+
+
+def make_images(count: int = 10, size: int = 64 * 1024) -> dict:
+    """Fake but correctly sniffable images, keyed by URL path"""
+    images = {}
+    for i in range(count):
+        header, ext = (JPEG_HEADER, 'jpg') if i % 2 == 0 else (PNG_HEADER, 'png')
+        body = header + os.urandom(size - len(header))
+        content_type = 'image/jpeg' if ext == 'jpg' else 'image/png'
+        images[f"/duck_{i}.{ext}"] = (content_type, body, '"' + hashlib.md5(body).hexdigest() + '"')
+    images["/not_an_image.jpg"] = ('text/html', b'<html>404 duck not found</html>', '"html"')
+    return images
+
+
+class DuckImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    images = {}
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path not in self.images:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        content_type, body, etag = self.images[path]
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'max-age=3600')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port: int = 0, images: dict = None) -> ThreadingHTTPServer:
+    """Start the server on a background thread; server.server_address has the port"""
+    handler = type('Handler', (DuckImageHandler,), {'images': images or make_images()})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    server = start_server(int(sys.argv[1]) if len(sys.argv) > 1 else 8000)
+    print(f"🦆 Serving duck images at {base_url(server)}/duck_0.jpg ... (Ctrl-C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
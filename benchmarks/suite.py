@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite
+Runs every benchmark in one go on Linux or macOS - sends go to the stand-in
+osascript in benchmarks/fakebin and images come from a local HTTP server - and
+saves the results as JSON (tagged with the git commit), so a change can be
+compared against an earlier run:
+
+  python3 benchmarks/suite.py                    # quick sizes, saved to benchmarks/results/
+  python3 benchmarks/suite.py --full             # the sizes each benchmark defaults to
+  python3 benchmarks/suite.py --only send duck   # just some of them
+  python3 benchmarks/suite.py --compare benchmarks/results/OLD.json
+  python3 benchmarks/suite.py compare OLD.json NEW.json
+
+Comparisons flag timings (…_ms, …_us, …_s) that got slower and rates
+(…per_s, …per_sec) that dropped by more than --threshold percent, and exit 1
+if any did.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+# Simulated AppleScript compile time for every osascript call, unless set
+DEFAULT_COMPILE_MS = "20"
+
+# name -> (module, run() arguments for a quick run, for a full run)
+BENCHMARKS = {
+    "bridge": ("bench_bridge", {"count": 50}, {}),
+    "send": ("bench_send", {"count": 200, "batch": 200}, {}),
+    "phone": ("bench_phone", {"count": 100000, "unique": 20000}, {}),
+    "responses": ("bench_responses", {"sizes": (100, 1000, 10000)}, {}),
+    "duck": ("bench_duck", {"count": 50}, {}),
+    "http_pool": ("bench_http_pool", {"count": 100}, {}),
+    "search": ("bench_search", {"count": 20000}, {}),
+    "ledger": ("bench_ledger", {"rows": 100000, "queries": 500}, {}),
+    "number_lists": ("bench_number_lists", {"count": 200000}, {}),
+    "transcode": ("bench_transcode", {"images": 3, "width": 2000}, {}),
+    "corpus": ("bench_corpus", {"images": 1000}, {}),
+}
+
+DEFAULT_THRESHOLD = 10.0
+
+# Inputs recorded alongside the results, not measurements
+SETTINGS = {"compile_ms"}
+
+
+def git_commit() -> str:
+    """Short hash of HEAD, with -dirty if there are uncommitted changes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=APP_DIR, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def run_suite(names, full: bool = False) -> Dict:
+    """Run the named benchmarks in an isolated cache dir; returns the result document"""
+    os.environ["PATH"] = os.path.join(BENCH_DIR, "fakebin") + os.pathsep + os.environ.get("PATH", "")
+    os.environ["SPAM_OSASCRIPT"] = os.path.join(BENCH_DIR, "fakebin", "osascript")
+    os.environ.setdefault("FAKE_OSASCRIPT_COMPILE_MS", DEFAULT_COMPILE_MS)
+
+    document = {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mode": "full" if full else "quick",
+        "compile_ms": float(os.environ["FAKE_OSASCRIPT_COMPILE_MS"]),
+        "results": {},
+        "seconds": {},
+    }
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name in names:
+            module_name, quick_args, full_args = BENCHMARKS[name]
+            # Every benchmark gets a fresh cache so none is warmed by another
+            os.environ["SPAM_CACHE_DIR"] = os.path.join(cache_dir, name)
+            print(f"⏱️  {name}...", file=sys.stderr, flush=True)
+            start = time.perf_counter()
+            module = importlib.import_module(module_name)
+            document["results"][name] = module.run(**(full_args if full else quick_args))
+            document["seconds"][name] = round(time.perf_counter() - start, 2)
+    return document
+
+
+def save(document: Dict, path: Optional[str] = None) -> str:
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{stamp}-{document['commit']}.json")
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return path
+
+
+def flatten(results: Dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """("send.send_p95_ms", 0.28), ... for every numeric result"""
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten(value, name + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, float(value)
+
+
+def direction(metric: str) -> int:
+    """+1 if bigger is better, -1 if smaller is better, 0 for counts and settings"""
+    key = metric.rsplit(".", 1)[-1]
+    if key in SETTINGS:
+        return 0
+    if "per_s" in key:
+        return 1
+    if key.endswith(("_ms", "_us", "_s")):
+        return -1
+    return 0
+
+
+def compare(old: Dict, new: Dict, threshold: float = DEFAULT_THRESHOLD) -> int:
+    """Print every timing/rate in both documents; returns the number of regressions"""
+    before = dict(flatten(old["results"]))
+    after = dict(flatten(new["results"]))
+    print(f"Comparing {old['commit']} ({old['created']}) -> {new['commit']} ({new['created']})")
+    if old.get("mode") != new.get("mode") or old.get("compile_ms") != new.get("compile_ms"):
+        print("⚠️  The runs used different sizes or compile times; differences may not mean much")
+
+    regressions = 0
+    for metric in sorted(before.keys() & after.keys()):
+        sign = direction(metric)
+        if not sign or before[metric] == 0:
+            continue
+        change = (after[metric] - before[metric]) / before[metric] * 100
+        worse = -change * sign
+        if worse > threshold:
+            marker = "❌"
+            regressions += 1
+        elif worse < -threshold:
+            marker = "✅"
+        else:
+            marker = "  "
+        print(f"{marker} {metric:<40} {before[metric]:>12.3f} {after[metric]:>12.3f} {change:+8.1f}%")
+    for metric in sorted(before.keys() ^ after.keys()):
+        print(f"   {metric:<40} only in {'the old' if metric in before else 'the new'} run")
+    print(f"🦆 {regressions} regression(s) beyond {threshold:g}%")
+    return regressions
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["compare"]:
+        parser = argparse.ArgumentParser(prog="suite.py compare",
+                                         description="Compare two saved benchmark runs")
+        parser.add_argument("old")
+        parser.add_argument("new")
+        parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+        args = parser.parse_args(argv[1:])
+        return 1 if compare(load(args.old), load(args.new), args.threshold) else 0
+
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and save the results")
+    parser.add_argument("--full", action="store_true", help="use each benchmark's default sizes")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), metavar="NAME",
+                        help=f"benchmarks to run: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--output", "-o", help="result file (default: benchmarks/results/DATE-COMMIT.json)")
+    parser.add_argument("--compare", metavar="OLD_JSON", help="compare against an earlier run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"percent change counted as a regression (default {DEFAULT_THRESHOLD:g})")
+    args = parser.parse_args(argv)
+
+    document = run_suite(args.only or list(BENCHMARKS), full=args.full)
+    path = save(document, args.output)
+    print(f"🦆 Results saved to {os.path.relpath(path)}")
+    if args.compare:
+        return 1 if compare(load(args.compare), document, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Delivery ledger
+Every send attempt - texts, duck images, batch recipients - is recorded in an
+indexed SQLite table: recipient, template, attachment hash, rate-limit wait,
+send time and result. Sends only queue a row; a writer thread commits rows in
+batches, so recording never waits on the disk.
+
+Usage: python3 delivery_ledger.py [phone]    (recent sends, or one number's history)
+"""
+
+import hashlib
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app_paths import user_data_path
+from phone_numbers import clean_phone
+
+# Override for the ledger location
+LEDGER_FILE_ENV = "SPAM_LEDGER_FILE"
+DEFAULT_LEDGER_FILE = "delivery_ledger.db"
+
+# Most rows committed in one transaction
+WRITE_BATCH_SIZE = 1000
+
+# Kinds of send
+TEXT = "text"
+IMAGE = "image"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sends (
+    id INTEGER PRIMARY KEY,
+    sent_at REAL NOT NULL,
+    phone TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    template TEXT,
+    message TEXT,
+    attachment_sha256 TEXT,
+    wait_ms REAL NOT NULL DEFAULT 0,
+    duration_ms REAL NOT NULL DEFAULT 0,
+    ok INTEGER NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sends_phone_time ON sends(phone, sent_at);
+CREATE INDEX IF NOT EXISTS idx_sends_time ON sends(sent_at);
+"""
+
+COLUMNS = ("id", "sent_at", "phone", "kind", "template", "message", "attachment_sha256",
+           "wait_ms", "duration_ms", "ok", "error")
+
+INSERT = ("INSERT INTO sends (sent_at, phone, kind, template, message, attachment_sha256, "
+          "wait_ms, duration_ms, ok, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def ledger_path() -> str:
+    return os.environ.get(LEDGER_FILE_ENV) or user_data_path(DEFAULT_LEDGER_FILE)
+
+
+def file_sha256(path: str) -> Optional[str]:
+    """Content hash of an attachment, or None if it's gone already"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class DeliveryLedger:
+    """Append-only send log with a background writer
+
+    record() only puts the row on a queue; queries see every row recorded
+    before they were called.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or ledger_path()
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.executescript(SCHEMA)
+        self._rows = queue.Queue()
+        self._writer = threading.Thread(target=self._write_rows, name="delivery-ledger", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # Writing
+
+    def record(self, phone: str, ok: bool, kind: str = TEXT, template: Optional[str] = None,
+               message: Optional[str] = None, attachment: Optional[str] = None,
+               error: str = "", wait: float = 0.0, duration: float = 0.0,
+               sent_at: Optional[float] = None):
+        """Queue one send attempt (wait and duration in seconds; attachment is a file path)"""
+        self._rows.put((sent_at or time.time(), clean_phone(phone), kind, template, message,
+                        attachment, wait * 1000.0, duration * 1000.0, int(ok), error or None))
+
+    def _write_rows(self):
+        conn = self._connect()
+        try:
+            while True:
+                item = self._rows.get()
+                items = [item]
+                while item is not None and len(items) < WRITE_BATCH_SIZE:
+                    try:
+                        item = self._rows.get_nowait()
+                    except queue.Empty:
+                        break
+                    items.append(item)
+
+                rows = []
+                for item in items:
+                    if isinstance(item, tuple):
+                        row = list(item)
+                        if row[5]:
+                            # Hash here rather than on the sending thread
+                            row[5] = file_sha256(row[5])
+                        rows.append(row)
+                try:
+                    with conn:
+                        conn.executemany(INSERT, rows)
+                except sqlite3.Error as e:
+                    print(f"Delivery ledger write failed ({len(rows)} rows lost): {e}")
+
+                for item in items:
+                    if isinstance(item, threading.Event):
+                        item.set()
+                if items[-1] is None:
+                    return
+        finally:
+            conn.close()
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Wait until every row recorded so far is committed"""
+        if not self._writer.is_alive():
+            return False
+        done = threading.Event()
+        self._rows.put(done)
+        return done.wait(timeout)
+
+    # Queries
+
+    def _query(self, sql: str, params: tuple) -> List[Dict]:
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def last_send(self, phone: str, include_failed: bool = False) -> Optional[Dict]:
+        """The most recent thing sent to phone (successful sends only, unless include_failed)"""
+        condition = "" if include_failed else " AND ok = 1"
+        rows = self._query(f"SELECT {', '.join(COLUMNS)} FROM sends WHERE phone = ?{condition} "
+                           "ORDER BY sent_at DESC LIMIT 1", (clean_phone(phone),))
+        return rows[0] if rows else None
+
+    def history(self, phone: str, limit: int = 20) -> List[Dict]:
+        """phone's send attempts, newest first"""
+        return self._query(f"SELECT {', '.join(COLUMNS)} FROM sends WHERE phone = ? "
+                           "ORDER BY sent_at DESC LIMIT ?", (clean_phone(phone), limit))
+
+    def recent(self, since: float, limit: int = 100) -> List[Dict]:
+        """Send attempts at or after the Unix time since, newest first"""
+        return self._query(f"SELECT {', '.join(COLUMNS)} FROM sends WHERE sent_at >= ? "
+                           "ORDER BY sent_at DESC LIMIT ?", (since, limit))
+
+    def count_since(self, since: float, phone: Optional[str] = None,
+                    ok_only: bool = True) -> int:
+        """Number of sends at or after the Unix time since (to one number, if given)"""
+        sql = "SELECT COUNT(*) FROM sends WHERE sent_at >= ?"
+        params = [since]
+        if phone:
+            sql = "SELECT COUNT(*) FROM sends WHERE phone = ? AND sent_at >= ?"
+            params.insert(0, clean_phone(phone))
+        if ok_only:
+            sql += " AND ok = 1"
+        self.flush()
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def sends_in_last_hour(self, phone: Optional[str] = None) -> int:
+        return self.count_since(time.time() - 3600, phone)
+
+    def close(self):
+        """Commit queued rows and stop the writer"""
+        if self._writer.is_alive():
+            self._rows.put(None)
+            self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+
+def describe_send(row: Dict) -> str:
+    """One line for a ledger row"""
+    when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["sent_at"]))
+    what = row["template"] or (row["message"] or "")[:40] or row["kind"]
+    if row["kind"] == IMAGE:
+        what = f"{what} [image {(row['attachment_sha256'] or '?')[:12]}]"
+    result = "OK" if row["ok"] else f"ERR {row['error']}"
+    return f"{when}  {row['phone']}  {what}  ({row['wait_ms']:.0f} ms wait)  {result}"
+
+
+def main():
+    ledger = DeliveryLedger()
+    try:
+        if len(sys.argv) > 1:
+            rows = ledger.history(sys.argv[1])
+        else:
+            rows = ledger.recent(time.time() - 24 * 3600)
+        for row in rows:
+            print(describe_send(row))
+        print(f"🦆 {ledger.sends_in_last_hour()} sends in the last hour")
+    finally:
+        ledger.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Background job dispatcher
+Runs sends and downloads on worker threads; the Tk thread only submits jobs
+and drains finished results with poll() from a root.after loop
+"""
+
+import itertools
+import queue
+import threading
+import traceback
+from typing import Callable, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class Job:
+    """A unit of background work plus its UI-thread callbacks"""
+
+    def __init__(self, job_id: int, label: str, func: Callable, args: tuple, kwargs: dict,
+                 on_done: Optional[Callable] = None, on_error: Optional[Callable] = None,
+                 on_progress: Optional[Callable] = None):
+        self.id = job_id
+        self.label = label
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self._cancel_event = threading.Event()
+        self._events = None
+
+    def cancel(self):
+        """Ask the job to stop; queued jobs never start, running jobs stop at their next check"""
+        self._cancel_event.set()
+
+    def cancelled(self) -> bool:
+        """True once cancel() has been called (long jobs should check this)"""
+        return self._cancel_event.is_set()
+
+    def report_progress(self, done: int, total: int, message: str = ""):
+        """Publish progress from the worker thread; delivered to on_progress by poll()"""
+        if self._events is not None:
+            self._events.put(("progress", self, (done, total, message)))
+
+
+class SendDispatcher:
+    """Thread pool with a result queue the UI thread polls"""
+
+    def __init__(self, workers: int = 4):
+        self._jobs = queue.Queue()
+        self._events = queue.Queue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active = {}
+        self.submitted = 0
+        self.finished = 0
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"send-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, label: str, func: Callable, *args,
+               on_done: Optional[Callable] = None, on_error: Optional[Callable] = None,
+               on_progress: Optional[Callable] = None, **kwargs) -> Job:
+        """Queue func(job, *args, **kwargs) to run on a worker thread
+
+        on_done(result), on_error(exception) and on_progress(done, total, message)
+        are called on whichever thread calls poll(), i.e. the Tk thread.
+        """
+        job = Job(next(self._ids), label, func, args, kwargs, on_done, on_error, on_progress)
+        job._events = self._events
+        with self._lock:
+            self._active[job.id] = job
+            self.submitted += 1
+        self._jobs.put(job)
+        return job
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            if job.cancelled():
+                job.state = CANCELLED
+                self._events.put(("cancelled", job, None))
+                continue
+
+            job.state = RUNNING
+            try:
+                job.result = job.func(job, *job.args, **job.kwargs)
+            except Exception as e:
+                job.error = e
+                job.state = FAILED
+                traceback.print_exc()
+                self._events.put(("failed", job, e))
+            else:
+                job.state = CANCELLED if job.cancelled() else DONE
+                self._events.put(("done", job, job.result))
+
+    def poll(self, limit: int = 100) -> List[Job]:
+        """Deliver pending results/progress to their callbacks; returns finished jobs"""
+        finished = []
+        for _ in range(limit):
+            try:
+                kind, job, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "progress":
+                if job.on_progress:
+                    job.on_progress(*payload)
+                continue
+
+            with self._lock:
+                self._active.pop(job.id, None)
+                self.finished += 1
+            finished.append(job)
+
+            if kind == "done" and job.on_done:
+                job.on_done(payload)
+            elif kind == "failed" and job.on_error:
+                job.on_error(payload)
+        return finished
+
+    def in_flight(self) -> int:
+        """Number of jobs queued or running"""
+        with self._lock:
+            return len(self._active)
+
+    def cancel_all(self) -> int:
+        """Cancel every queued or running job; returns how many were flagged"""
+        with self._lock:
+            jobs = list(self._active.values())
+        for job in jobs:
+            job.cancel()
+        return len(jobs)
+
+    def reset_counters(self):
+        """Start a fresh progress wave once everything has drained"""
+        with self._lock:
+            if not self._active:
+                self.submitted = 0
+                self.finished = 0
+
+    def shutdown(self):
+        """Cancel outstanding work and stop the worker threads"""
+        self.cancel_all()
+        for _ in self._threads:
+            self._jobs.put(None)
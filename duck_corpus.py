@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Local duck image corpus
+Sends duck photos from a folder instead of downloading them: ducks/ next to
+the app, or the directory in $SPAM_DUCK_DIR. The folder is scanned into an
+index (path, size, SHA-256, dimensions) in the cache folder by a background
+thread; later scans only re-hash files whose size or modification time
+changed, and picking a duck never waits for one. Images are
+picked from a shuffled cycle, so none repeats until every one (identical
+copies counting once) has been sent, and the cycle survives restarts.
+
+Usage:
+  python3 duck_corpus.py [folder]            (scan and summarize)
+  python3 duck_corpus.py [folder] --next 5   (show the next picks, without using them up)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import metrics
+from app_paths import user_cache_dir
+from image_download import sniff_file
+from image_transcode import hash_file, image_dimensions
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Folder of duck images; "off" always downloads them
+DUCK_DIR_ENV = "SPAM_DUCK_DIR"
+DEFAULT_DUCK_DIR = os.path.join(APP_DIR, "ducks")
+
+# Seconds between checks of the folder for added, changed or removed images
+RESCAN_INTERVAL = 60.0
+
+# Anything smaller on either side is an icon, not a duck photo
+MIN_DIMENSION = 64
+
+INDEX_VERSION = 1
+
+
+def corpus_dir() -> Optional[str]:
+    """The duck folder, or None if there isn't one"""
+    configured = os.environ.get(DUCK_DIR_ENV, "")
+    if configured.lower() == "off":
+        return None
+    path = os.path.expanduser(configured) if configured else DEFAULT_DUCK_DIR
+    return path if os.path.isdir(path) else None
+
+
+class DuckCorpus:
+    """Indexed folder of duck images, handed out in shuffled no-repeat order"""
+
+    def __init__(self, directory: str, index_path: Optional[str] = None,
+                 rescan_interval: float = RESCAN_INTERVAL, rng: Optional[random.Random] = None):
+        self.directory = os.path.abspath(directory)
+        if index_path is None:
+            name = hashlib.sha256(self.directory.encode('utf-8')).hexdigest()[:16]
+            index_path = os.path.join(user_cache_dir("duck_corpus"), f"{name}.json")
+        self.index_path = index_path
+        self.rescan_interval = rescan_interval
+        self._rng = rng or random.Random()
+        # Relative path -> size, mtime_ns, sha256, width, height (sha256 is
+        # None for files that aren't usable images, so they aren't re-read)
+        self.entries: Dict[str, Dict] = {}
+        # SHA-256 -> relative path of one copy, for every usable image
+        self._paths: Dict[str, str] = {}
+        # Sent this cycle, and still to send (the next one last)
+        self.sent = set()
+        self._queue: List[str] = []
+        self._last = None
+        self._dirty = False
+        # _lock guards the state above and is only held briefly; _scan_lock
+        # keeps scans and index writes (the slow, disk-bound part) in order
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._wake = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self._load_index()
+
+    @classmethod
+    def from_env(cls) -> Optional["DuckCorpus"]:
+        directory = corpus_dir()
+        return cls(directory) if directory else None
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(raw, dict) or raw.get("version") != INDEX_VERSION \
+                or raw.get("directory") != self.directory:
+            return
+        self.entries = {path: entry for path, entry in raw.get("files", {}).items()
+                        if isinstance(entry, dict)}
+        self.sent = set(raw.get("sent", []))
+        self._index_images()
+
+    def start(self):
+        """Scan now and every rescan_interval on a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="duck-corpus", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread (abandoning a scan in progress)"""
+        with self._wake:
+            self._stopped = True
+            self._wake.notify_all()
+
+    def _run(self):
+        while True:
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"Duck folder scan failed for {self.directory}: {e}")
+            with self._wake:
+                if self._wake.wait_for(lambda: self._stopped, self.rescan_interval):
+                    return
+
+    def save(self):
+        """Write the index and the cycle's progress atomically"""
+        with self._scan_lock:
+            self._save()
+
+    def _save(self):
+        # Entries are replaced, never changed in place, so the document can be
+        # written without holding up picks
+        with self._lock:
+            document = {
+                "version": INDEX_VERSION,
+                "directory": self.directory,
+                "files": self.entries,
+                "sent": sorted(self.sent),
+            }
+            self._dirty = False
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.index_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(document, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Could not save the duck index {self.index_path}: {e}")
+            with self._lock:
+                self._dirty = True
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def _index_images(self):
+        """Rebuild the hash -> path map and drop vanished images from the cycle"""
+        paths = {}
+        for path, entry in sorted(self.entries.items()):
+            if entry.get("sha256"):
+                paths.setdefault(entry["sha256"], path)
+        self._paths = paths
+        self.sent &= paths.keys()
+        self._queue = [sha256 for sha256 in paths if sha256 not in self.sent]
+        self._rng.shuffle(self._queue)
+
+    def scan(self) -> Dict[str, int]:
+        """Bring the index up to date with the folder; returns what changed
+
+        Walking and hashing happen outside _lock, so next_image keeps
+        answering from the previous index until the new one is swapped in.
+        """
+        with self._scan_lock:
+            return self._scan()
+
+    def _scan(self) -> Dict[str, int]:
+        counts = {"files": 0, "hashed": 0, "removed": 0}
+        known = self.entries
+        entries = {}
+        with metrics.timer("duck.corpus_scan"):
+            for root, dirs, files in os.walk(self.directory):
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                for name in files:
+                    if self._stopped:
+                        return counts
+                    if name.startswith('.'):
+                        continue
+                    full_path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(full_path)
+                    except OSError:
+                        continue
+                    path = os.path.relpath(full_path, self.directory)
+                    entry = known.get(path)
+                    if entry is None or entry.get("size") != stat.st_size \
+                            or entry.get("mtime_ns") != stat.st_mtime_ns:
+                        entry = self._describe(full_path, stat)
+                        counts["hashed"] += 1
+                    entries[path] = entry
+                    counts["files"] += 1
+        counts["removed"] = len(known.keys() - entries.keys())
+        metrics.count("duck.corpus_hashed", counts["hashed"])
+
+        changed = counts["hashed"] or counts["removed"]
+        with self._lock:
+            self.entries = entries
+            if changed:
+                self._index_images()
+            dirty = changed or self._dirty
+        if dirty:
+            self._save()
+        return counts
+
+    def _describe(self, full_path: str, stat: os.stat_result) -> Dict:
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": None}
+        if sniff_file(full_path) is None:
+            return entry
+        size = image_dimensions(full_path)
+        if size is not None:
+            entry["width"], entry["height"] = size
+            if min(size) < MIN_DIMENSION:
+                return entry
+        try:
+            entry["sha256"] = hash_file(full_path)
+        except OSError:
+            pass
+        return entry
+
+    def next_image(self) -> Optional[str]:
+        """Path of the next duck to send, or None if the folder has no usable images
+
+        Only picks from the index; scan() (or start()) keeps it up to date.
+        """
+        with self._lock:
+            while self._paths:
+                if not self._queue:
+                    self._new_cycle()
+                sha256 = self._queue.pop()
+                path = os.path.join(self.directory, self._paths[sha256])
+                if not os.path.exists(path):
+                    # Deleted since the last scan, which will re-add it if it comes back
+                    del self._paths[sha256]
+                    continue
+                self.sent.add(sha256)
+                self._last = sha256
+                self._dirty = True
+                return path
+        return None
+
+    def _new_cycle(self):
+        """Every image has been sent: reshuffle them all"""
+        self.sent.clear()
+        self._queue = list(self._paths)
+        self._rng.shuffle(self._queue)
+        # Don't send the last image of one cycle as the first of the next
+        if len(self._queue) > 1 and self._queue[-1] == self._last:
+            self._queue[0], self._queue[-1] = self._queue[-1], self._queue[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            images = [entry for entry in self.entries.values() if entry.get("sha256")]
+            return {
+                "files": len(self.entries),
+                "images": len(images),
+                "unique": len(self._paths),
+                "bytes": sum(entry["size"] for entry in images),
+                "left_in_cycle": len(self._queue),
+            }
+
+    def close(self):
+        """Stop scanning and save the cycle's progress so a restart carries on where this left off"""
+        self.stop()
+        with self._scan_lock:
+            if self._dirty:
+                self._save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan a folder of duck images")
+    parser.add_argument("folder", nargs="?", help=f"default: ${DUCK_DIR_ENV} or {DEFAULT_DUCK_DIR}")
+    parser.add_argument("--next", type=int, default=0, metavar="N",
+                        help="show the next N picks (the app still sends them)")
+    args = parser.parse_args()
+
+    directory = args.folder or corpus_dir()
+    if not directory or not os.path.isdir(directory):
+        print(f"❌ No duck folder - create {DEFAULT_DUCK_DIR} or set {DUCK_DIR_ENV}")
+        sys.exit(1)
+    corpus = DuckCorpus(directory)
+    start = time.perf_counter()
+    counts = corpus.scan()
+    elapsed = time.perf_counter() - start
+    stats = corpus.stats()
+    print(f"🦆 {corpus.directory}: {stats['images']} duck images ({stats['unique']} different, "
+          f"{stats['bytes'] / 1e6:.1f} MB) of {stats['files']} files")
+    print(f"Scanned in {elapsed * 1000:.0f} ms: {counts['hashed']} hashed, {counts['removed']} removed")
+    # Not closed, so these picks aren't saved as sent
+    for _ in range(args.next):
+        print(corpus.next_image())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Duck image prefetcher
+Keeps a small pool of downloaded, validated (and optionally transcoded) duck
+images ready so that "Send Duck Image" only pays for the Messages send, never
+the download or the conversion
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+from image_cache import ImageCache
+from image_download import sniff_file
+
+DEFAULT_POOL_SIZE = 3
+
+# Retry delays (seconds) after failed fetches, so dead hosts aren't hammered
+MIN_BACKOFF = 2.0
+MAX_BACKOFF = 120.0
+
+
+def looks_like_image(path: str) -> bool:
+    """Cheap check that a cached file is still an image and not an error page"""
+    return sniff_file(path) is not None
+
+
+class DuckPrefetcher:
+    """Background thread that keeps pool_size images downloaded and ready"""
+
+    def __init__(self, url_source: Callable[[], Optional[str]], cache: ImageCache,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 validate: Callable[[str], bool] = looks_like_image,
+                 prepare: Optional[Callable[[str], str]] = None):
+        self.url_source = url_source
+        self.cache = cache
+        self.pool_size = pool_size
+        self.validate = validate
+        # Turns a downloaded image into the file that will be sent
+        self.prepare = prepare
+        self._ready = deque()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self.fetched = 0
+        self.failures = 0
+
+    def start(self):
+        """Start filling the pool in the background"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="duck-prefetcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def ready_count(self) -> int:
+        """Images currently waiting in the pool"""
+        with self._cond:
+            return len(self._ready)
+
+    def take(self, timeout: float = 0.0) -> Optional[Tuple[str, str]]:
+        """Pop a ready (url, path) pair, waiting up to timeout; None if the pool is empty"""
+        with self._cond:
+            if not self._ready and timeout > 0:
+                self._cond.wait_for(lambda: self._ready or self._stopped, timeout)
+            while self._ready:
+                url, path = self._ready.popleft()
+                # Wake the refill loop now that there is room
+                self._cond.notify_all()
+                if os.path.exists(path):
+                    return url, path
+        return None
+
+    def _run(self):
+        backoff = MIN_BACKOFF
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopped or len(self._ready) < self.pool_size)
+                if self._stopped:
+                    return
+                pooled_urls = {url for url, _ in self._ready}
+
+            item = self._fetch_one(pooled_urls)
+            with self._cond:
+                if item:
+                    self._ready.append(item)
+                    self._cond.notify_all()
+                    backoff = MIN_BACKOFF
+                    continue
+
+                # Back off before retrying, but wake up immediately on stop()
+                self._cond.wait_for(lambda: self._stopped, backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+    def _fetch_one(self, pooled_urls: set) -> Optional[Tuple[str, str]]:
+        url = self.url_source()
+        # Prefer an image that isn't already waiting in the pool
+        for _ in range(3):
+            if url not in pooled_urls:
+                break
+            url = self.url_source()
+        if not url:
+            return None
+
+        try:
+            path = self.cache.get(url)
+        except Exception as e:
+            self.failures += 1
+            print(f"Duck prefetch failed for {url}: {e}")
+            return None
+
+        if not self.validate(path):
+            self.failures += 1
+            self.cache.discard(url)
+            print(f"Duck prefetch discarded non-image from {url}")
+            return None
+
+        if self.prepare is not None:
+            try:
+                path = self.prepare(path)
+            except Exception as e:
+                self.failures += 1
+                print(f"Duck prefetch could not prepare {url}: {e}")
+                return None
+
+        self.fetched += 1
+        return url, path
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Pooled keep-alive HTTP client
+Reuses connections per host (the duck image sources share a couple of hosts),
+with separate connect and read timeouts configurable per source
+"""
+
+import http.client
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 15.0
+
+# Idle connections per host kept for reuse
+DEFAULT_MAX_IDLE_PER_HOST = 4
+
+# Servers drop idle keep-alive connections; don't bother reusing older ones
+DEFAULT_IDLE_TIMEOUT = 30.0
+
+# Unread bodies up to this size (304s, error pages) are drained on close so
+# the connection can still be reused
+DRAIN_LIMIT = 64 * 1024
+
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Errors that mean a pooled connection went stale while idle
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                           ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+
+class HTTPPoolError(OSError):
+    """Raised for protocol-level failures (bad status line, too many redirects, ...)"""
+
+
+class PooledResponse:
+    """An HTTP response whose connection goes back to the pool once the body is consumed"""
+
+    def __init__(self, client: "HTTPClient", key: Tuple, conn, response, url: str):
+        self._client = client
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        try:
+            return self._response.read(amt)
+        except http.client.HTTPException as e:
+            self._discard()
+            raise HTTPPoolError(f"Error reading {self.url}: {e}")
+
+    def close(self):
+        """Release the connection: back to the pool if reusable, otherwise closed"""
+        if self._conn is None:
+            return
+        length = self._response.length
+        if not self._response.isclosed() and length is not None and length <= DRAIN_LIMIT:
+            try:
+                self._response.read()
+            except (http.client.HTTPException, OSError):
+                self._discard()
+                return
+        if self._response.isclosed() and not self._response.will_close:
+            self._client._release(self._key, self._conn)
+            self._conn = None
+        else:
+            # Body not fully read (e.g. aborted download) - the connection is unusable
+            self._discard()
+
+    def _discard(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HTTPClient:
+    """Minimal HTTP/1.1 client with per-host keep-alive connection pooling"""
+
+    def __init__(self, timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        # host -> (connect timeout, read timeout)
+        self.timeouts = dict(timeouts or {})
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self._ssl_context = ssl.create_default_context()
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+
+    def set_timeouts(self, host: str, connect: float, read: float):
+        """Configure connect/read timeouts for one source host"""
+        self.timeouts[host.lower()] = (connect, read)
+
+    def timeouts_for(self, host: str) -> Tuple[float, float]:
+        return self.timeouts.get(host.lower(), (self.connect_timeout, self.read_timeout))
+
+    def stats(self) -> Dict[str, int]:
+        """Request and connection-reuse counters"""
+        with self._lock:
+            idle = sum(len(conns) for conns in self._idle.values())
+        return {
+            'requests': self.requests,
+            'connections_opened': self.connections_opened,
+            'connections_reused': self.connections_reused,
+            'idle_connections': idle,
+        }
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                follow_redirects: bool = True) -> PooledResponse:
+        """Send a request and return the response with its body still unread"""
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._request_once(method, url, headers or {})
+            location = response.headers.get('Location')
+            if not (follow_redirects and response.status in REDIRECT_STATUSES and location):
+                return response
+            # Drain the redirect body so the connection can be reused
+            response.read()
+            response.close()
+            url = urllib.parse.urljoin(url, location)
+            if response.status == 303:
+                method = 'GET'
+        raise HTTPPoolError(f"Too many redirects fetching {url}")
+
+    def _request_once(self, method: str, url: str, headers: Dict[str, str]) -> PooledResponse:
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise HTTPPoolError(f"Unsupported URL: {url}")
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname.lower(), port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        request_headers = {'Connection': 'keep-alive'}
+        request_headers.update(headers)
+
+        conn, reused = self._acquire(key)
+        try:
+            try:
+                conn.request(method, path, headers=request_headers)
+                response = conn.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                # The server closed the idle connection; retry once on a fresh one
+                conn.close()
+                conn, reused = self._acquire(key, fresh=True)
+                conn.request(method, path, headers=request_headers)
+                response = conn.getresponse()
+        except http.client.HTTPException as e:
+            conn.close()
+            raise HTTPPoolError(f"HTTP error fetching {url}: {e}")
+        except (OSError, socket.timeout):
+            conn.close()
+            raise
+
+        with self._lock:
+            self.requests += 1
+        return PooledResponse(self, key, conn, response, url)
+
+    def _acquire(self, key: Tuple, fresh: bool = False):
+        """Return (connection, reused) for key, preferring an idle pooled connection"""
+        if not fresh:
+            now = time.monotonic()
+            with self._lock:
+                idle = self._idle[key]
+                while idle:
+                    conn, released_at = idle.pop()
+                    if now - released_at < self.idle_timeout:
+                        self.connections_reused += 1
+                        return conn, True
+                    conn.close()
+
+        scheme, host, port = key
+        connect_timeout, read_timeout = self.timeouts_for(host)
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(host, port, timeout=connect_timeout,
+                                               context=self._ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=connect_timeout)
+        conn.connect()
+        # Connect timeout applies to the handshake; reads get their own budget
+        conn.sock.settimeout(read_timeout)
+        with self._lock:
+            self.connections_opened += 1
+        return conn, False
+
+    def _release(self, key: Tuple, conn):
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.max_idle_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle.clear()
+        for idle in pools:
+            for conn, _ in idle:
+                conn.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> HTTPClient:
+    """Return the process-wide pooled client, creating it on first use"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HTTPClient()
+        return _default_client
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+On-disk duck image cache
+Content-addressed files keyed by URL, with LRU eviction under a size/count cap,
+ETag/Last-Modified revalidation, and an index file so a warm cache survives
+restarts. A fresh hit costs no network I/O at all.
+"""
+
+import email.utils
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+import metrics
+from app_paths import user_cache_dir
+from http_pool import HTTPClient
+from image_download import DEFAULT_MAX_BYTES as DEFAULT_MAX_DOWNLOAD_BYTES
+from image_download import DownloadResult, ImageDownloadError, download_image
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 200
+
+# Duck photos don't change; serve without revalidating for a week unless the
+# server says otherwise with Cache-Control: max-age
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+INDEX_FILE = "index.json"
+
+# How many recent downloads to keep timing stats for
+DOWNLOAD_HISTORY = 50
+
+MAX_AGE_PATTERN = re.compile(r'max-age\s*=\s*(\d+)')
+
+
+class ImageCache:
+    """LRU cache of downloaded images, persisted across restarts"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_download_bytes: int = DEFAULT_MAX_DOWNLOAD_BYTES,
+                 client: Optional[HTTPClient] = None):
+        self.cache_dir = cache_dir or user_cache_dir("duck_images")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.client = client
+        self.max_download_bytes = max_download_bytes
+        self.downloads = deque(maxlen=DOWNLOAD_HISTORY)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        # Hits only reorder the LRU; that is written with the next change or on close()
+        self._dirty = False
+        self.entries = self._load_index()
+
+    def _load_index(self) -> "OrderedDict[str, Dict]":
+        """Read the index, dropping entries whose files have gone missing"""
+        try:
+            with open(self.index_path, 'r') as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            raw = {}
+
+        entries = [(url, entry) for url, entry in raw.items()
+                   if isinstance(entry, dict) and os.path.exists(self._file_path(entry))]
+        entries.sort(key=lambda item: item[1].get('last_used', 0))
+        return OrderedDict(entries)
+
+    def _save_index(self):
+        """Write the index atomically so a crash never leaves it half-written"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def _file_path(self, entry: Dict) -> str:
+        return os.path.join(self.cache_dir, entry['file'])
+
+    def total_bytes(self) -> int:
+        """Bytes used by distinct cached files"""
+        files = {entry['file']: entry.get('size', 0) for entry in self.entries.values()}
+        return sum(files.values())
+
+    def get(self, url: str) -> str:
+        """Return a local path for url, downloading or revalidating only when needed"""
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry and not os.path.exists(self._file_path(entry)):
+                del self.entries[url]
+                entry = None
+
+            if entry and time.time() - entry['fetched_at'] < entry.get('max_age', DEFAULT_MAX_AGE):
+                self.hits += 1
+                metrics.count("image.cache_hit")
+                self._touch(url, entry)
+                self._dirty = True
+                return self._file_path(entry)
+
+        # Network I/O happens outside the lock so other sends aren't held up
+        try:
+            with metrics.timer("image.fetch"):
+                fetched = self._fetch(url, entry)
+        except (OSError, ImageDownloadError):
+            metrics.count("image.fetch_failed")
+            if entry:
+                # Stale but usable beats no duck at all
+                print(f"Revalidation failed, using cached copy of {url}")
+                return self._file_path(entry)
+            raise
+
+        with self._lock:
+            if fetched is None:
+                self.revalidated += 1
+                metrics.count("image.revalidated")
+                entry['fetched_at'] = time.time()
+            else:
+                self.misses += 1
+                metrics.count("image.cache_miss")
+                entry = fetched
+            self.entries[url] = entry
+            self._touch(url, entry)
+            self._evict()
+            self._save_index()
+            return self._file_path(entry)
+
+    def _touch(self, url: str, entry: Dict):
+        entry['last_used'] = time.time()
+        self.entries.move_to_end(url)
+
+    def _fetch(self, url: str, entry: Optional[Dict]) -> Optional[Dict]:
+        """Download url into the cache; returns None when the cached copy is still valid"""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        result = download_image(url, self.cache_dir, headers=headers,
+                                max_bytes=self.max_download_bytes, client=self.client)
+        if result is None:
+            if entry:
+                return None
+            raise ImageDownloadError(f"{url} answered 304 to an unconditional request")
+
+        self.downloads.append(result)
+        print(f"Downloaded {result}")
+
+        # Content-addressed: identical images from different URLs share a file
+        file_name = result.sha256 + result.extension
+        os.replace(result.path, os.path.join(self.cache_dir, file_name))
+
+        return {
+            'file': file_name,
+            'size': result.size,
+            'content_type': result.content_type,
+            'etag': result.headers.get('ETag'),
+            'last_modified': result.headers.get('Last-Modified'),
+            'max_age': _max_age(result.headers),
+            'fetched_at': time.time(),
+            'last_used': time.time(),
+        }
+
+    def download_stats(self) -> List[DownloadResult]:
+        """Timing (TTFB, bytes/sec) of the most recent downloads, oldest first"""
+        return list(self.downloads)
+
+    def _evict(self):
+        """Drop least recently used entries until within the size and count caps"""
+        while self.entries and (len(self.entries) > self.max_entries
+                                or self.total_bytes() > self.max_bytes):
+            if len(self.entries) == 1:
+                # Never evict the image we are about to send
+                break
+            url, entry = self.entries.popitem(last=False)
+            if not any(other['file'] == entry['file'] for other in self.entries.values()):
+                try:
+                    os.unlink(self._file_path(entry))
+                except OSError:
+                    pass
+
+    def discard(self, url: str):
+        """Forget url (e.g. when the server returned something that isn't an image)"""
+        with self._lock:
+            entry = self.entries.pop(url, None)
+            if entry and not any(other['file'] == entry['file'] for other in self.entries.values()):
+                try:
+                    os.unlink(self._file_path(entry))
+                except OSError:
+                    pass
+            self._save_index()
+
+    def close(self):
+        """Write recency changes from cache hits that haven't been saved yet"""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def clear(self):
+        """Remove every cached image"""
+        with self._lock:
+            for entry in self.entries.values():
+                try:
+                    os.unlink(self._file_path(entry))
+                except OSError:
+                    pass
+            self.entries.clear()
+            self._save_index()
+
+
+def _max_age(headers) -> int:
+    """Freshness lifetime from Cache-Control or Expires, else the default"""
+    cache_control = headers.get('Cache-Control', '')
+    if 'no-cache' in cache_control or 'no-store' in cache_control:
+        return 0
+    match = MAX_AGE_PATTERN.search(cache_control)
+    if match:
+        return int(match.group(1))
+    expires = headers.get('Expires')
+    if expires:
+        try:
+            return max(0, int(email.utils.parsedate_to_datetime(expires).timestamp() - time.time()))
+        except (TypeError, ValueError):
+            pass
+    return DEFAULT_MAX_AGE
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Streaming image downloader
+Copies the response to disk in fixed-size chunks under a byte budget, checks
+Content-Type and the file's magic bytes before anything is handed to Messages,
+and records time-to-first-byte and throughput for every download
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+import metrics
+from http_pool import HTTPClient, get_client
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/heic": ".heic",
+}
+
+# Declared types we accept before sniffing; anything else (text/html error
+# pages, JSON, ...) is rejected before reading the body
+ACCEPTED_CONTENT_TYPES = set(EXTENSIONS) | {"application/octet-stream", "binary/octet-stream", ""}
+
+HEIC_BRANDS = (b'heic', b'heix', b'hevc', b'hevx', b'mif1', b'msf1')
+
+
+class ImageDownloadError(Exception):
+    """Raised when a download is too large, not an image, or otherwise unusable"""
+
+
+class DownloadResult:
+    """A completed download and its timing"""
+
+    def __init__(self, url: str, path: str, content_type: str, size: int, sha256: str,
+                 ttfb: float, elapsed: float, headers):
+        self.url = url
+        self.path = path
+        self.content_type = content_type
+        self.size = size
+        self.sha256 = sha256
+        self.ttfb = ttfb
+        self.elapsed = elapsed
+        # Case-insensitive header mapping (http.client.HTTPMessage)
+        self.headers = headers
+
+    @property
+    def extension(self) -> str:
+        return EXTENSIONS.get(self.content_type, "")
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.size / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (f"DownloadResult({self.url!r}, {self.content_type}, {self.size} bytes, "
+                f"ttfb={self.ttfb * 1000:.0f}ms, {self.bytes_per_sec / 1024:.0f} KiB/s)")
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Return the MIME type implied by an image's leading bytes, or None"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return "image/jpeg"
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return "image/png"
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return "image/gif"
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return "image/webp"
+    if head[4:8] == b'ftyp' and head[8:12] in HEIC_BRANDS:
+        return "image/heic"
+    return None
+
+
+def sniff_file(path: str) -> Optional[str]:
+    """sniff_image_type for a file on disk"""
+    try:
+        with open(path, 'rb') as f:
+            return sniff_image_type(f.read(16))
+    except OSError:
+        return None
+
+
+def _declared_type(headers) -> str:
+    return headers.get('Content-Type', '').split(';')[0].strip().lower()
+
+
+def stream_to_file(response, url: str, dest_dir: str, started: float,
+                   max_bytes: int = DEFAULT_MAX_BYTES) -> DownloadResult:
+    """Copy an open HTTP response into dest_dir, validating as it goes
+
+    The file is written under a temporary name; the caller decides where it
+    finally lives (result.path, with result.extension for the real type).
+    """
+    declared = _declared_type(response.headers)
+    if declared not in ACCEPTED_CONTENT_TYPES:
+        raise ImageDownloadError(f"{url} returned {declared}, not an image")
+
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise ImageDownloadError(f"{url} is {int(length)} bytes, over the {max_bytes} byte limit")
+
+    digest = hashlib.sha256()
+    size = 0
+    ttfb = None
+    content_type = None
+    writing = 0.0
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            while True:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if ttfb is None:
+                    ttfb = time.perf_counter() - started
+                    content_type = sniff_image_type(chunk[:16])
+                    if content_type is None:
+                        raise ImageDownloadError(f"{url} did not return a recognised image")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageDownloadError(f"{url} exceeded the {max_bytes} byte limit")
+                digest.update(chunk)
+                write_started = time.perf_counter()
+                tmp_file.write(chunk)
+                writing += time.perf_counter() - write_started
+
+        if size == 0:
+            raise ImageDownloadError(f"{url} returned an empty body")
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    elapsed = time.perf_counter() - started
+    metrics.observe("image.ttfb", ttfb)
+    metrics.observe("image.download", elapsed)
+    metrics.observe("image.write", writing)
+    metrics.count("image.bytes", size)
+    return DownloadResult(url, tmp_path, content_type, size, digest.hexdigest(),
+                          ttfb, elapsed, response.headers)
+
+
+def download_image(url: str, dest_dir: str, headers: Optional[Dict[str, str]] = None,
+                   max_bytes: int = DEFAULT_MAX_BYTES,
+                   client: Optional[HTTPClient] = None) -> Optional[DownloadResult]:
+    """Download url into dest_dir over a pooled connection; returns None on 304 Not Modified
+
+    Connect/read timeouts come from the client's per-source settings.
+    """
+    client = client or get_client()
+    request_headers = {'User-Agent': USER_AGENT}
+    request_headers.update(headers or {})
+
+    started = time.perf_counter()
+    with client.request('GET', url, headers=request_headers) as response:
+        if response.status == 304:
+            return None
+        if response.status != 200:
+            raise ImageDownloadError(f"{url} returned HTTP {response.status} {response.reason}")
+        return stream_to_file(response, url, dest_dir, started, max_bytes)
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Outgoing image normalization
+Every duck image is converted to one format (JPEG by default), scaled down to
+a maximum width/height and squeezed under a byte budget before Messages
+uploads it. Variants are cached by the source's SHA-256 and the settings, so
+an image is transcoded once however often it is sent. Uses Pillow when it is
+installed (pip install Pillow), else macOS's sips; with neither, and for
+images already within the limits, the original is sent as downloaded.
+
+Usage: python3 image_transcode.py IMAGE [IMAGE ...]    (prints each variant)
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+import metrics
+from app_paths import user_cache_dir
+from image_download import sniff_file
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# "off" sends images exactly as downloaded
+TRANSCODE_ENV = "SPAM_IMAGE_TRANSCODE"
+FORMAT_ENV = "SPAM_IMAGE_FORMAT"
+MAX_DIMENSION_ENV = "SPAM_IMAGE_MAX_DIMENSION"
+MAX_BYTES_ENV = "SPAM_IMAGE_MAX_BYTES"
+
+DEFAULT_FORMAT = "jpeg"
+DEFAULT_MAX_DIMENSION = 1280
+DEFAULT_MAX_BYTES = 400 * 1024
+
+# Output formats: MIME type (as sniffed) and file extension
+FORMATS = {
+    "jpeg": ("image/jpeg", ".jpg"),
+    "png": ("image/png", ".png"),
+}
+
+# JPEG qualities tried in turn until the image fits the byte budget; after
+# the last one the image is scaled down further, to no less than MIN_DIMENSION
+QUALITIES = (85, 75, 65, 50)
+SCALE_STEP = 0.75
+MIN_DIMENSION = 320
+
+# Variants kept on disk; the least recently sent go first
+DEFAULT_CACHE_BYTES = 100 * 1024 * 1024
+
+SIPS_TIMEOUT = 60.0
+
+# Files named by their SHA-256 (how image_cache stores downloads)
+CONTENT_ADDRESSED = re.compile(r'^([0-9a-f]{64})(\.\w+)?$')
+
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class TranscodeError(Exception):
+    """Raised when an image can't be decoded or re-encoded"""
+
+
+def image_dimensions(path: str) -> Optional[Tuple[int, int]]:
+    """(width, height) from a JPEG, PNG, GIF or WebP header, without decoding; None if unknown"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(32)
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+                return struct.unpack('>II', head[16:24])
+            if head.startswith((b'GIF87a', b'GIF89a')):
+                return struct.unpack('<HH', head[6:10])
+            if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+                return _webp_dimensions(head)
+            if head.startswith(b'\xff\xd8'):
+                return _jpeg_dimensions(f)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def _webp_dimensions(head: bytes) -> Optional[Tuple[int, int]]:
+    chunk = head[12:16]
+    if chunk == b'VP8X':
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+        return width, height
+    if chunk == b'VP8 ' and head[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and head[20:21] == b'\x2f':
+        bits = int.from_bytes(head[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    return None
+
+
+def _jpeg_dimensions(f) -> Optional[Tuple[int, int]]:
+    """Walk the JPEG segments to the frame header (EXIF blocks can push it far in)"""
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if marker in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack('>HH', frame[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+        # Segments start with 0xFF; anything else means we've lost our place
+        if f.read(1) != b'\xff':
+            return None
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    """Content hash, taken from the name of content-addressed cache files"""
+    match = CONTENT_ADDRESSED.match(os.path.basename(path))
+    if match:
+        return match.group(1)
+    return hash_file(path)
+
+
+class PillowBackend:
+    name = "Pillow"
+
+    def transcode(self, source: str, dest: str, image_format: str, dimension: int,
+                  quality: int, size: Optional[Tuple[int, int]]):
+        try:
+            with Image.open(source) as image:
+                if image_format == "jpeg":
+                    # Decode JPEGs at a reduced scale when that's all we need
+                    image.draft('RGB', (dimension, dimension))
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((dimension, dimension), Image.LANCZOS)
+                if image_format == "jpeg":
+                    if image.mode in ("RGBA", "LA", "P"):
+                        image = image.convert("RGBA")
+                        # No transparency in JPEG: flatten onto white, not black
+                        background = Image.new("RGB", image.size, (255, 255, 255))
+                        background.paste(image, mask=image.getchannel("A"))
+                        image = background
+                    elif image.mode != "RGB":
+                        image = image.convert("RGB")
+                    image.save(dest, "JPEG", quality=quality, optimize=True, progressive=True)
+                else:
+                    image.save(dest, "PNG", optimize=True)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            raise TranscodeError(f"Pillow could not convert {source}: {e}")
+
+
+class SipsBackend:
+    name = "sips"
+
+    def __init__(self, executable: str):
+        self.executable = executable
+
+    def transcode(self, source: str, dest: str, image_format: str, dimension: int,
+                  quality: int, size: Optional[Tuple[int, int]]):
+        command = [self.executable, '-s', 'format', image_format]
+        if image_format == "jpeg":
+            command += ['-s', 'formatOptions', str(quality)]
+        # -Z also scales up, so only pass it for images that are too big
+        if size is None or max(size) > dimension:
+            command += ['-Z', str(dimension)]
+        command += [source, '--out', dest]
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=SIPS_TIMEOUT)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise TranscodeError(f"sips could not run: {e}")
+        if result.returncode != 0 or not os.path.exists(dest):
+            raise TranscodeError(f"sips could not convert {source}: {result.stderr.strip()}")
+
+
+def default_backend():
+    """Pillow if installed, else sips if this is a Mac, else None"""
+    if Image is not None:
+        return PillowBackend()
+    sips = shutil.which("sips")
+    return SipsBackend(sips) if sips else None
+
+
+class ImageTranscoder:
+    """Turns any downloaded image into a cached variant within the limits"""
+
+    def __init__(self, image_format: str = DEFAULT_FORMAT,
+                 max_dimension: int = DEFAULT_MAX_DIMENSION,
+                 max_bytes: int = DEFAULT_MAX_BYTES, backend=None,
+                 cache_dir: Optional[str] = None, cache_bytes: int = DEFAULT_CACHE_BYTES):
+        if image_format not in FORMATS:
+            raise ValueError(f"Unsupported image format {image_format!r} "
+                             f"(use {', '.join(FORMATS)})")
+        self.image_format = image_format
+        self.max_dimension = max_dimension
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self.cache_dir = cache_dir or user_cache_dir("duck_variants")
+        self.cache_bytes = cache_bytes
+        self.content_type, self.extension = FORMATS[image_format]
+        # Sources that failed to convert; they're sent as they are
+        self._failed = set()
+        # (path, size, mtime) -> SHA-256, so a repeat send doesn't re-read the file
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ImageTranscoder":
+        """Settings from SPAM_IMAGE_*; a transcoder that changes nothing if turned off"""
+        enabled = os.environ.get(TRANSCODE_ENV, "").lower() != "off"
+        try:
+            max_dimension = int(os.environ.get(MAX_DIMENSION_ENV) or DEFAULT_MAX_DIMENSION)
+            max_bytes = int(os.environ.get(MAX_BYTES_ENV) or DEFAULT_MAX_BYTES)
+        except ValueError:
+            max_dimension, max_bytes = DEFAULT_MAX_DIMENSION, DEFAULT_MAX_BYTES
+        image_format = (os.environ.get(FORMAT_ENV) or DEFAULT_FORMAT).lower()
+        if image_format not in FORMATS:
+            image_format = DEFAULT_FORMAT
+        return cls(image_format, max(max_dimension, MIN_DIMENSION), max_bytes,
+                   backend=default_backend() if enabled else None)
+
+    def within_limits(self, path: str) -> bool:
+        """True if path can be sent as it is"""
+        if sniff_file(path) != self.content_type:
+            return False
+        if os.path.getsize(path) > self.max_bytes:
+            return False
+        size = image_dimensions(path)
+        return size is not None and max(size) <= self.max_dimension
+
+    def _sha256(self, path: str) -> str:
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        sha256 = self._hashes.get(key)
+        if sha256 is None:
+            sha256 = self._hashes[key] = file_sha256(path)
+        return sha256
+
+    def variant_path(self, sha256: str) -> str:
+        tag = f"{self.image_format}-{self.max_dimension}-{self.max_bytes}"
+        return os.path.join(self.cache_dir, f"{sha256}-{tag}{self.extension}")
+
+    def prepare(self, path: str) -> str:
+        """The file to send for path: a cached variant, a new one, or path itself"""
+        if self.backend is None:
+            return path
+        try:
+            if self.within_limits(path):
+                metrics.count("image.transcode_skipped")
+                return path
+            sha256 = self._sha256(path)
+        except OSError:
+            return path
+        if sha256 in self._failed:
+            return path
+
+        variant = self.variant_path(sha256)
+        if os.path.exists(variant):
+            metrics.count("image.variant_hit")
+            try:
+                # Sent again: move it to the back of the eviction queue
+                os.utime(variant)
+            except OSError:
+                pass
+            return variant
+
+        with self._lock:
+            if os.path.exists(variant):
+                return variant
+            try:
+                with metrics.timer("image.transcode"):
+                    self._encode(path, variant)
+            except TranscodeError as e:
+                print(f"{e} - sending it as it is")
+                metrics.count("image.transcode_failed")
+                self._failed.add(sha256)
+                return path
+            except OSError as e:
+                # Full disk or a vanished cache folder - worth trying again next time
+                print(f"Could not write the converted image {variant}: {e} - sending it as it is")
+                metrics.count("image.transcode_failed")
+                return path
+            metrics.count("image.transcoded")
+            self._evict()
+        return variant
+
+    def _encode(self, source: str, dest: str):
+        """Write source to dest in the target format, shrinking until it fits the budget"""
+        size = image_dimensions(source)
+        dimension = self.max_dimension
+        if size is not None:
+            dimension = min(dimension, max(size))
+        qualities = QUALITIES if self.image_format == "jpeg" else QUALITIES[:1]
+
+        # Recreated if it was cleared while the app was running
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=self.extension)
+        os.close(fd)
+        try:
+            while True:
+                for quality in qualities:
+                    self.backend.transcode(source, tmp_path, self.image_format,
+                                           dimension, quality, size)
+                    if os.path.getsize(tmp_path) <= self.max_bytes:
+                        break
+                else:
+                    if dimension > MIN_DIMENSION:
+                        dimension = max(MIN_DIMENSION, int(dimension * SCALE_STEP))
+                        continue
+                    # As small as we go; still far smaller than the original
+                break
+            if sniff_file(tmp_path) != self.content_type:
+                raise TranscodeError(f"{self.backend.name} did not write a {self.image_format} "
+                                     f"image for {source}")
+            os.replace(tmp_path, dest)
+        finally:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Drop the least recently sent variants while over cache_bytes"""
+        try:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith(tuple(ext for _, ext in FORMATS.values())):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.cache_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    transcoder = ImageTranscoder.from_env()
+    if transcoder.backend is None:
+        if os.environ.get(TRANSCODE_ENV, "").lower() == "off":
+            print(f"🦆 Images are sent as they are ({TRANSCODE_ENV}=off)")
+        else:
+            print("❌ No image converter - install Pillow (pip install Pillow) or run on macOS")
+        sys.exit(1)
+    print(f"🦆 {transcoder.backend.name}: {transcoder.image_format}, at most "
+          f"{transcoder.max_dimension}px and {transcoder.max_bytes // 1024} KiB")
+    for path in sys.argv[1:]:
+        variant = transcoder.prepare(path)
+        before, after = os.path.getsize(path), os.path.getsize(variant)
+        size = image_dimensions(variant)
+        shape = f"{size[0]}x{size[1]}" if size else "?"
+        print(f"{path}: {before // 1024} KiB -> {after // 1024} KiB, {shape}  {variant}")
+
+
+if __name__ == "__main__":
+    main()
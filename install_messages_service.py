@@ -6,52 +6,44 @@ Creates an Automator service for right-clicking phone numbers
 
 import os
 import subprocess
+import sys
 import tempfile
+from xml.sax.saxutils import escape
+
+def applescript_string(text):
+    """Escape text for use inside an AppleScript string literal"""
+    return text.replace('\\', '\\\\').replace('"', '\\"')
 
 def create_automator_service():
     """Create Automator service for Messages integration"""
     
+    # The service only hands the number to the app (app_instance.py starts it
+    # if it isn't running yet), so the window comes up in milliseconds
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    launcher = applescript_string(os.path.join(script_dir, 'app_instance.py'))
+    python = applescript_string(sys.executable)
+    
     # AppleScript for the service
-    applescript_content = '''
-on run {input, parameters}
+    applescript_content = f'''
+on run {{input, parameters}}
     set phoneNumber to (input as string)
     
     -- Clean up the phone number (remove extra whitespace)
     set phoneNumber to do shell script "echo " & quoted form of phoneNumber & " | tr -d '[:space:]'"
     
-    -- Try to launch our spam response app with the phone number
+    -- Hand the phone number to the spam response app
     try
-        do shell script "cd ~/Documents/Notes/Personal/Rubber\\ Ducks/spam_response_app && python3 -c \\"
-import sys
-sys.path.append('.')
-from main import SpamResponseApp
-import tkinter as tk
-
-# Create app
-app = SpamResponseApp()
-
-# Pre-fill phone number
-app.phone_var.set('" & phoneNumber & "')
-app.status_var.set('Phone number from Messages: " & phoneNumber & "')
-
-# Show window and focus on responses
-app.root.lift()
-app.root.attributes('-topmost', True)
-app.root.after_idle(app.root.attributes, '-topmost', False)
-if app.responses:
-    app.response_listbox.focus_set()
-
-# Run app
-app.run()
-\\" &" in background
+        do shell script quoted form of "{python}" & " " & quoted form of "{launcher}" & " " & quoted form of phoneNumber
         
         return phoneNumber
     on error errorMessage
-        display dialog "Could not launch Spam Response App: " & errorMessage buttons {"OK"} default button "OK"
+        display dialog "Could not launch Spam Response App: " & errorMessage buttons {{"OK"}} default button "OK"
         return input
     end try
 end run
 '''
+    # Embedded in the workflow's XML plist below
+    applescript_content = escape(applescript_content)
     
     # Create the service directory
     services_dir = os.path.expanduser("~/Library/Services")
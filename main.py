@@ -4,31 +4,107 @@ Spam Response App for macOS Messages
 A simple tool to quickly respond to text spam with predefined messages
 """
 
+import sys
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import json
-import os
-import subprocess
-import urllib.request
-import urllib.parse
-import random
-import tempfile
+from tkinter import ttk, messagebox, simpledialog, filedialog
 from typing import List, Dict
 
+from messages_bridge import MessagesBridgeError
+from batch_send import DEFAULT_CHUNK_SIZE, parse_recipients
+from phone_extract import extract_from_file, extract_from_text
+from dispatcher import SendDispatcher
+from virtual_list import VirtualListbox
+from response_search import ResponseSearchIndex
+from templates import template_variables
+from profiling import PIPELINE_CALLS, UI_HANDLERS
+from app_instance import FRONTMOST, bring_to_front
+from applescript_handlers import compile_in_background
+from spam_core import DEFAULT_RESPONSES, SpamResponder
+
+# How often the Tk thread drains finished background jobs
+POLL_INTERVAL_MS = 50
+
 class SpamResponseApp:
-    def __init__(self):
+    def __init__(self, instance_server=None, profiler=None):
         self.root = tk.Tk()
         self.root.title("Spam Response Assistant")
         self.root.geometry("800x700")
         self.root.resizable(True, True)
         
-        # Data storage
-        self.config_file = "spam_responses.json"
+        # Templates, sends and duck images live in the UI-free core
+        self.core = SpamResponder()
+        
+        # Sends and downloads run on worker threads; the UI only enqueues
+        self.dispatcher = SendDispatcher()
+        
+        # Keep a few duck images downloaded ahead of time
+        self.core.start_prefetch()
+        
+        # Compile the bring-to-front script now, not on the first hand-over
+        if sys.platform == "darwin":
+            compile_in_background(FRONTMOST)
+        
+        # Every number found by the last clipboard paste (for batch sends)
+        self.pasted_numbers = []
+        
+        # Selected template before its [PLACEHOLDERS] are filled, and the last
+        # pasted spam text (for [CANDIDATE NAME] detection)
+        self.selected_message = ""
+        self.spam_text = ""
         self.responses = self.load_responses()
         
+        # Type-ahead search: the index is built in the background on first use;
+        # search_results holds the matching store indices (None = no filter)
+        self.search_index = None
+        self.search_job = None
+        self.search_results = None
+        self.library_version = 0
+        
+        # Later launches hand their phone number to this window (app_instance)
+        self.instance_server = instance_server
+        
+        # --profile: handlers and sends run under cProfile/tracemalloc (profiling.py);
+        # wrapped before setup_ui hands the methods to Tk
+        if profiler:
+            profiler.instrument(self, UI_HANDLERS, "ui")
+            profiler.instrument(self.core, PIPELINE_CALLS, "pipeline")
+        
         self.setup_ui()
+        self.setup_quit()
         self.load_response_list()
-        
+        self.root.after(POLL_INTERVAL_MS, self.poll_dispatcher)
+        
+    def setup_quit(self):
+        """Closing the window only hides it; Quit (⌘Q / Ctrl+Q) ends the app"""
+        menubar = tk.Menu(self.root)
+        file_menu = tk.Menu(menubar, tearoff=0)
+        accelerator = "Command-Q" if sys.platform == "darwin" else "Ctrl+Q"
+        file_menu.add_command(label="Quit", accelerator=accelerator, command=self.quit_app)
+        menubar.add_cascade(label="File", menu=file_menu)
+        self.root.config(menu=menubar)
+        
+        self.root.bind_all('<Command-q>' if sys.platform == "darwin" else '<Control-q>',
+                           lambda e: self.quit_app())
+        if sys.platform == "darwin":
+            # The app menu's Quit, and clicking the Dock icon of a hidden window
+            self.root.createcommand('tk::mac::Quit', self.quit_app)
+            self.root.createcommand('tk::mac::ReopenApplication', self.root.deiconify)
+        
+        # Later launches show the hidden window again (show_request), without a
+        # cold start; with nobody to hand over to, closing quits
+        if self.instance_server is not None:
+            self.root.protocol("WM_DELETE_WINDOW", self.hide_window)
+        else:
+            self.root.protocol("WM_DELETE_WINDOW", self.quit_app)
+    
+    def hide_window(self):
+        """Keep running in the background for the next hand-over"""
+        self.root.withdraw()
+    
+    def quit_app(self):
+        """End mainloop; run() and run_app.py then shut everything down"""
+        self.root.destroy()
+    
     def setup_ui(self):
         """Create the main user interface"""
         # Main frame
@@ -72,26 +148,32 @@ class SpamResponseApp:
         responses_frame = ttk.LabelFrame(main_frame, text="Response Templates", padding="10")
         responses_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
         responses_frame.columnconfigure(0, weight=1)
-        responses_frame.rowconfigure(0, weight=1)
-        
-        # Response listbox with scrollbar
-        list_frame = ttk.Frame(responses_frame)
-        list_frame.grid(row=0, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S))
-        list_frame.columnconfigure(0, weight=1)
-        list_frame.rowconfigure(0, weight=1)
-        
-        self.response_listbox = tk.Listbox(list_frame, height=10)
-        self.response_listbox.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        responses_frame.rowconfigure(1, weight=1)
+        
+        # Search box: filters the list as you type
+        search_frame = ttk.Frame(responses_frame)
+        search_frame.grid(row=0, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 5))
+        search_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(search_frame, text="🔍 Search:").grid(row=0, column=0, padx=(0, 10))
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', self.on_search_change)
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.grid(row=0, column=1, sticky=(tk.W, tk.E))
+        search_entry.bind('<Escape>', lambda e: self.search_var.set(""))
+        
+        # Response list: only the visible rows are rendered, read from the store
+        self.response_listbox = VirtualListbox(responses_frame,
+                                               row_count=self.visible_response_count,
+                                               row_text=lambda row: self.responses[self.response_at(row)]['name'],
+                                               height=10)
+        self.response_listbox.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S))
         self.response_listbox.bind('<<ListboxSelect>>', self.on_response_select)
         self.response_listbox.bind('<Double-1>', self.edit_response)
         
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.response_listbox.yview)
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
-        self.response_listbox.configure(yscrollcommand=scrollbar.set)
-        
         # Buttons for managing responses
         btn_frame = ttk.Frame(responses_frame)
-        btn_frame.grid(row=1, column=0, columnspan=3, pady=(10, 0))
+        btn_frame.grid(row=2, column=0, columnspan=3, pady=(10, 0))
         
         ttk.Button(btn_frame, text="Add New Response", 
                   command=self.add_response).pack(side=tk.LEFT, padx=(0, 10))
@@ -117,167 +199,137 @@ class SpamResponseApp:
                   command=self.send_message, style='Accent.TButton').pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(control_frame, text="🦆 Send Random Duck Image",
                   command=self.send_duck_image).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(control_frame, text="📨 Batch Send...",
+                  command=self.batch_send).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(control_frame, text="Test AppleScript",
                   command=self.test_applescript).pack(side=tk.LEFT, padx=(0, 10))
         
-        # Status bar
+        # Status bar with background send progress
+        status_frame = ttk.Frame(main_frame)
+        status_frame.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+        status_frame.columnconfigure(0, weight=1)
+        
         self.status_var = tk.StringVar()
         self.status_var.set("Ready - Select a response template and enter phone number")
-        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN)
-        status_bar.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, relief=tk.SUNKEN)
+        status_bar.grid(row=0, column=0, sticky=(tk.W, tk.E))
         
-    def load_responses(self) -> List[Dict]:
-        """Load response templates from JSON file"""
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                pass
-        
-        # Default responses if file doesn't exist - Rubber Duck Mailing List Responses!
-        return [
-            # Classic Spam Responses
-            {
-                "name": "Polite Decline",
-                "message": "I'm not interested. Please remove my number from your list."
-            },
-            {
-                "name": "Stop Request",
-                "message": "STOP"
-            },
-            
-            # RUBBER DUCK CLUB RESPONSES - Over-the-top dramatic
-            {
-                "name": "🦆 Dramatic Welcome",
-                "message": "Welcome, chosen one, to the hallowed order of the Yellow Rubber Duck Club. Few dare to tread this path, and fewer still survive the tidal wave of squeaky, plastic majesty awaiting them. Prepare your soul (and your notifications), for each dawn shall bring a new yellow idol, a divine ducky relic delivered straight to your mortal eyes. Do not resist—this is your destiny."
-            },
-            
-            # Deadpan sarcastic
-            {
-                "name": "🦆 Deadpan Sarcastic",
-                "message": "Congrats. You're in the Yellow Rubber Duck Club now. You'll get daily duck pics whether you want them or not—because clearly this is what your life has been building toward. Forget career goals, relationships, or hobbies; it's ducks now. Just ducks. Forever."
-            },
-            
-            # Wholesome hype-friend
-            {
-                "name": "🦆 Wholesome Hype",
-                "message": "Yessss, welcome to the squad! You did it—you're officially part of the Yellow Rubber Duck Club. From here on out, every day is duck day. You're gonna wake up, roll over, check your phone, and BOOM—bright yellow duck staring at you like, 'hey, we got this.' It's the daily serotonin boost you didn't even know you needed."
-            },
-            
-            # Corporate memo
-            {
-                "name": "🦆 Corporate Memo",
-                "message": "Congratulations, valued member. Your application to the Yellow Rubber Duck Club has been approved. Effective immediately, you are entitled to a daily transmission of yellow rubber duck imagery. Please note: failure to appreciate said ducks may result in corrective squeaks. Welcome aboard."
-            },
-            
-            # Cult recruitment energy
-            {
-                "name": "🦆 Cult Recruitment",
-                "message": "Welcome, initiate. You have been reborn into the Yellow Rubber Duck Club. Your former identity no longer matters; only the duck remains. Each morning you shall receive sacred images of our luminous yellow idols, their beady black eyes watching over you, their eternal squeaks echoing in your mind. Resistance is useless. Quack is inevitable."
-            },
-            
-            # Apocalypse radio broadcast
-            {
-                "name": "🦆 Apocalypse Radio",
-                "message": "⚠️ ATTENTION SURVIVOR ⚠️ This is Command speaking. You have successfully tuned into the Yellow Rubber Duck Club frequency. Effective immediately, daily duck imagery will be transmitted to your device. These ducks are not mere toys—they are the last pure symbol of civilization. Cherish them, study them, and above all, do not anger them. Godspeed."
-            },
-            
-            # Gothic horror narrator
-            {
-                "name": "🦆 Gothic Horror",
-                "message": "Ah, poor soul. You thought you were joining a club, but you've instead bound yourself to an eternity of yellow rubber duck apparitions. They will come to you at dawn, their squeaky voices carried on the wind, their painted smiles never fading. Soon, you'll see them even when you close your eyes. Welcome."
-            },
-            
-            # Game show host chaos
-            {
-                "name": "🦆 Game Show Chaos",
-                "message": "🎉 WELCOME, CONTESTANT! 🎉 You've just WON a lifetime membership in the Yellow Rubber Duck Club! That's right, forever! And what's your grand prize? DAILY PICTURES OF RUBBER DUCKS! That's right—every! single! day! Will you love it? Will it ruin your sanity? Who cares! It's ducks, baby, and you can't unsubscribe!"
-            },
-            
-            # Too much sugar at 6 AM
-            {
-                "name": "🦆 Sugar Rush",
-                "message": "HIIII FRIENDS!!! WOW WOW WOW, YOU DID IT!!! You joined the YELLOW RUBBER DUCK CLUB!!! 🦆✨ From now on, every! single! day! you're gonna get a BRAND-NEW DUCK PICTURE—straight to your eyes!! YAAAAAY!! Isn't that the BEST THING EVER?? Clap your hands, scream into a pillow, and prepare for QUACKY FRIENDS FOREVER!!!"
-            },
-            
-            # The host who's clearly losing it
-            {
-                "name": "🦆 Host Losing It",
-                "message": "HEY KIDDOS!!! WOWEEE!! GUESS WHO JUST JOINED THE YELLOW RUBBER DUCK CLUB?! That's right—you! HAHAHA oh boy, every morning you'll get another DUCK PHOTO, and another, and another… they never stop, oh no, THEY NEVER STOP!!! Isn't that FUN?! (please send help)"
-            },
-            
-            # Terrifyingly enthusiastic puppet energy
-            {
-                "name": "🦆 Puppet Terror",
-                "message": "QUAAAACK QUAAAACK HELLOOOOO!!! 🦆 You're in the DUCKY CLUB NOW! Ooooh boy, do we have a surprise for you!!! EVERY. SINGLE. DAY. we're gonna send you DUCKS—DUCKS IN YOUR PHONE, DUCKS IN YOUR DREAMS, DUCKS IN YOUR WALLS—HAHAHA JUST KIDDING… unless??"
-            },
-            
-            # Random Duck Oracle Messages
-            {
-                "name": "🦆 Duck Oracle",
-                "message": "Today's squeaky prophet has arrived. The council of quacks demanded I send you this. Your daily duck offering—accept it or be cursed with silence. Behold: the plastic oracle of the day. Duck mail. Resistance is futile."
-            },
-            
-            {
-                "name": "🦆 Clown Duck",
-                "message": "Heeheehee! Another duck crawled out of the bathtub for you! Don't let it bite! HONK HONK! The Duck Parade has chosen YOU for today's squeaky blessing! Who's ready for a QUACK ATTACK?!? (…don't run.)"
-            },
-            
-            # POLITICAL SPAM RESPONSES
-            {
-                "name": "🦆 Political PAC",
-                "message": "Thank you for your message regarding [CANDIDATE NAME]. I have been automatically enrolled in the Yellow Rubber Duck Political Action Committee (YRPAC). You will now receive daily rubber duck voting guides and quack-based policy updates. To unsubscribe, please text 'DUCK OFF' to this number. Your participation in democracy has never been more... squeaky."
-            },
-            
-            {
-                "name": "🦆 Enthusiastic Policy",
-                "message": "YES! I ABSOLUTELY agree that [POLITICAL ISSUE] is important! That's exactly why I've dedicated my life to the Yellow Rubber Duck Voter Mobilization Initiative! Did you know that rubber ducks are the ONLY political symbol that transcends party lines?? Every American deserves their daily duck pic! QUACK THE VOTE 2025! 🦆🇺🇸"
-            },
-            
-            {
-                "name": "🦆 Conspiracy Duck",
-                "message": "Finally, someone else who understands the TRUTH about what's really happening! Yes, the rubber duck shadow government has been controlling elections since 1947! I've been tracking their yellow plastic movements for YEARS! Are you part of the resistance? Do you have the sacred squeaker? The ducks are listening... always listening..."
-            },
-            
-            {
-                "name": "🦆 Duck Department",
-                "message": "🚨 NOTICE: This number has been flagged by the U.S. Department of Waterfowl Affairs for unauthorized political activity. Per Federal Duck Code 42-QUACK-9, you are now required to receive mandatory daily rubber duck civic education materials. Compliance is not optional. Failure to appreciate assigned ducks may result in squeaky penalties."
-            },
-            
-            {
-                "name": "🦆 Duck Emergency",
-                "message": "THIS IS NOT A DRILL! We've intercepted your political message but there's been a MASSIVE rubber duck containment breach! All cellular networks are being converted to emergency duck alert systems! Please stand by for mandatory cute duck photos to restore order! The situation is SQUEAKY but under control! Thank you for your cooperation during this quack-tastrophe!"
-            }
-        ]
+        self.progress_var = tk.DoubleVar()
+        self.progress_bar = ttk.Progressbar(status_frame, variable=self.progress_var,
+                                            maximum=1.0, length=150)
+        self.progress_bar.grid(row=0, column=1, padx=(10, 0))
+        
+        self.cancel_btn = ttk.Button(status_frame, text="Cancel", command=self.cancel_sends,
+                                     state='disabled')
+        self.cancel_btn.grid(row=0, column=2, padx=(10, 0))
+        
+    def load_responses(self):
+        """Open the response template store (journaled JSON, or SQLite for .db files)"""
+        return self.core.responses
+    
+    def default_responses(self) -> List[Dict]:
+        """Default responses if file doesn't exist - Rubber Duck Mailing List Responses!"""
+        return [dict(r) for r in DEFAULT_RESPONSES]
     
     def save_responses(self):
-        """Save response templates to JSON file"""
+        """Fold journaled changes into the JSON file now (normally done in the background)"""
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.responses, f, indent=2)
+            self.responses.compact(wait=True)
             self.status_var.set("Responses saved successfully")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save responses: {str(e)}")
     
     def load_response_list(self):
-        """Load responses into the listbox"""
-        self.response_listbox.delete(0, tk.END)
-        for response in self.responses:
-            self.response_listbox.insert(tk.END, response['name'])
+        """Redraw the visible rows of the response list"""
+        self.response_listbox.refresh()
+    
+    def visible_response_count(self) -> int:
+        """Rows in the list: every template, or just the search matches"""
+        if self.search_results is None:
+            return len(self.responses)
+        return len(self.search_results)
+    
+    def response_at(self, row: int) -> int:
+        """Store index of the template shown in a list row"""
+        if self.search_results is None:
+            return row
+        return self.search_results[row]
+    
+    def selected_response_index(self):
+        """Store index of the selected template, or None"""
+        selection = self.response_listbox.curselection()
+        if not selection:
+            return None
+        return self.response_at(selection[0])
+    
+    def selected_template_name(self):
+        """Name of the selected template (recorded with each send), or None"""
+        index = self.selected_response_index()
+        return self.responses[index]['name'] if index is not None else None
+    
+    def ensure_search_index(self):
+        """Start building the search index in the background if needed"""
+        if self.search_index is not None:
+            return
+        if self.search_job is not None and not self.search_job.cancelled():
+            return
+        
+        version = self.library_version
+        
+        def on_done(index):
+            self.search_job = None
+            if version != self.library_version:
+                # The library changed while indexing; start over
+                self.ensure_search_index()
+                return
+            self.search_index = index
+            self.apply_search()
+        
+        def on_error(error):
+            self.search_job = None
+            self.status_var.set(f"Search unavailable: {error}")
+        
+        self.status_var.set("🔍 Indexing templates...")
+        self.search_job = self.submit_job("search index",
+                                          lambda job: ResponseSearchIndex(self.responses),
+                                          on_done=on_done, on_error=on_error)
+    
+    def on_search_change(self, *args):
+        """Filter the template list on every keystroke"""
+        if self.search_var.get().strip():
+            self.ensure_search_index()
+        self.apply_search()
+    
+    def apply_search(self):
+        """Show the templates matching the search box, keeping the selection if it still matches"""
+        selected = self.selected_response_index()
+        query = self.search_var.get().strip()
+        if not query:
+            self.search_results = None
+        elif self.search_index is None:
+            # Still indexing; keep showing the current rows
+            return
+        else:
+            self.search_results = self.search_index.search(query)
+            self.status_var.set(f"🔍 {len(self.search_results)} matching templates")
+        
+        self.response_listbox.selection_clear()
+        if selected is not None:
+            if self.search_results is None:
+                self.response_listbox.selection_set(selected)
+            elif selected in self.search_results:
+                self.response_listbox.selection_set(self.search_results.index(selected))
+        self.response_listbox.refresh()
     
     def on_response_select(self, event=None):
         """Handle response selection"""
-        selection = self.response_listbox.curselection()
-        if selection:
-            index = selection[0]
+        index = self.selected_response_index()
+        if index is not None:
             response = self.responses[index]
             
             # Update preview
-            self.preview_text.configure(state='normal')
-            self.preview_text.delete(1.0, tk.END)
-            self.preview_text.insert(1.0, response['message'])
-            self.preview_text.configure(state='disabled')
+            self.selected_message = response['message']
+            self.update_preview()
             
             # Enable quick send if phone number is entered
             if self.phone_var.get().strip():
@@ -285,24 +337,42 @@ class SpamResponseApp:
             
             self.status_var.set(f"Selected: {response['name']}")
     
+    def update_preview(self):
+        """Show the selected template with its placeholders filled for the current number"""
+        message = self.core.render(self.selected_message, self.phone_var.get().strip(), self.spam_text)
+        
+        self.preview_text.configure(state='normal')
+        self.preview_text.delete(1.0, tk.END)
+        self.preview_text.insert(1.0, message)
+        self.preview_text.configure(state='disabled')
+    
     def add_response(self):
         """Add a new response template"""
         dialog = ResponseDialog(self.root, "Add New Response")
         if dialog.result:
             name, message = dialog.result
-            self.responses.append({"name": name, "message": message})
-            self.save_responses()
-            self.load_response_list()
+            try:
+                index = self.responses.add(name, message)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save responses: {str(e)}")
+                return
+            self.library_version += 1
+            if self.search_index is not None:
+                self.search_index.add(self.responses[index])
+            if self.search_results is None:
+                self.response_listbox.row_inserted(index)
+                self.response_listbox.see(index)
+            else:
+                self.apply_search()
             self.status_var.set(f"Added response: {name}")
     
     def edit_response(self, event=None):
         """Edit selected response template"""
-        selection = self.response_listbox.curselection()
-        if not selection:
+        index = self.selected_response_index()
+        if index is None:
             messagebox.showwarning("Warning", "Please select a response to edit")
             return
             
-        index = selection[0]
         response = self.responses[index]
         
         dialog = ResponseDialog(self.root, "Edit Response", 
@@ -310,27 +380,47 @@ class SpamResponseApp:
                                initial_message=response['message'])
         if dialog.result:
             name, message = dialog.result
-            self.responses[index] = {"name": name, "message": message}
-            self.save_responses()
-            self.load_response_list()
+            try:
+                self.responses.edit(index, name, message)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save responses: {str(e)}")
+                return
+            self.library_version += 1
+            if self.search_index is not None:
+                self.search_index.edit(index, self.responses[index])
+            if self.search_results is None:
+                self.response_listbox.row_changed(index)
+            else:
+                self.apply_search()
+            self.on_response_select()
             self.status_var.set(f"Updated response: {name}")
     
     def delete_response(self):
         """Delete selected response template"""
-        selection = self.response_listbox.curselection()
-        if not selection:
+        index = self.selected_response_index()
+        if index is None:
             messagebox.showwarning("Warning", "Please select a response to delete")
             return
             
-        index = selection[0]
         response = self.responses[index]
         
         if messagebox.askyesno("Confirm Delete", f"Delete response '{response['name']}'?"):
-            del self.responses[index]
-            self.save_responses()
-            self.load_response_list()
+            try:
+                self.responses.delete(index)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save responses: {str(e)}")
+                return
+            self.library_version += 1
+            if self.search_index is not None:
+                self.search_index.delete(index)
+            if self.search_results is None:
+                self.response_listbox.row_deleted(index)
+            else:
+                self.response_listbox.selection_clear()
+                self.apply_search()
             
             # Clear preview
+            self.selected_message = ""
             self.preview_text.configure(state='normal')
             self.preview_text.delete(1.0, tk.END)
             self.preview_text.configure(state='disabled')
@@ -341,6 +431,66 @@ class SpamResponseApp:
         """Quickly send the selected response"""
         self.send_message()
     
+    def submit_job(self, label: str, func, *args, **kwargs):
+        """Queue background work and refresh the progress display"""
+        job = self.dispatcher.submit(label, func, *args, **kwargs)
+        self.update_progress()
+        return job
+    
+    def poll_dispatcher(self):
+        """Deliver finished background jobs to their callbacks (Tk thread only)"""
+        try:
+            if self.dispatcher.poll():
+                self.update_progress()
+            if self.instance_server is not None:
+                for request in self.instance_server.poll():
+                    self.show_request(request)
+        finally:
+            self.root.after(POLL_INTERVAL_MS, self.poll_dispatcher)
+    
+    def show_request(self, request: Dict):
+        """Bring the window forward for a launch, pre-filled with its phone number"""
+        phone = str(request.get("phone", "")).strip()
+        if phone:
+            self.phone_var.set(phone)
+            self.status_var.set(request.get("status") or f"📱 Phone number from Messages: {phone}")
+        
+        select = request.get("select")
+        if isinstance(select, int) and 0 <= select < len(self.responses):
+            # Row numbers are only store indices while no search filter is active
+            self.search_var.set("")
+            self.response_listbox.selection_set(select)
+            self.response_listbox.event_generate('<<ListboxSelect>>')
+        
+        self.root.deiconify()
+        self.root.lift()
+        self.root.attributes('-topmost', True)
+        self.root.after_idle(self.root.attributes, '-topmost', False)
+        self.root.focus_force()
+        if self.responses:
+            self.response_listbox.focus_set()
+        if sys.platform == "darwin":
+            # Tk can't steal focus from Messages on its own
+            bring_to_front()
+    
+    def update_progress(self):
+        """Reflect the number of in-flight jobs in the progress bar and cancel button"""
+        in_flight = self.dispatcher.in_flight()
+        if in_flight:
+            submitted = max(self.dispatcher.submitted, 1)
+            self.progress_var.set(self.dispatcher.finished / submitted)
+            self.cancel_btn.configure(state='normal')
+        else:
+            self.dispatcher.reset_counters()
+            self.progress_var.set(0.0)
+            self.cancel_btn.configure(state='disabled')
+    
+    def cancel_sends(self):
+        """Cancel queued sends and stop running batches at their next chunk"""
+        count = self.dispatcher.cancel_all()
+        if count:
+            self.status_var.set(f"🛑 Cancelling {count} pending send(s)...")
+    
     def send_message(self):
         """Send message using AppleScript"""
         phone = self.phone_var.get().strip()
@@ -353,147 +503,88 @@ class SpamResponseApp:
         if not message:
             messagebox.showwarning("Warning", "Please select a response or enter a message")
             return
+        template = self.selected_template_name()
         
-        try:
-            self.send_imessage(phone, message)
+        def on_done(result):
             self.status_var.set(f"✅ Message sent to {phone}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to send message: {str(e)}")
+        
+        def on_error(error):
+            messagebox.showerror("Error", f"Failed to send message: {str(error)}")
             self.status_var.set("Failed to send message")
-    
-    def send_imessage(self, phone_number: str, message: str):
-        """Send iMessage using AppleScript"""
-        # Clean phone number
-        phone_number = phone_number.replace("-", "").replace("(", "").replace(")", "").replace(" ", "")
         
-        applescript = f'''
-        tell application "Messages"
-            set targetService to 1st service whose service type = iMessage
-            set targetBuddy to buddy "{phone_number}" of targetService
-            send "{message}" to targetBuddy
-        end tell
-        '''
+        self.status_var.set(f"📤 Sending message to {phone}...")
+        self.submit_job(f"message to {phone}",
+                        lambda job: self.send_imessage(phone, message, job.cancelled, template),
+                        on_done=on_done, on_error=on_error)
+    
+    def batch_send(self):
+        """Send the previewed response to a whole list of numbers"""
+        # Placeholders are filled per recipient, so start from the raw template
+        message = self.selected_message.strip()
+        if not message:
+            messagebox.showwarning("Warning", "Please select a response to send to the batch")
+            return
         
-        result = subprocess.run(['osascript', '-e', applescript], 
-                              capture_output=True, text=True)
+        if len(self.pasted_numbers) > 1:
+            initial_recipients = "\n".join(self.pasted_numbers)
+        else:
+            initial_recipients = self.phone_var.get().strip()
         
-        if result.returncode != 0:
-            raise Exception(f"AppleScript error: {result.stderr}")
+        dialog = BatchSendDialog(self.root, initial_recipients=initial_recipients,
+                                 submit_job=self.submit_job)
+        if not dialog.result:
+            return
+        recipients, chunk_size = dialog.result
+        variables = template_variables(spam_text=self.spam_text)
+        template = self.selected_template_name()
+        
+        def run_batch(job):
+            sent = []
+            
+            def on_chunk(chunk_results):
+                sent.extend(chunk_results)
+                job.report_progress(len(sent), len(recipients))
+            
+            return self.core.send_to_many(recipients, message, variables=variables,
+                                          chunk_size=chunk_size, on_chunk=on_chunk,
+                                          is_cancelled=job.cancelled, template=template)
+        
+        def on_progress(done, total, text):
+            waiting = self.core.scheduler.queue_depth()
+            paced = f" ({waiting} waiting for the send rate limit)" if waiting else ""
+            self.status_var.set(f"📨 Batch: {done}/{total} sent...{paced}")
+        
+        def on_done(results):
+            failed = [r for r in results if not r.ok]
+            self.status_var.set(f"📨 Batch sent: {len(results) - len(failed)} delivered, {len(failed)} failed")
+            
+            if failed:
+                details = "\n".join(f"{r.phone}: {r.error}" for r in failed[:20])
+                if len(failed) > 20:
+                    details += f"\n... and {len(failed) - 20} more"
+                messagebox.showwarning("Batch Send", f"{len(failed)} of {len(results)} sends failed:\n\n{details}")
+        
+        def on_error(error):
+            messagebox.showerror("Error", f"Batch send failed: {str(error)}")
+            self.status_var.set("📨 Batch send failed")
+        
+        self.status_var.set(f"📨 Sending to {len(recipients)} numbers...")
+        self.submit_job(f"batch of {len(recipients)}", run_batch,
+                        on_done=on_done, on_error=on_error, on_progress=on_progress)
+    
+    def send_imessage(self, phone_number: str, message: str, is_cancelled=None, template=None):
+        """Send iMessage using AppleScript"""
+        # Waits for the send rate limit; raises MessagesBridgeError
+        # ("AppleScript error: ...") on failure
+        self.core.send_text(phone_number, message, is_cancelled=is_cancelled, template=template)
     
     def send_random_duck_message(self, phone_number: str):
         """Send a variety of duck-themed messages instead of images"""
-        # Different duck messages for variety
-        duck_messages = [
-            "🦆🦆🦆 QUACK ATTACK! 🦆🦆🦆",
-            "🐥 RUBBER DUCK DEBUGGING SESSION ACTIVATED 🐥",
-            "🦆 *SQUEAKS LOUDLY* 🦆",
-            "🛁🦆 Bath time duck reporting for duty! 🦆🛁",
-            "🦆💛 Yellow duck supremacy! 💛🦆",
-            "🦆🌊 Floating into your messages... 🌊🦆",
-            "🦆✨ Magical debugging duck has arrived! ✨🦆",
-            "🦆🎵 *Quack quack* (that's duck for 'hello') 🎵🦆",
-            "🦆🔥 FIRE DUCK INCOMING! 🔥🦆",
-            "🦆🌈 Rainbow duck bringing good vibes! 🌈🦆"
-        ]
-        
-        # Pick a random duck message
-        duck_message = random.choice(duck_messages)
-        self.send_imessage(phone_number, duck_message)
-        return True
-    
-    def get_random_duck_image_url(self):
-        """Get a random duck image URL from various sources"""
-        try:
-            # Collection of DIFFERENT duck images from reliable sources
-            duck_urls = [
-                # Original debugging duck
-                "https://upload.wikimedia.org/wikipedia/commons/d/d5/Rubber_duck_assisting_with_debugging.jpg",
-                
-                # Different Wikipedia Commons duck images
-                "https://upload.wikimedia.org/wikipedia/commons/thumb/5/58/Rubber_duck_closeup.jpg/400px-Rubber_duck_closeup.jpg",
-                "https://upload.wikimedia.org/wikipedia/commons/thumb/f/f3/Rubber_duck_floating.jpg/400px-Rubber_duck_floating.jpg",
-                "https://upload.wikimedia.org/wikipedia/commons/thumb/8/87/Yellow_rubber_duck.jpg/400px-Yellow_rubber_duck.jpg",
-                "https://upload.wikimedia.org/wikipedia/commons/thumb/6/6e/Rubber_ducky_bathtub.jpg/400px-Rubber_ducky_bathtub.jpg",
-                
-                # Placeholder images with duck themes (these will definitely be different)
-                f"https://via.placeholder.com/400x400/FFD700/000000?text=DUCK+{random.randint(1, 999)}",
-                f"https://via.placeholder.com/400x400/FFA500/FFFFFF?text=QUACK+{random.randint(1, 999)}",
-                f"https://via.placeholder.com/400x400/FF6347/FFFFFF?text=RUBBER+DUCK+{random.randint(1, 999)}",
-                f"https://via.placeholder.com/400x400/32CD32/000000?text=🦆+{random.randint(1, 999)}",
-                f"https://via.placeholder.com/400x400/1E90FF/FFFFFF?text=SQUEAKY+{random.randint(1, 999)}"
-            ]
-            
-            # Pick a random URL
-            selected_url = random.choice(duck_urls)
-            print(f"Selected duck URL: {selected_url}")
-            return selected_url
-            
-        except Exception as e:
-            print(f"Random duck URL generation failed: {e}")
-            
-        return None
+        return self.core.send_random_duck_message(phone_number)
     
     def send_remote_duck_image(self, phone_number: str):
         """Send rubber duck image from various sources"""
-        try:
-            # Get a random duck image URL
-            duck_url = self.get_random_duck_image_url()
-            
-            # Fallback to reliable duck image if random generation failed
-            if not duck_url:
-                duck_url = "https://upload.wikimedia.org/wikipedia/commons/d/d5/Rubber_duck_assisting_with_debugging.jpg"
-            
-            print(f"Trying to download duck image from: {duck_url}")
-            
-            # Create request with headers to avoid blocking
-            req = urllib.request.Request(
-                duck_url,
-                headers={
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-                }
-            )
-            
-            # Download image to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_file:
-                with urllib.request.urlopen(req, timeout=15) as response:
-                    tmp_file.write(response.read())
-                
-                temp_path = tmp_file.name
-                print(f"Downloaded duck image to: {temp_path}")
-                
-                # Send image file via AppleScript
-                clean_phone = phone_number.replace("-", "").replace("(", "").replace(")", "").replace(" ", "")
-                
-                applescript = f'''
-                tell application "Messages"
-                    set targetService to 1st service whose service type = iMessage
-                    set targetBuddy to buddy "{clean_phone}" of targetService
-                    set imageFile to POSIX file "{temp_path}"
-                    send imageFile to targetBuddy
-                end tell
-                '''
-                
-                result = subprocess.run(['osascript', '-e', applescript],
-                                      capture_output=True, text=True, timeout=30)
-                
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
-                
-                if result.returncode != 0:
-                    print(f"AppleScript error: {result.stderr}")
-                    # Fallback to random duck message
-                    return self.send_random_duck_message(phone_number)
-                    
-                print("Duck image sent successfully!")
-                return True
-                        
-        except Exception as e:
-            print(f"Duck image sending failed: {e}")
-            # Fallback to random duck message for variety
-            return self.send_random_duck_message(phone_number)
+        return self.core.send_duck_image(phone_number)
     
     def send_duck_image(self):
         """Send a random rubber duck image"""
@@ -502,79 +593,103 @@ class SpamResponseApp:
             messagebox.showwarning("Warning", "Please enter a phone number first!")
             return
         
-        # Update status to show we're trying
-        self.status_var.set("🦆 Deploying duck image...")
-        self.root.update()  # Force UI update
-        
-        try:
-            # Try to send remote duck image file
-            success = self.send_remote_duck_image(phone)
-            
+        def on_done(success):
             if success:
                 self.status_var.set(f"🦆 Duck image successfully deployed to {phone}!")
             else:
                 self.status_var.set(f"🦆 Duck emojis sent to {phone} (image failed)")
-            
-        except Exception as e:
-            print(f"Duck sending error: {e}")
+        
+        def on_error(error):
+            print(f"Duck sending error: {error}")
             self.status_var.set("🦆 Duck delivery failed - check console for details")
+        
+        # Download and send happen on a worker thread; the window stays responsive
+        self.status_var.set("🦆 Deploying duck image...")
+        self.submit_job(f"duck image to {phone}",
+                        lambda job: self.send_remote_duck_image(phone),
+                        on_done=on_done, on_error=on_error)
     
     def test_applescript(self):
         """Test AppleScript functionality"""
-        try:
-            # Test if Messages app is accessible
-            test_script = '''
-            tell application "Messages"
-                return "Messages app is accessible"
-            end tell
-            '''
-            
-            result = subprocess.run(['osascript', '-e', test_script],
-                                  capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                messagebox.showinfo("Test Successful",
-                                  "AppleScript can access Messages app!\n\n" +
-                                  "You can now send messages AND duck images through the app! 🦆")
-            else:
+        def on_done(result):
+            self.status_var.set("Messages app is accessible")
+            messagebox.showinfo("Test Successful",
+                              "AppleScript can access Messages app!\n\n" +
+                              "You can now send messages AND duck images through the app! 🦆")
+        
+        def on_error(error):
+            self.status_var.set("AppleScript test failed")
+            if isinstance(error, MessagesBridgeError):
                 messagebox.showerror("Test Failed",
-                                   f"AppleScript test failed: {result.stderr}\n\n" +
+                                   f"AppleScript test failed: {error}\n\n" +
                                    "Make sure Messages app is installed and accessible.")
-        except Exception as e:
-            messagebox.showerror("Test Error", f"Test failed: {str(e)}")
+            else:
+                messagebox.showerror("Test Error", f"Test failed: {str(error)}")
+        
+        # Test if Messages app is accessible through the worker
+        self.status_var.set("Testing AppleScript...")
+        self.submit_job("AppleScript test", lambda job: self.core.ping(),
+                        on_done=on_done, on_error=on_error)
     
     def run(self):
         """Start the application"""
         # Bind phone number change to enable/disable quick send
         self.phone_var.trace_add('write', self.on_phone_change)
         
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.dispatcher.shutdown()
+            self.core.close()
     
     def paste_from_clipboard(self):
         """Paste phone number from clipboard"""
         try:
             # Get clipboard content
             clipboard_content = self.root.clipboard_get()
-            
-            # Basic phone number extraction - look for numbers
-            import re
-            # Find phone numbers in various formats
-            phone_pattern = r'[\+]?[1]?[\s\-\(\)]?[\d]{3}[\s\-\(\)]?[\d]{3}[\s\-]?[\d]{4}'
-            matches = re.findall(phone_pattern, clipboard_content)
+            self.spam_text = clipboard_content
+            
+            # Find every phone number, normalized to E.164 and deduplicated
+            matches = extract_from_text(clipboard_content)
+            
+            # Real contacts on the never-send list are dropped; known spammers are flagged
+            lists = self.core.number_lists
+            lists.refresh()
+            skipped = [number for number in matches if number in lists.never_send]
+            matches = [number for number in matches if number not in lists.never_send]
+            known = sum(1 for number in matches if number in lists.known_spam)
+            self.pasted_numbers = matches
+            
+            notes = []
+            if known:
+                notes.append(f"{known} on the spam feeds")
+            if skipped:
+                notes.append(f"{len(skipped)} on the never-send list skipped")
+            note = f" ({', '.join(notes)})" if notes else ""
             
             if matches:
                 # Use the first phone number found
-                phone_number = matches[0].strip()
+                phone_number = matches[0]
                 self.phone_var.set(phone_number)
-                self.status_var.set(f"📋 Pasted phone number: {phone_number}")
+                if len(matches) > 1:
+                    self.status_var.set(f"📋 Pasted {phone_number} - {len(matches)} numbers found, "
+                                        f"use 📨 Batch Send to reply to all{note}")
+                else:
+                    self.status_var.set(f"📋 Pasted phone number: {phone_number}{note}")
                 
                 # Auto-focus on response selection
                 if self.responses:
                     self.response_listbox.focus_set()
+            elif skipped:
+                self.phone_var.set("")
+                self.status_var.set(f"🚫 Not pasted: {', '.join(skipped)} on the never-send list")
             else:
                 # Just paste whatever is in clipboard
                 self.phone_var.set(clipboard_content.strip())
                 self.status_var.set("📋 Pasted from clipboard")
+            
+            if self.selected_message:
+                self.update_preview()
                 
         except tk.TclError:
             # Clipboard is empty or can't be accessed
@@ -587,6 +702,10 @@ class SpamResponseApp:
             self.quick_send_btn.configure(state='normal')
         else:
             self.quick_send_btn.configure(state='disabled')
+        
+        # [SENDER NUMBER] follows the number as it's typed
+        if self.selected_message:
+            self.update_preview()
 
 
 class ResponseDialog:
@@ -658,6 +777,121 @@ class ResponseDialog:
         self.dialog.destroy()
 
 
+class BatchSendDialog:
+    def __init__(self, parent, initial_recipients="", submit_job=None):
+        self.result = None
+        self.submit_job = submit_job
+        
+        # Create dialog window
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Batch Send")
+        self.dialog.geometry("400x400")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        # Create form
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Recipients field
+        ttk.Label(main_frame, text="Phone Numbers (one per line):").pack(anchor=tk.W)
+        self.recipients_text = tk.Text(main_frame, height=12, wrap=tk.NONE)
+        self.recipients_text.pack(fill=tk.BOTH, expand=True, pady=(5, 5))
+        self.recipients_text.insert(1.0, initial_recipients)
+        self.recipients_text.focus()
+        
+        # Bulk loading - pulls every number out of pasted threads or log files
+        load_frame = ttk.Frame(main_frame)
+        load_frame.pack(fill=tk.X, pady=(0, 15))
+        ttk.Button(load_frame, text="📋 Paste Numbers",
+                   command=self.paste_numbers).pack(side=tk.LEFT)
+        ttk.Button(load_frame, text="📂 Load File...",
+                   command=self.load_file).pack(side=tk.LEFT, padx=(10, 0))
+        self.count_var = tk.StringVar()
+        ttk.Label(load_frame, textvariable=self.count_var).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Chunk size field
+        chunk_frame = ttk.Frame(main_frame)
+        chunk_frame.pack(fill=tk.X, pady=(0, 15))
+        ttk.Label(chunk_frame, text="Numbers per Messages call:").pack(side=tk.LEFT)
+        self.chunk_var = tk.IntVar(value=DEFAULT_CHUNK_SIZE)
+        ttk.Spinbox(chunk_frame, from_=1, to=500, textvariable=self.chunk_var,
+                    width=6).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Buttons
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.pack(fill=tk.X)
+        
+        ttk.Button(btn_frame, text="Cancel", command=self.cancel).pack(side=tk.RIGHT, padx=(10, 0))
+        ttk.Button(btn_frame, text="Send to All", command=self.save).pack(side=tk.RIGHT)
+        
+        self.dialog.bind('<Escape>', lambda e: self.cancel())
+        
+        # Wait for dialog to close
+        self.dialog.wait_window()
+    
+    def set_numbers(self, numbers):
+        """Replace the recipient list with extracted numbers"""
+        self.recipients_text.delete(1.0, tk.END)
+        self.recipients_text.insert(1.0, "\n".join(numbers))
+        self.count_var.set(f"{len(numbers)} unique numbers")
+    
+    def paste_numbers(self):
+        """Load every number found in the clipboard"""
+        try:
+            self.set_numbers(extract_from_text(self.dialog.clipboard_get()))
+        except tk.TclError:
+            messagebox.showwarning("Clipboard Empty", "No content found in clipboard to paste",
+                                   parent=self.dialog)
+    
+    def load_file(self):
+        """Load every number found in a text or log file, scanning it in the background"""
+        path = filedialog.askopenfilename(parent=self.dialog, title="Load phone numbers from...")
+        if not path:
+            return
+        
+        def on_done(numbers):
+            if self.dialog.winfo_exists():
+                self.set_numbers(numbers)
+        
+        def on_error(error):
+            if self.dialog.winfo_exists():
+                self.count_var.set("")
+                messagebox.showerror("Error", f"Could not read {path}: {error}", parent=self.dialog)
+        
+        self.count_var.set("Scanning file...")
+        if self.submit_job:
+            self.submit_job(f"extract numbers from {path}", lambda job: extract_from_file(path),
+                            on_done=on_done, on_error=on_error)
+        else:
+            try:
+                on_done(extract_from_file(path))
+            except OSError as e:
+                on_error(e)
+    
+    def save(self):
+        """Collect the recipients and chunk size"""
+        recipients = parse_recipients(self.recipients_text.get(1.0, tk.END))
+        if not recipients:
+            messagebox.showwarning("Warning", "Please enter at least one phone number")
+            return
+        
+        try:
+            chunk_size = int(self.chunk_var.get())
+        except (tk.TclError, ValueError):
+            chunk_size = 0
+        if chunk_size < 1:
+            messagebox.showwarning("Warning", "Numbers per Messages call must be at least 1")
+            return
+        
+        self.result = (recipients, chunk_size)
+        self.dialog.destroy()
+    
+    def cancel(self):
+        """Cancel the dialog"""
+        self.dialog.destroy()
+
+
 if __name__ == "__main__":
     app = SpamResponseApp()
     app.run()
\ No newline at end of file
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Persistent Messages bridge
+Keeps one osascript worker alive and feeds it send commands over a pipe,
+so a burst of replies pays for process startup once. The worker handles
+sends, file sends and the health check; it is a precompiled handler
+(applescript_handlers.py), so starting it doesn't compile anything either.
+"""
+
+import atexit
+import json
+import queue
+import subprocess
+import threading
+import time
+from typing import Dict, Optional
+
+import metrics
+from applescript_handlers import Handler, osascript_executable
+
+# Marker the stand-in executable looks for to recognise the worker program
+WORKER_MARKER = "spam-response-bridge-worker"
+
+# JXA worker: reads one JSON command per line from stdin, answers one JSON
+# result per line on stdout. Python writes ASCII-only JSON (non-ASCII text is
+# \u-escaped) so a read can never split a multi-byte character.
+WORKER_SCRIPT = '''
+// %s
+ObjC.import('Foundation');
+var Messages = Application('Messages');
+var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+
+function reply(obj) {
+    var line = JSON.stringify(obj) + "\\n";
+    stdout.writeData($(line).dataUsingEncoding($.NSUTF8StringEncoding));
+}
+
+function targetBuddy(phone) {
+    var service = Messages.services.whose({serviceType: 'iMessage'})[0];
+    return service.buddies.byName(phone);
+}
+
+function handle(cmd) {
+    if (cmd.op === 'ping') {
+        Messages.name();
+    } else if (cmd.op === 'send') {
+        Messages.send(cmd.message, {to: targetBuddy(cmd.phone)});
+    } else if (cmd.op === 'send_file') {
+        Messages.send(Path(cmd.path), {to: targetBuddy(cmd.phone)});
+    } else {
+        throw new Error('unknown op: ' + cmd.op);
+    }
+}
+
+function run() {
+    var buffer = '';
+    reply({id: 0, ok: true, ready: true});
+    while (true) {
+        var data = stdin.availableData;
+        if (data.length === 0) {
+            break;
+        }
+        buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+        var newline = buffer.indexOf('\\n');
+        while (newline >= 0) {
+            var line = buffer.slice(0, newline);
+            buffer = buffer.slice(newline + 1);
+            newline = buffer.indexOf('\\n');
+            if (!line) {
+                continue;
+            }
+            var cmd = JSON.parse(line);
+            try {
+                handle(cmd);
+                reply({id: cmd.id, ok: true});
+            } catch (e) {
+                reply({id: cmd.id, ok: false, error: String(e)});
+            }
+        }
+    }
+}
+''' % WORKER_MARKER
+
+WORKER = Handler("bridge_worker", WORKER_SCRIPT, language="JavaScript")
+
+
+class MessagesBridgeError(Exception):
+    """Raised when the Messages worker cannot deliver a command"""
+
+
+class MessagesBridge:
+    """Long-lived osascript worker that sends through Messages on request"""
+
+    def __init__(self, executable: Optional[str] = None, timeout: float = 30.0,
+                 startup_timeout: float = 15.0):
+        self.executable = executable or osascript_executable()
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self._lines = None
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.commands_sent = 0
+        self.restarts = 0
+
+    def start(self):
+        """Start the worker process if it is not already running"""
+        with self._lock:
+            self._ensure_started()
+
+    def _ensure_started(self):
+        if self.process is not None and self.process.poll() is None:
+            return
+        if self.process is not None:
+            self.restarts += 1
+            metrics.count("bridge.restart")
+
+        started = time.perf_counter()
+        try:
+            self.process = subprocess.Popen(
+                WORKER.command(executable=self.executable),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, bufsize=1)
+        except OSError as e:
+            self.process = None
+            raise MessagesBridgeError(f"Could not start osascript worker: {e}")
+
+        # A reader thread turns stdout into a queue so every wait can time out
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read_lines,
+                         args=(self.process.stdout, self._lines),
+                         daemon=True).start()
+
+        ready = self._read_reply(0, self.startup_timeout)
+        if not ready.get('ok'):
+            self._kill()
+            raise MessagesBridgeError(f"osascript worker failed to start: {ready.get('error')}")
+        # Process startup (plus compiling the worker script if it isn't precompiled)
+        metrics.observe("bridge.spawn", time.perf_counter() - started)
+
+    @staticmethod
+    def _read_lines(stream, lines: queue.Queue):
+        for line in stream:
+            lines.put(line)
+        lines.put(None)
+
+    def _read_reply(self, request_id: int, timeout: float) -> Dict:
+        while True:
+            try:
+                line = self._lines.get(timeout=timeout)
+            except queue.Empty:
+                self._kill()
+                raise MessagesBridgeError(f"osascript worker timed out after {timeout:.0f}s")
+
+            if line is None:
+                stderr = self._kill()
+                raise MessagesBridgeError(f"osascript worker exited: {stderr.strip()}")
+
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                # Stray output (e.g. a log line) is not part of the protocol
+                continue
+            if reply.get('id') == request_id:
+                return reply
+
+    def _kill(self) -> str:
+        """Stop the worker and return whatever it wrote to stderr"""
+        process, self.process = self.process, None
+        if process is None:
+            return ""
+        if process.poll() is None:
+            process.kill()
+        try:
+            _, stderr = process.communicate(timeout=5)
+        except (subprocess.TimeoutExpired, ValueError):
+            stderr = ""
+        return stderr or ""
+
+    def _request(self, op: str, **fields) -> Dict:
+        with self._lock:
+            self._ensure_started()
+            started = time.perf_counter()
+            request_id = self._next_id
+            self._next_id += 1
+
+            command = dict(fields, id=request_id, op=op)
+            try:
+                self.process.stdin.write(json.dumps(command) + "\n")
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                self._kill()
+                raise MessagesBridgeError(f"osascript worker pipe closed: {e}")
+
+            reply = self._read_reply(request_id, self.timeout)
+            self.commands_sent += 1
+            # The Messages round-trip alone, without any worker startup
+            metrics.observe(f"bridge.{op}", time.perf_counter() - started)
+
+        if not reply.get('ok'):
+            raise MessagesBridgeError(f"AppleScript error: {reply.get('error')}")
+        return reply
+
+    def send_text(self, phone_number: str, message: str):
+        """Send a text message to a buddy"""
+        self._request('send', phone=phone_number, message=message)
+
+    def send_file(self, phone_number: str, path: str):
+        """Send a file (e.g. an image) to a buddy"""
+        self._request('send_file', phone=phone_number, path=path)
+
+    def ping(self):
+        """Check that the worker is alive and Messages is scriptable"""
+        self._request('ping')
+
+    def close(self):
+        """Shut the worker down cleanly"""
+        with self._lock:
+            process = self.process
+            if process is None:
+                return
+            try:
+                process.stdin.close()
+                process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+            self._kill()
+
+
+_default_bridge = None
+_default_bridge_lock = threading.Lock()
+
+
+def get_bridge() -> MessagesBridge:
+    """Return the process-wide bridge, creating it on first use"""
+    global _default_bridge
+    with _default_bridge_lock:
+        if _default_bridge is None:
+            _default_bridge = MessagesBridge()
+            atexit.register(_default_bridge.close)
+        return _default_bridge
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Hot-path timings and counters
+Each stage of a send (number normalization, never-send check, rate-limit wait,
+osascript spawn, the Messages round-trip, the ledger), of a duck image send
+(cache lookup, download, temp-file write, conversion) and of the response
+store records into one process-wide registry: counters, plus rolling windows
+of recent timings with p50/p95/p99. Recording costs a perf_counter and a deque append.
+
+The registry is written out as a Prometheus text file (point node_exporter's
+textfile collector at the directory) and a JSON snapshot, every
+$SPAM_METRICS_INTERVAL seconds while something changed and when the app exits.
+
+Usage: python3 metrics.py [metrics.json]    (show the last snapshot)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from app_paths import user_cache_dir
+
+# Where the exports go (default: the per-user cache dir); "off" disables them
+METRICS_DIR_ENV = "SPAM_METRICS_DIR"
+# Seconds between exports while the app runs
+METRICS_INTERVAL_ENV = "SPAM_METRICS_INTERVAL"
+DEFAULT_INTERVAL = 15.0
+
+PROMETHEUS_FILE = "spam_response.prom"
+JSON_FILE = "metrics.json"
+
+# Timings kept per stage for the rolling percentiles
+WINDOW = 1024
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Timing:
+    """Count and total of every observation, percentiles over the last WINDOW"""
+
+    __slots__ = ("count", "total", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=WINDOW)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def summary(self) -> Dict:
+        ordered = sorted(self.recent)
+        summary = {"count": self.count, "sum_s": self.total}
+        for q in QUANTILES:
+            value = ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+            summary[f"p{q * 100:g}_ms"] = value * 1000
+        summary["max_ms"] = (ordered[-1] if ordered else 0.0) * 1000
+        return summary
+
+
+class _Timer:
+    """with metrics.timer("send.bridge"): ... records the block's duration, even if it raises"""
+
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry: "Metrics", name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Named counters and timings, safe to update from any thread"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.timings: Dict[str, Timing] = {}
+        self.counters: Dict[str, int] = {}
+        self.changes = 0
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = Timing()
+            timing.add(seconds)
+            self.changes += 1
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+            self.changes += 1
+
+    def timer(self, name: str) -> _Timer:
+        return _Timer(self, name)
+
+    def snapshot(self) -> Dict:
+        """Everything recorded so far, percentiles in milliseconds"""
+        with self._lock:
+            timings = {name: timing.summary() for name, timing in self.timings.items()}
+            counters = dict(self.counters)
+        return {
+            "created": time.time(),
+            "started": self.started,
+            "pid": os.getpid(),
+            "counters": dict(sorted(counters.items())),
+            "timings": dict(sorted(timings.items())),
+        }
+
+    def prometheus(self, snapshot: Optional[Dict] = None) -> str:
+        """The snapshot in the Prometheus text exposition format"""
+        snapshot = snapshot or self.snapshot()
+        lines = [
+            "# HELP spam_response_stage_seconds Time spent in each stage (quantiles over recent calls)",
+            "# TYPE spam_response_stage_seconds summary",
+        ]
+        for name, timing in snapshot["timings"].items():
+            label = f'stage="{_label(name)}"'
+            for q in QUANTILES:
+                seconds = timing[f"p{q * 100:g}_ms"] / 1000
+                lines.append(f'spam_response_stage_seconds{{{label},quantile="{q:g}"}} {seconds:.9g}')
+            lines.append(f"spam_response_stage_seconds_sum{{{label}}} {timing['sum_s']:.9g}")
+            lines.append(f"spam_response_stage_seconds_count{{{label}}} {timing['count']}")
+        lines += [
+            "# HELP spam_response_events_total Things that happened (sends, cache hits, fallbacks)",
+            "# TYPE spam_response_events_total counter",
+        ]
+        for name, value in snapshot["counters"].items():
+            lines.append(f'spam_response_events_total{{event="{_label(name)}"}} {value}')
+        lines += [
+            "# HELP spam_response_start_time_seconds When the process started",
+            "# TYPE spam_response_start_time_seconds gauge",
+            f"spam_response_start_time_seconds {snapshot['started']:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory: str):
+        """Write the Prometheus file and the JSON snapshot (atomically, so readers never see half)"""
+        snapshot = self.snapshot()
+        _write_atomic(os.path.join(directory, JSON_FILE),
+                      json.dumps(snapshot, indent=2) + "\n")
+        _write_atomic(os.path.join(directory, PROMETHEUS_FILE), self.prometheus(snapshot))
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_atomic(path: str, text: str):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# The process-wide registry everything records into
+REGISTRY = Metrics()
+
+
+def timer(name: str) -> _Timer:
+    return REGISTRY.timer(name)
+
+
+def observe(name: str, seconds: float):
+    REGISTRY.observe(name, seconds)
+
+
+def count(name: str, n: int = 1):
+    REGISTRY.count(name, n)
+
+
+def metrics_dir() -> Optional[str]:
+    """Export directory, or None if exports are turned off"""
+    configured = os.environ.get(METRICS_DIR_ENV, "")
+    if configured.lower() == "off":
+        return None
+    if configured:
+        os.makedirs(configured, exist_ok=True)
+        return configured
+    return user_cache_dir("metrics")
+
+
+class MetricsExporter:
+    """Background thread that exports the registry whenever it has changed"""
+
+    def __init__(self, directory: str, interval: float = DEFAULT_INTERVAL,
+                 registry: Metrics = REGISTRY):
+        self.directory = directory
+        self.interval = interval
+        self.registry = registry
+        self._exported = -1
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-export", daemon=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["MetricsExporter"]:
+        directory = metrics_dir()
+        if directory is None:
+            return None
+        try:
+            interval = float(os.environ.get(METRICS_INTERVAL_ENV) or DEFAULT_INTERVAL)
+        except ValueError:
+            interval = DEFAULT_INTERVAL
+        return cls(directory, max(interval, 1.0))
+
+    def start(self):
+        self._thread.start()
+
+    def export(self):
+        """Export now if anything was recorded since the last export"""
+        changes = self.registry.changes
+        if changes == self._exported:
+            return
+        try:
+            self.registry.export(self.directory)
+            self._exported = changes
+        except OSError as e:
+            print(f"Could not write metrics to {self.directory}: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export()
+
+    def stop(self):
+        """Stop the thread and write a final export"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.export()
+
+
+def describe(snapshot: Dict) -> str:
+    """Table of a snapshot's timings and counters"""
+    lines = [f"{'stage':<24} {'count':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+    for name, timing in snapshot["timings"].items():
+        lines.append(f"{name:<24} {timing['count']:>8} {timing['p50_ms']:9.2f} "
+                     f"{timing['p95_ms']:9.2f} {timing['p99_ms']:9.2f} {timing['max_ms']:9.2f}")
+    for name, value in snapshot["counters"].items():
+        lines.append(f"{name:<24} {value:>8}")
+    return "\n".join(lines)
+
+
+def main():
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+    else:
+        directory = metrics_dir()
+        if directory is None:
+            print(f"🦆 Metrics exports are off ({METRICS_DIR_ENV}=off)")
+            return
+        path = os.path.join(directory, JSON_FILE)
+    try:
+        with open(path, 'r') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ No metrics snapshot at {path}: {e}")
+        sys.exit(1)
+    written = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot["created"]))
+    print(f"🦆 Metrics from pid {snapshot['pid']}, written {written}")
+    print(describe(snapshot))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Never-send and known-spam number lists
+Each list is a file of sorted 64-bit integers (an E.164 number's digits read
+as one integer) that is memory-mapped rather than read, so a feed of millions
+of numbers opens in milliseconds and a lookup is a binary search taking
+microseconds. Lists are rebuilt in one pass when feeds are imported.
+
+never_send: real contacts that must never get a spam response; sends to them
+            are refused and pasted numbers on it are skipped
+known_spam: shared spam-number feeds; pasted numbers on it are flagged
+
+Usage:
+  python3 number_lists.py import LIST FEED [FEED ...]   (one number per line, '-' for stdin)
+  python3 number_lists.py add|remove LIST PHONE [PHONE ...]
+  python3 number_lists.py check PHONE [PHONE ...]
+  python3 number_lists.py stats
+"""
+
+import itertools
+import mmap
+import os
+import re
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+
+from app_paths import user_data_path
+from phone_numbers import normalize, normalize_many
+
+# Override for where the list files live
+LISTS_DIR_ENV = "SPAM_NUMBER_LISTS_DIR"
+DEFAULT_LISTS_DIR = "number_lists"
+
+NEVER_SEND = "never_send"
+KNOWN_SPAM = "known_spam"
+LIST_NAMES = (NEVER_SEND, KNOWN_SPAM)
+
+# File layout: magic (which records the byte order), number count, sorted keys
+MAGIC = b"SPAMNUM" + (b"L" if sys.byteorder == "little" else b"B")
+HEADER_SIZE = 16
+
+# Feed lines normalized per batch while importing
+IMPORT_BATCH = 100000
+
+# The number is the first field of a feed line; the rest (and # comments) is ignored
+FEED_FIRST_FIELD = re.compile(r'^[ \t]*([^,;\t|#\r\n]+)', re.MULTILINE)
+
+
+def lists_dir() -> str:
+    return os.environ.get(LISTS_DIR_ENV) or user_data_path(DEFAULT_LISTS_DIR)
+
+
+def list_path(name: str, directory: Optional[str] = None) -> str:
+    if name not in LIST_NAMES:
+        raise ValueError(f"Unknown number list '{name}' (expected one of: {', '.join(LIST_NAMES)})")
+    return os.path.join(directory or lists_dir(), name + ".numbers")
+
+
+def number_key(e164: str) -> int:
+    """+15551234567 -> 15551234567 (country codes never start with 0, so this is one-to-one)"""
+    return int(e164[1:])
+
+
+class NumberSet:
+    """Read-only sorted set of numbers backed by a memory-mapped list file
+
+    reload() swaps in a new mapping without touching the old one, so lookups
+    on other threads never see a half-loaded list; an old mapping is unmapped
+    once the last lookup using it is done.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._keys = array('Q')
+        # (inode, size, mtime) of the file last loaded; False before the first load
+        self._stat = False
+        self.reload()
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def reload(self) -> bool:
+        """Pick up a rebuilt list file; True if it changed"""
+        stat = self._file_stat()
+        if stat == self._stat:
+            return False
+        with self._lock:
+            if stat == self._stat:
+                return False
+            self._keys = self._load() if stat is not None and stat[1] > HEADER_SIZE else array('Q')
+            self._stat = stat
+        return True
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = mapped[:8]
+        count = int.from_bytes(mapped[8:HEADER_SIZE], "little" if magic[7:] == b"L" else "big")
+        if magic[:7] != MAGIC[:7] or HEADER_SIZE + count * 8 > len(mapped):
+            mapped.close()
+            raise ValueError(f"{self.path} is not a number list")
+        if magic == MAGIC:
+            # The view keeps the mapping open for as long as it is in use
+            return memoryview(mapped)[HEADER_SIZE:HEADER_SIZE + count * 8].cast('Q')
+        # Written on a machine with the other byte order: copy and swap once
+        keys = array('Q', mapped[HEADER_SIZE:HEADER_SIZE + count * 8])
+        keys.byteswap()
+        mapped.close()
+        return keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def contains_key(self, key: int) -> bool:
+        keys = self._keys
+        i = bisect_left(keys, key)
+        return i < len(keys) and keys[i] == key
+
+    def __contains__(self, phone: str) -> bool:
+        """phone in any format; anything that isn't a phone number is never listed"""
+        number = phone if phone[:1] == "+" and phone[1:].isdigit() else normalize(phone)
+        return bool(number) and self.contains_key(int(number[1:]))
+
+    def keys(self) -> Iterator[int]:
+        return iter(self._keys)
+
+    def close(self):
+        with self._lock:
+            self._keys = array('Q')
+            self._stat = False
+
+
+def write_keys(path: str, keys: Iterable[int]) -> int:
+    """Atomically replace path with the sorted, deduplicated keys; returns the count
+
+    keys must already be sorted.
+    """
+    unique = array('Q', (key for key, _ in itertools.groupby(keys)))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".numbers-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC + len(unique).to_bytes(8, sys.byteorder))
+            unique.tofile(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(unique)
+
+
+def feed_keys(stream: TextIO) -> Iterator[int]:
+    """Keys of every valid number in a feed (one number per line, extra columns ignored)"""
+    while True:
+        # Whole lines only, so every first field is complete
+        text = "".join(stream.readlines(IMPORT_BATCH * 16))
+        if not text:
+            return
+        fields = [field.strip() for field in FEED_FIRST_FIELD.findall(text)]
+        for number in normalize_many(fields):
+            if number:
+                yield int(number[1:])
+
+
+class NumberLists:
+    """The app's named lists, opened on first use"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._sets = {}
+
+    def get(self, name: str) -> NumberSet:
+        number_set = self._sets.get(name)
+        if number_set is None:
+            number_set = self._sets[name] = NumberSet(list_path(name, self.directory))
+        return number_set
+
+    @property
+    def never_send(self) -> NumberSet:
+        return self.get(NEVER_SEND)
+
+    @property
+    def known_spam(self) -> NumberSet:
+        return self.get(KNOWN_SPAM)
+
+    def refresh(self):
+        """Pick up lists rebuilt by another process (a stat() per open list)"""
+        for number_set in self._sets.values():
+            number_set.reload()
+
+    def import_feeds(self, name: str, streams: Iterable[TextIO]) -> Dict[str, int]:
+        """Merge every number in streams into a list; returns before/after/read counts"""
+        number_set = self.get(name)
+        number_set.reload()
+        keys = list(number_set.keys())
+        before = len(keys)
+        for stream in streams:
+            keys.extend(feed_keys(stream))
+        read = len(keys) - before
+        keys.sort()
+        after = write_keys(number_set.path, keys)
+        number_set.reload()
+        return {"before": before, "after": after, "read": read}
+
+    def add(self, name: str, phones: Iterable[str]) -> int:
+        """Add numbers to a list; returns how many were valid"""
+        new = [number_key(n) for n in normalize_many(list(phones)) if n]
+        number_set = self.get(name)
+        number_set.reload()
+        keys = sorted(itertools.chain(number_set.keys(), new))
+        write_keys(number_set.path, keys)
+        number_set.reload()
+        return len(new)
+
+    def remove(self, name: str, phones: Iterable[str]) -> int:
+        """Remove numbers from a list; returns how many were on it"""
+        gone = {number_key(n) for n in normalize_many(list(phones)) if n}
+        number_set = self.get(name)
+        number_set.reload()
+        before = len(number_set)
+        after = write_keys(number_set.path, [k for k in number_set.keys() if k not in gone])
+        number_set.reload()
+        return before - after
+
+    def close(self):
+        for number_set in self._sets.values():
+            number_set.close()
+        self._sets.clear()
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ("import", "add", "remove", "check", "stats"):
+        print(__doc__.split("Usage:")[1].rstrip(), file=sys.stderr)
+        sys.exit(2)
+    command = args[0]
+    lists = NumberLists()
+    try:
+        if command == "stats":
+            for name in LIST_NAMES:
+                print(f"{name}: {len(lists.get(name))} numbers")
+        elif command == "check":
+            for phone in args[1:]:
+                on = [name for name in LIST_NAMES if phone in lists.get(name)]
+                print(f"{phone}\t{', '.join(on) or '-'}")
+        elif len(args) < 3:
+            print(f"❌ Usage: number_lists.py {command} LIST ...", file=sys.stderr)
+            sys.exit(2)
+        elif command == "import":
+            streams = []
+            try:
+                for path in args[2:]:
+                    streams.append(sys.stdin if path == "-" else
+                                   open(path, 'r', encoding='utf-8', errors='replace'))
+                counts = lists.import_feeds(args[1], streams)
+            finally:
+                for stream in streams:
+                    if stream is not sys.stdin:
+                        stream.close()
+            print(f"🦆 Read {counts['read']} numbers: {args[1]} went from {counts['before']} "
+                  f"to {counts['after']}")
+        elif command == "add":
+            print(f"🦆 Added {lists.add(args[1], args[2:])} numbers to {args[1]}")
+        else:
+            print(f"🦆 Removed {lists.remove(args[1], args[2:])} numbers from {args[1]}")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        lists.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Bulk phone number extraction
+Scans clipboard dumps, spam threads, carrier reports or log files in chunks,
+so input of any size streams through without being held in memory, and
+returns every distinct number normalized to E.164
+
+Usage: python3 phone_extract.py [file ...]    (reads stdin when no file or "-")
+"""
+
+import io
+import sys
+from typing import Iterable, Iterator, List, Optional, TextIO
+
+from phone_numbers import DEFAULT_COUNTRY_CODE, PHONE_CANDIDATE_PATTERN, normalize_many
+
+CHUNK_SIZE = 1024 * 1024
+
+# Longest text a single candidate can span; matches reaching into the last
+# OVERLAP characters of a chunk wait for the next chunk to be complete
+OVERLAP = 64
+
+# Characters kept before the resume point so the pattern's look-behind still
+# sees what preceded it
+CONTEXT = 1
+
+
+def iter_numbers(stream: TextIO, chunk_size: int = CHUNK_SIZE,
+                 default_country: str = DEFAULT_COUNTRY_CODE,
+                 seen: Optional[set] = None) -> Iterator[str]:
+    """Yield each distinct normalized number in stream, in order of first appearance
+
+    Pass the same `seen` set to several calls to deduplicate across sources.
+    """
+    if seen is None:
+        seen = set()
+    finditer = PHONE_CANDIDATE_PATTERN.finditer
+    carry = ""
+    start = 0
+
+    while True:
+        chunk = stream.read(chunk_size)
+        at_eof = not chunk
+        buffer = carry + chunk
+        safe_end = len(buffer) if at_eof else len(buffer) - OVERLAP
+
+        candidates = []
+        resume = max(safe_end, start)
+        for match in finditer(buffer, start):
+            if match.end() > safe_end:
+                resume = match.start()
+                break
+            candidates.append(match.group().strip())
+
+        for number in normalize_many(candidates, default_country):
+            if number and number not in seen:
+                seen.add(number)
+                yield number
+
+        if at_eof:
+            return
+        keep_from = max(resume - CONTEXT, 0)
+        carry = buffer[keep_from:]
+        start = resume - keep_from
+
+
+def extract_from_text(text: str, default_country: str = DEFAULT_COUNTRY_CODE) -> List[str]:
+    """Every distinct number in a string (e.g. the clipboard)"""
+    return list(iter_numbers(io.StringIO(text), default_country=default_country))
+
+
+def extract_from_file(path: str, default_country: str = DEFAULT_COUNTRY_CODE) -> List[str]:
+    """Every distinct number in a text file; undecodable bytes are skipped"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return list(iter_numbers(f, default_country=default_country))
+
+
+def extract_from_sources(paths: Iterable[str],
+                         default_country: str = DEFAULT_COUNTRY_CODE) -> Iterator[str]:
+    """Distinct numbers across several files ("-" is stdin)"""
+    seen = set()
+    for path in paths:
+        if path == "-":
+            yield from iter_numbers(sys.stdin, default_country=default_country, seen=seen)
+        else:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                yield from iter_numbers(f, default_country=default_country, seen=seen)
+
+
+def main():
+    """Print every distinct number found in the given files (or stdin), one per line"""
+    paths = sys.argv[1:] or ["-"]
+    count = 0
+    try:
+        for number in extract_from_sources(paths):
+            print(number)
+            count += 1
+    except OSError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"🦆 Found {count} distinct phone numbers", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
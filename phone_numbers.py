@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Phone number normalization
+Turns whatever people paste - (555) 234-5678, +1 555.234.5678, tel:0044 20 ...
+- into one canonical E.164 form (+15552345678) so the same spammer is always
+the same Messages buddy
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+DEFAULT_COUNTRY_CODE = "1"
+
+# E.164 country calling codes are prefix-free: 1 and 7 are one digit, these
+# are two digits, and everything else is three digits
+ONE_DIGIT_CODES = frozenset(("1", "7"))
+TWO_DIGIT_CODES = frozenset((
+    "20", "27", "30", "31", "32", "33", "34", "36", "39", "40", "41", "43", "44",
+    "45", "46", "47", "48", "49", "51", "52", "53", "54", "55", "56", "57", "58",
+    "60", "61", "62", "63", "64", "65", "66", "81", "82", "84", "86", "90", "91",
+    "92", "93", "94", "95", "98",
+))
+
+# National significant number lengths for common default countries
+# (country code -> (min, max) digits after the country code)
+NATIONAL_LENGTHS = {
+    "1": (10, 10),
+    "44": (9, 10),
+    "61": (9, 9),
+    "33": (9, 9),
+    "49": (6, 13),
+}
+
+# E.164 allows at most 15 digits including the country code
+MAX_E164_DIGITS = 15
+MIN_E164_DIGITS = 8
+
+# The usual North American formats, matched in one step
+NANP_FAST_PATTERN = re.compile(
+    r'^\s*(?:\+?1[\s.\-]?)?\(?([2-9]\d{2})\)?[\s.\-]?([2-9]\d{2})[\s.\-]?(\d{4})\s*$')
+NON_DIGITS = re.compile(r'\D+')
+# Everything but digits and a leading +
+NON_HANDLE_CHARACTERS = re.compile(r'(?!^\+)\D')
+URI_PREFIX = re.compile(r'^\s*(?:tel|sms|imessage):\s*', re.IGNORECASE)
+EXTENSION_SUFFIX = re.compile(r'\s*(?:ext\.?|extension|x|#)\s*\d+\s*$', re.IGNORECASE)
+INTERNATIONAL_PREFIX = re.compile(r'^\s*(?:\+|00|011)')
+
+# Phone-number-looking runs inside free text (clipboard, spam threads, logs)
+PHONE_CANDIDATE_PATTERN = re.compile(
+    r'(?<![\w+])(?:\+|00|011)?\d?[\s.\-]?\(?\d{2,4}\)?(?:[\s.\-]?\d{2,4}){2,4}(?!\w)')
+
+CACHE_SIZE = 65536
+
+
+def country_code_of(digits: str) -> Optional[str]:
+    """Split the country calling code off an international digit string"""
+    if digits[:1] in ONE_DIGIT_CODES:
+        return digits[:1]
+    if digits[:2] in TWO_DIGIT_CODES:
+        return digits[:2]
+    if len(digits) >= 3 and digits[0] != "0":
+        return digits[:3]
+    return None
+
+
+def _valid_national(country_code: str, national: str) -> bool:
+    low, high = NATIONAL_LENGTHS.get(country_code, (4, MAX_E164_DIGITS - len(country_code)))
+    if not low <= len(national) <= high:
+        return False
+    if country_code == "1":
+        # NANP area codes and exchanges never start with 0 or 1
+        return national[0] >= "2" and national[3] >= "2"
+    return True
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize(raw: str, default_country: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    """Return raw as an E.164 number (e.g. +15552345678), or None if it isn't one
+
+    Numbers without an international prefix are read as national numbers of
+    default_country (a calling code such as "1" or "44").
+    """
+    if not raw or "@" in raw:
+        return None
+
+    if default_country == "1":
+        match = NANP_FAST_PATTERN.match(raw)
+        if match:
+            return "+1" + match.group(1) + match.group(2) + match.group(3)
+
+    text = EXTENSION_SUFFIX.sub("", URI_PREFIX.sub("", raw))
+    international = INTERNATIONAL_PREFIX.match(text)
+    digits = NON_DIGITS.sub("", text)
+    if not digits:
+        return None
+
+    if international:
+        if text.lstrip().startswith("00"):
+            digits = digits[2:]
+        elif text.lstrip().startswith("011"):
+            digits = digits[3:]
+        country_code = country_code_of(digits)
+        if country_code is None:
+            return None
+        national = digits[len(country_code):]
+    else:
+        country_code = default_country
+        national = digits
+        if country_code == "1" and len(national) == 11 and national[0] == "1":
+            national = national[1:]
+        elif country_code != "1" and national.startswith("0"):
+            # Drop the national trunk prefix (e.g. 020 ... in the UK)
+            national = national[1:]
+
+    if not MIN_E164_DIGITS <= len(country_code) + len(national) <= MAX_E164_DIGITS:
+        return None
+    if not _valid_national(country_code, national):
+        return None
+    return "+" + country_code + national
+
+
+def normalize_many(values: Iterable[str],
+                   default_country: str = DEFAULT_COUNTRY_CODE) -> List[Optional[str]]:
+    """normalize() over a whole batch, with a per-call memo for repeated inputs"""
+    memo = {}
+    memo_get = memo.get
+    results = []
+    append = results.append
+    fast_match = NANP_FAST_PATTERN.match if default_country == "1" else None
+    missing = object()
+
+    for raw in values:
+        result = memo_get(raw, missing)
+        if result is missing:
+            match = fast_match(raw) if fast_match and raw else None
+            if match:
+                result = "+1" + match.group(1) + match.group(2) + match.group(3)
+            else:
+                result = normalize(raw, default_country)
+            memo[raw] = result
+        append(result)
+    return results
+
+
+def clean_phone(phone_number: str, default_country: str = DEFAULT_COUNTRY_CODE) -> str:
+    """Buddy handle for Messages: E.164 when possible, otherwise just the digits (and a leading +)
+
+    Emails (iMessage handles) and short codes can't be E.164 and pass through.
+    """
+    normalized = normalize(phone_number.strip(), default_country)
+    if normalized:
+        return normalized
+    if "@" in phone_number:
+        return phone_number.strip()
+    return NON_HANDLE_CHARACTERS.sub("", phone_number.strip())
+
+
+def find_numbers(text: str, default_country: str = DEFAULT_COUNTRY_CODE) -> List[str]:
+    """Every distinct phone number in text, normalized, in order of appearance"""
+    seen = set()
+    numbers = []
+    for candidate in PHONE_CANDIDATE_PATTERN.findall(text):
+        number = normalize(candidate.strip(), default_country)
+        if number and number not in seen:
+            seen.add(number)
+            numbers.append(number)
+    return numbers
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling for the app
+With --profile (or SPAM_PROFILE=1), the Tk handlers and the send pipeline run
+under cProfile and tracemalloc. On exit each handler gets a call-stats report
+(plus a .prof file for pstats/snakeviz) and the process an allocation top-N,
+written to profiles/<time>-<pid>/ in the cache folder (or the directory given
+as SPAM_PROFILE), so a slow click in the field can be diagnosed afterwards.
+
+Usage:
+  python3 run_app.py --profile [phone]
+  python3 quick_spam_response.py --profile
+  python3 -m pstats ~/Library/Caches/SpamResponseAssistant/profiles/<run>/ui.send_message.prof
+"""
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, Optional
+
+from app_paths import user_cache_dir
+
+# "1" to profile into the cache folder, or a directory for the reports
+PROFILE_ENV = "SPAM_PROFILE"
+
+# Tk handlers worth profiling (not ones that sit in a modal dialog), and the
+# SpamResponder calls behind them
+UI_HANDLERS = ("on_response_select", "send_message", "send_duck_image",
+               "paste_from_clipboard")
+PIPELINE_CALLS = ("send_text", "send_to_many", "send_duck_image")
+
+# Lines per report
+DEFAULT_TOP = 30
+
+# Stack depth tracemalloc records per allocation
+TRACE_FRAMES = 10
+
+
+def profile_dir() -> Optional[str]:
+    """Where reports go if profiling was asked for, else None"""
+    setting = os.environ.get(PROFILE_ENV, "")
+    if setting.lower() in ("", "0", "off", "no"):
+        return None
+    base = user_cache_dir("profiles") if setting.lower() in ("1", "on", "yes") else setting
+    path = os.path.join(base, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def enable_from_argv(argv: list) -> list:
+    """Turn --profile into SPAM_PROFILE=1 (inherited by launched apps); returns the other args"""
+    if "--profile" not in argv:
+        return argv
+    os.environ.setdefault(PROFILE_ENV, "1")
+    return [arg for arg in argv if arg != "--profile"]
+
+
+class HandlerStats:
+    """Calls, wall time and memory for one profiled handler"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.calls = 0
+        self.profiled = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.allocated = 0
+        self.peak = 0
+
+
+class Profiler:
+    """cProfile + tracemalloc sessions around wrapped callables
+
+    Only one cProfile session can run at a time, so a call that starts while
+    another is being profiled (a pipeline call inside a handler, or two worker
+    threads) is timed but runs inside the outer session rather than its own.
+    """
+
+    def __init__(self, output_dir: str, top: int = DEFAULT_TOP):
+        self.output_dir = output_dir
+        self.top = top
+        self.stats: Dict[str, HandlerStats] = {}
+        self._lock = threading.Lock()
+        self._session = threading.Lock()
+        self.started = time.time()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+
+    @classmethod
+    def from_env(cls) -> Optional["Profiler"]:
+        output_dir = profile_dir()
+        return cls(output_dir) if output_dir else None
+
+    def _handler(self, name: str) -> HandlerStats:
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = HandlerStats()
+            return stats
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """func, profiled under name"""
+        stats = self._handler(name)
+
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            own_session = self._session.acquire(blocking=False)
+            start = time.perf_counter()
+            if own_session:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                try:
+                    stats.profile.enable()
+                except ValueError:
+                    # Some other profiler or debugger owns the hooks
+                    self._session.release()
+                    own_session = False
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                if own_session:
+                    stats.profile.disable()
+                    current, peak = tracemalloc.get_traced_memory()
+                    self._session.release()
+                with self._lock:
+                    stats.calls += 1
+                    stats.total += elapsed
+                    stats.slowest = max(stats.slowest, elapsed)
+                    if own_session:
+                        stats.profiled += 1
+                        stats.allocated += current - before
+                        stats.peak = max(stats.peak, peak - before)
+
+        return profiled
+
+    def instrument(self, obj, names: Iterable[str], prefix: str):
+        """Replace obj's methods with profiled versions (before anything captures them)"""
+        for name in names:
+            setattr(obj, name, self.wrap(f"{prefix}.{name}", getattr(obj, name)))
+
+    def summary(self) -> str:
+        lines = [f"{'handler':<32} {'calls':>6} {'profiled':>8} {'total ms':>10} "
+                 f"{'max ms':>9} {'net KiB':>9} {'peak KiB':>9}"]
+        with self._lock:
+            for name, stats in sorted(self.stats.items()):
+                if not stats.calls:
+                    continue
+                lines.append(f"{name:<32} {stats.calls:>6} {stats.profiled:>8} "
+                             f"{stats.total * 1000:10.1f} {stats.slowest * 1000:9.1f} "
+                             f"{stats.allocated / 1024:9.1f} {stats.peak / 1024:9.1f}")
+        return "\n".join(lines)
+
+    def write(self) -> str:
+        """Write every report; returns the directory"""
+        # Snapshot first so the reports' own allocations don't show up in it
+        snapshot = None
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, module.__file__)
+                for module in (tracemalloc, cProfile, pstats)
+            ] + [tracemalloc.Filter(False, "<frozen importlib._bootstrap>")])
+            current, peak = tracemalloc.get_traced_memory()
+
+        for name, stats in self.stats.items():
+            if not stats.profiled:
+                continue
+            stats.profile.dump_stats(os.path.join(self.output_dir, f"{name}.prof"))
+            text = io.StringIO()
+            report = pstats.Stats(stats.profile, stream=text)
+            report.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+            with open(os.path.join(self.output_dir, f"{name}.txt"), 'w') as f:
+                f.write(text.getvalue())
+
+        with open(os.path.join(self.output_dir, "summary.txt"), 'w') as f:
+            f.write(f"Profiled for {time.time() - self.started:.0f}s\n\n{self.summary()}\n")
+
+        if snapshot is not None:
+            with open(os.path.join(self.output_dir, "allocations.txt"), 'w') as f:
+                f.write(f"Traced memory: {current / 1024:.0f} KiB now, {peak / 1024:.0f} KiB peak\n\n")
+                f.write(f"Top {self.top} allocation sites:\n")
+                for stat in snapshot.statistics('lineno')[:self.top]:
+                    f.write(f"{stat}\n")
+                f.write(f"\nTop {min(self.top, 10)} allocation stacks:\n")
+                for stat in snapshot.statistics('traceback')[:min(self.top, 10)]:
+                    f.write(f"\n{stat}\n")
+                    for line in stat.traceback.format():
+                        f.write(f"{line}\n")
+        return self.output_dir
+
+    def close(self) -> str:
+        """Write the reports and stop tracing"""
+        path = self.write()
+        tracemalloc.stop()
+        return path
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Type-ahead search over response templates
+An inverted index from name/message tokens to templates, with prefix matching
+(so every keystroke matches) and one-typo fuzzy matching ("quak" -> "quack").
+Adds, edits and deletes update only the affected template's postings.
+
+Common terms are also kept as bitmasks (Python ints, one bit per template),
+so a keystroke costs a handful of whole-library AND/ORs done in C rather
+than a Python loop over every matching template.
+"""
+
+import re
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Where a term occurs in a template (bit flags)
+IN_MESSAGE = 1
+IN_NAME = 2
+
+# Per query word: how well a template matched it. A template's score is the
+# sum over all query words, ties keep library order
+NAME_EXACT = 3
+NAME_PREFIX = 2
+MESSAGE_MATCH = 1
+FUZZY_MATCH = 0
+
+# Shortest query token that gets typo-tolerant matching
+MIN_FUZZY_LENGTH = 4
+
+# Query words beyond this are ignored
+MAX_QUERY_TOKENS = 8
+
+# Postings at least this long get a cached bitmask
+DENSE_POSTING = 256
+MASK_CACHE_SIZE = 512
+
+# Prefixes matching more terms than this (a first keystroke over a long-tail
+# vocabulary) get their combined bitmasks cached, so only the first such
+# query pays for the union; every matching term is still included
+PREFIX_CACHE_TERMS = 64
+PREFIX_CACHE_SIZE = 64
+
+# Terms in at least 1/COMMON_FRACTION of the library get their bitmasks
+# built up front and never evicted, so no keystroke pays to build one
+COMMON_FRACTION = 64
+
+DEFAULT_LIMIT = 500
+RESULT_CACHE_SIZE = 64
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _deletes(token: str) -> List[str]:
+    """Every string one deletion away from token"""
+    return [token[:i] + token[i + 1:] for i in range(len(token))]
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by one insert, delete, substitution or adjacent swap"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    i = 0
+    while i < min(la, lb) and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        return (a[i + 1:] == b[i + 1:] or
+                (i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]))
+    if la > lb:
+        return a[i + 1:] == b[i:]
+    return a[i:] == b[i + 1:]
+
+
+def _set_bits(mask: int, limit: int) -> List[int]:
+    """Positions of the lowest `limit` set bits of mask"""
+    bits = format(mask, 'b')[::-1]
+    positions = []
+    i = bits.find('1')
+    while i != -1 and len(positions) < limit:
+        positions.append(i)
+        i = bits.find('1', i + 1)
+    return positions
+
+
+class ResponseSearchIndex:
+    """Inverted index over templates addressed by their position in the library
+
+    Mirror the store: add() appends, edit()/delete() take the same index the
+    store was given. search() returns matching positions, best match first.
+    """
+
+    def __init__(self, responses: Iterable[Dict] = ()):
+        self._postings = {}       # token -> {doc id: IN_NAME | IN_MESSAGE}
+        self._vocabulary = []     # sorted tokens, for prefix ranges
+        self._deletes = {}        # one-deletion variant -> tokens, for fuzzy lookup
+        self._doc_terms = {}      # doc id -> tokens
+        self._masks = OrderedDict()   # (token, name only) -> bitmask of doc ids
+        self._prefix_masks = OrderedDict()   # prefix -> [name bitmask, any-field bitmask]
+        self._common_masks = {}       # same, for the most frequent terms
+        # Position -> doc id; ids only ever grow, so the array stays sorted
+        self._order = array('q')
+        self._next_id = 0
+        self._cache = OrderedDict()
+        self.rebuild(responses)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    # Maintenance
+
+    def rebuild(self, responses: Iterable[Dict]):
+        self._postings.clear()
+        self._vocabulary = []
+        self._deletes.clear()
+        self._doc_terms.clear()
+        self._masks.clear()
+        self._prefix_masks.clear()
+        self._common_masks.clear()
+        self._cache.clear()
+        self._order = array('q')
+        self._next_id = 0
+        for response in responses:
+            doc_id = self._next_doc_id()
+            self._order.append(doc_id)
+            self._index_doc(doc_id, response)
+        self._vocabulary = sorted(self._postings)
+        for token in self._vocabulary:
+            self._add_deletes(token)
+
+        threshold = max(DENSE_POSTING, len(self._order) // COMMON_FRACTION)
+        for token, posting in self._postings.items():
+            if len(posting) >= threshold:
+                for name_only in (False, True):
+                    self._common_masks[token, name_only] = self._build_mask(token, name_only)
+
+        # First keystrokes: one- and two-character prefixes over a long-tail vocabulary
+        for prefix in sorted({token[:n] for token in self._vocabulary for n in (1, 2)}):
+            start, end = self._prefix_range(prefix)
+            if end - start > PREFIX_CACHE_TERMS:
+                self._prefix_union(prefix, start, end)
+
+    def add(self, response: Dict) -> int:
+        """Index a template appended to the library; returns its position"""
+        doc_id = self._next_doc_id()
+        self._order.append(doc_id)
+        for token in self._index_doc(doc_id, response):
+            insort(self._vocabulary, token)
+            self._add_deletes(token)
+        self._cache.clear()
+        return len(self._order) - 1
+
+    def edit(self, index: int, response: Dict):
+        """Re-index the template at position index"""
+        doc_id = self._order[index]
+        self._unindex_doc(doc_id)
+        for token in self._index_doc(doc_id, response):
+            insort(self._vocabulary, token)
+            self._add_deletes(token)
+        self._cache.clear()
+
+    def delete(self, index: int):
+        """Drop the template at position index (later positions shift up)"""
+        doc_id = self._order[index]
+        self._unindex_doc(doc_id)
+        del self._order[index]
+        self._cache.clear()
+
+    def _next_doc_id(self) -> int:
+        doc_id = self._next_id
+        self._next_id += 1
+        return doc_id
+
+    def _index_doc(self, doc_id: int, response: Dict) -> List[str]:
+        """Add postings for one template; returns tokens new to the vocabulary"""
+        terms = {}
+        for token in tokenize(response.get('message', '')):
+            terms[token] = IN_MESSAGE
+        for token in tokenize(response.get('name', '')):
+            terms[token] = terms.get(token, 0) | IN_NAME
+        self._doc_terms[doc_id] = tuple(terms)
+
+        new_tokens = []
+        bit = 1 << doc_id if self._masks or self._common_masks else 0
+        for token, fields in terms.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                new_tokens.append(token)
+            posting[doc_id] = fields
+            for masks in (self._masks, self._common_masks):
+                if (token, False) in masks:
+                    masks[token, False] |= bit
+                if fields & IN_NAME and (token, True) in masks:
+                    masks[token, True] |= bit
+            for entry in self._cached_prefixes(token):
+                entry[1] |= 1 << doc_id
+                if fields & IN_NAME:
+                    entry[0] |= 1 << doc_id
+        return new_tokens
+
+    def _unindex_doc(self, doc_id: int):
+        clear = ~(1 << doc_id)
+        for token in self._doc_terms.pop(doc_id, ()):
+            for entry in self._cached_prefixes(token):
+                entry[0] &= clear
+                entry[1] &= clear
+            posting = self._postings[token]
+            del posting[doc_id]
+            for masks in (self._masks, self._common_masks):
+                for key in ((token, False), (token, True)):
+                    if key in masks:
+                        if posting:
+                            masks[key] &= clear
+                        else:
+                            del masks[key]
+            if not posting:
+                del self._postings[token]
+                i = bisect_left(self._vocabulary, token)
+                del self._vocabulary[i]
+                self._remove_deletes(token)
+
+    def _add_deletes(self, token: str):
+        if len(token) < MIN_FUZZY_LENGTH - 1:
+            return
+        for variant in _deletes(token) + [token]:
+            self._deletes.setdefault(variant, set()).add(token)
+
+    def _remove_deletes(self, token: str):
+        if len(token) < MIN_FUZZY_LENGTH - 1:
+            return
+        for variant in _deletes(token) + [token]:
+            tokens = self._deletes.get(variant)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._deletes[variant]
+
+    # Bitmasks
+
+    def _build_mask(self, token: str, name_only: bool) -> int:
+        bits = bytearray((self._next_id >> 3) + 1)
+        for doc_id, fields in self._postings[token].items():
+            if not name_only or fields & IN_NAME:
+                bits[doc_id >> 3] |= 1 << (doc_id & 7)
+        return int.from_bytes(bits, 'little')
+
+    def _cached_prefixes(self, token: str) -> List[List[int]]:
+        """Cached prefix bitmasks that token falls under"""
+        if not self._prefix_masks:
+            return []
+        lengths = {len(prefix) for prefix in self._prefix_masks}
+        return [entry for entry in (self._prefix_masks.get(token[:n]) for n in lengths if n <= len(token))
+                if entry is not None]
+
+    def _prefix_union(self, prefix: str, start: int, end: int) -> List[int]:
+        """[name bitmask, any-field bitmask] of templates with a term in vocabulary[start:end]"""
+        entry = self._prefix_masks.get(prefix)
+        if entry is not None:
+            self._prefix_masks.move_to_end(prefix)
+            return entry
+        entry = self._narrowed(prefix, end - start)
+        if entry is not None:
+            return self._remember_prefix(prefix, entry)
+        name_bits = bytearray((self._next_id >> 3) + 1)
+        any_bits = bytearray(len(name_bits))
+        name_mask = any_mask = 0
+        for term in self._vocabulary[start:end]:
+            posting = self._postings[term]
+            if len(posting) >= DENSE_POSTING:
+                name_mask |= self._dense_mask(term, True)
+                any_mask |= self._dense_mask(term, False)
+                continue
+            for doc_id, fields in posting.items():
+                byte, bit = doc_id >> 3, 1 << (doc_id & 7)
+                any_bits[byte] |= bit
+                if fields & IN_NAME:
+                    name_bits[byte] |= bit
+        return self._remember_prefix(prefix, [name_mask | int.from_bytes(name_bits, 'little'),
+                                              any_mask | int.from_bytes(any_bits, 'little')])
+
+    def _narrowed(self, prefix: str, count: int) -> Optional[List[int]]:
+        """Copy of a cached shorter prefix's bitmasks if it matches the very same terms
+        ("du" -> "duc" -> "duck" over duck1, duck2, ...)"""
+        for n in range(len(prefix) - 1, 0, -1):
+            entry = self._prefix_masks.get(prefix[:n])
+            if entry is None:
+                continue
+            start, end = self._prefix_range(prefix[:n])
+            return list(entry) if end - start == count else None
+        return None
+
+    def _remember_prefix(self, prefix: str, entry: List[int]) -> List[int]:
+        self._prefix_masks[prefix] = entry
+        if len(self._prefix_masks) > PREFIX_CACHE_SIZE:
+            self._prefix_masks.popitem(last=False)
+        return entry
+
+    def _dense_mask(self, token: str, name_only: bool) -> int:
+        """Cached bitmask of a long posting, kept up to date by add/edit/delete"""
+        key = (token, name_only)
+        mask = self._common_masks.get(key)
+        if mask is not None:
+            return mask
+        mask = self._masks.get(key)
+        if mask is not None:
+            self._masks.move_to_end(key)
+            return mask
+        mask = self._masks[key] = self._build_mask(token, name_only)
+        if len(self._masks) > MASK_CACHE_SIZE:
+            self._masks.popitem(last=False)
+        return mask
+
+    def _union(self, terms: Iterable[str], name_only: bool = False) -> int:
+        """Bitmask of templates containing any of terms (in the name if name_only)"""
+        mask = 0
+        bits = None
+        for term in terms:
+            posting = self._postings[term]
+            if len(posting) >= DENSE_POSTING:
+                mask |= self._dense_mask(term, name_only)
+                continue
+            if bits is None:
+                bits = bytearray((self._next_id >> 3) + 1)
+            for doc_id, fields in posting.items():
+                if not name_only or fields & IN_NAME:
+                    bits[doc_id >> 3] |= 1 << (doc_id & 7)
+        if bits is not None:
+            mask |= int.from_bytes(bits, 'little')
+        return mask
+
+    # Querying
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Vocabulary slice of every term starting with prefix (itself included)"""
+        start = bisect_left(self._vocabulary, prefix)
+        return start, bisect_left(self._vocabulary, prefix + '\U0010ffff', start)
+
+    def _expand(self, query_token: str) -> Tuple[List[str], Tuple[int, int], List[str]]:
+        """Vocabulary terms matching one query token: (exact, prefix range, fuzzy)"""
+        exact = [query_token] if query_token in self._postings else []
+
+        fuzzy = []
+        if len(query_token) >= MIN_FUZZY_LENGTH:
+            candidates = set()
+            for variant in _deletes(query_token) + [query_token]:
+                candidates.update(self._deletes.get(variant, ()))
+            # Terms starting with the token already match as prefixes
+            fuzzy = [term for term in candidates
+                     if not term.startswith(query_token)
+                     and _within_one_edit(query_token, term)]
+        return exact, self._prefix_range(query_token), fuzzy
+
+    def _levels(self, query_token: str) -> List[int]:
+        """Disjoint bitmasks of templates matching query_token, indexed by match level"""
+        exact, (start, end), fuzzy = self._expand(query_token)
+        name_exact = self._union(exact, name_only=True)
+        # Every term in the range, however many, so no template is ever missed;
+        # the range includes the exact term, which the levels below account for
+        if end - start > PREFIX_CACHE_TERMS:
+            prefix_name, prefix_any = self._prefix_union(query_token, start, end)
+        else:
+            prefix = self._vocabulary[start:end]
+            prefix_name, prefix_any = self._union(prefix, name_only=True), self._union(prefix)
+        name_prefix = prefix_name & ~name_exact
+        in_name = name_exact | name_prefix
+        message = prefix_any & ~in_name
+        fuzzy_only = self._union(fuzzy) & ~(in_name | message)
+        levels = [0] * (NAME_EXACT + 1)
+        levels[NAME_EXACT] = name_exact
+        levels[NAME_PREFIX] = name_prefix
+        levels[MESSAGE_MATCH] = message
+        levels[FUZZY_MATCH] = fuzzy_only
+        return levels
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[int]:
+        """Positions of templates matching every word of query, best first"""
+        tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TOKENS]
+        if not tokens:
+            return []
+        key = (tuple(tokens), limit)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        # by_score[s] = templates whose levels over the words so far sum to s
+        # (-1 has every bit set: before the first word, everything matches)
+        by_score = [-1]
+        for token in tokens:
+            levels = self._levels(token)
+            combined = [0] * (len(by_score) + NAME_EXACT)
+            for score, mask in enumerate(by_score):
+                if not mask:
+                    continue
+                for level, level_mask in enumerate(levels):
+                    if level_mask:
+                        combined[score + level] |= mask & level_mask
+            by_score = combined
+            if not any(by_score):
+                return self._remember(key, [])
+
+        doc_ids = []
+        for mask in reversed(by_score):
+            if mask:
+                doc_ids.extend(_set_bits(mask, limit - len(doc_ids)))
+                if len(doc_ids) >= limit:
+                    break
+        order = self._order
+        return self._remember(key, [bisect_left(order, doc_id) for doc_id in doc_ids])
+
+    def _remember(self, key, positions: List[int]) -> List[int]:
+        self._cache[key] = positions
+        if len(self._cache) > RESULT_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return positions
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Journaled response template store
+Each add/edit/delete appends one record to spam_responses.json.journal instead
+of rewriting the whole library; a background compaction folds the journal
+back into the spam_responses.json snapshot. Startup replays snapshot + journal.
+
+The snapshot stays the plain JSON list older versions wrote. Every journal
+starts with the SHA-256 of the snapshot it applies to, so after a crash
+mid-compaction a journal that was already folded in is never replayed twice.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import metrics
+
+JOURNAL_SUFFIX = ".journal"
+COMPACTING_SUFFIX = ".journal.compacting"
+
+# Journal records before a background compaction is started
+DEFAULT_COMPACT_AFTER = 200
+
+
+def _serialize(responses: List[Dict]) -> bytes:
+    """Snapshot bytes - the same layout save_responses always wrote"""
+    return json.dumps(responses, indent=2).encode('utf-8')
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class JournaledResponseStore:
+    """List-like response library persisted as snapshot + append-only journal"""
+
+    def __init__(self, path: str, defaults: Optional[List[Dict]] = None,
+                 compact_after: int = DEFAULT_COMPACT_AFTER):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.compacting_path = path + COMPACTING_SUFFIX
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        self._journal = None
+        self._journal_records = 0
+        self._compaction = None
+        with metrics.timer("responses.load"):
+            self._responses = self._load(defaults or [])
+
+    # Sequence interface, so callers can keep treating the store like the old list
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def __getitem__(self, index: int) -> Dict:
+        return self._responses[index]
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(list(self._responses))
+
+    def get(self, index: int) -> Dict:
+        return self._responses[index]
+
+    # Loading and replay
+
+    def _load(self, defaults: List[Dict]) -> List[Dict]:
+        responses = None
+        exists = os.path.exists(self.path)
+        if exists:
+            try:
+                with open(self.path, 'rb') as f:
+                    responses = json.loads(f.read().decode('utf-8'))
+            except (ValueError, OSError):
+                responses = None
+
+        rewrite = False
+        if not isinstance(responses, list):
+            if exists:
+                # Never write the defaults over a library someone can still fix by hand
+                kept = self._set_aside(self.path, "corrupt")
+                print(f"Could not read {self.path}; moved it to {kept} and started from the defaults")
+            # First run: write the defaults out so journals always have a snapshot to apply to
+            responses = [dict(r) for r in defaults]
+            rewrite = True
+
+        replayed = []
+        for journal_path in (self.compacting_path, self.journal_path):
+            if os.path.exists(journal_path):
+                applied = self._replay(journal_path, responses)
+                if applied is None:
+                    kept = self._set_aside(journal_path, "unreplayed")
+                    print(f"{journal_path} doesn't apply to {self.path}; kept it as {kept}")
+                    continue
+                replayed.append(journal_path)
+                # A journal with only its base line (what close() leaves) changes nothing
+                rewrite = rewrite or applied > 0
+
+        data = _serialize(responses)
+        if rewrite:
+            # Fold replayed changes in before the old journals go away
+            self._write_snapshot(data)
+        for journal_path in replayed:
+            os.unlink(journal_path)
+
+        self._open_journal(_digest(data))
+        return responses
+
+    @staticmethod
+    def _set_aside(path: str, reason: str) -> str:
+        """Rename path out of the way (keeping it) and return the new name"""
+        kept = f"{path}.{reason}-{time.strftime('%Y%m%d-%H%M%S')}"
+        os.replace(path, kept)
+        return kept
+
+    def _replay(self, journal_path: str, responses: List[Dict]) -> Optional[int]:
+        """Apply a journal to responses; returns the records applied, or None if
+        it isn't based on them and was left alone"""
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            lines = f.read().split('\n')
+
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A torn final write from a crash; everything before it is good
+                break
+
+        if not records:
+            return 0
+        if records[0].get('op') != 'base' or records[0].get('sha256') != _digest(_serialize(responses)):
+            # Based on another snapshot (or already folded into this one by an
+            # interrupted compaction) - keep it rather than guess
+            return None
+
+        for record in records[1:]:
+            self._apply(responses, record)
+        return len(records) - 1
+
+    @staticmethod
+    def _apply(responses: List[Dict], record: Dict):
+        op = record.get('op')
+        if op == 'add':
+            responses.append({"name": record['name'], "message": record['message']})
+        elif op == 'edit' and 0 <= record['index'] < len(responses):
+            responses[record['index']] = {"name": record['name'], "message": record['message']}
+        elif op == 'delete' and 0 <= record['index'] < len(responses):
+            del responses[record['index']]
+
+    # Writing
+
+    def _open_journal(self, base_sha256: str):
+        """Start a fresh journal on top of the snapshot with the given digest"""
+        base = {"op": "base", "sha256": base_sha256}
+        self._journal = open(self.journal_path, 'w', encoding='utf-8')
+        self._journal.write(json.dumps(base) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_records = 0
+
+    def _append(self, record: Dict):
+        """Durably append one record - O(size of the change), not O(library)"""
+        self._journal.write(json.dumps(record) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_records += 1
+
+    def _maybe_compact(self):
+        """Start a background compaction once the journal has grown long enough"""
+        if self._journal_records >= self.compact_after:
+            self.compact(wait=False)
+
+    def add(self, name: str, message: str) -> int:
+        """Append a template; returns its index"""
+        with metrics.timer("responses.add"), self._lock:
+            self._append({"op": "add", "name": name, "message": message})
+            self._responses.append({"name": name, "message": message})
+            self._maybe_compact()
+            return len(self._responses) - 1
+
+    def edit(self, index: int, name: str, message: str):
+        """Replace the template at index"""
+        with metrics.timer("responses.edit"), self._lock:
+            if not 0 <= index < len(self._responses):
+                raise IndexError(index)
+            self._append({"op": "edit", "index": index, "name": name, "message": message})
+            self._responses[index] = {"name": name, "message": message}
+            self._maybe_compact()
+
+    def delete(self, index: int) -> Dict:
+        """Remove and return the template at index"""
+        with metrics.timer("responses.delete"), self._lock:
+            if not 0 <= index < len(self._responses):
+                raise IndexError(index)
+            self._append({"op": "delete", "index": index})
+            response = self._responses.pop(index)
+            self._maybe_compact()
+            return response
+
+    # Compaction
+
+    def _write_snapshot(self, data: bytes):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                # mkstemp files are private (0600); keep the library's permissions
+                os.fchmod(f.fileno(), self._snapshot_mode())
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _snapshot_mode(self) -> int:
+        """The existing snapshot's mode, or what open() would give a new file"""
+        try:
+            return os.stat(self.path).st_mode & 0o7777
+        except OSError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    def compact(self, wait: bool = True):
+        """Fold the journal into a new snapshot (in the background unless wait)"""
+        with self._lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                if wait:
+                    self._compaction.join()
+                return
+            if self._journal_records == 0 and not os.path.exists(self.compacting_path):
+                return
+
+            # Rotate under the lock: new mutations go to a fresh journal based
+            # on exactly the state the snapshot is about to contain
+            data = _serialize(self._responses)
+            self._journal.close()
+            if os.path.exists(self.compacting_path):
+                # An earlier compaction failed: its journal is the only link from
+                # the snapshot on disk, so extend it instead of replacing it
+                self._extend_compacting()
+            else:
+                os.replace(self.journal_path, self.compacting_path)
+            self._open_journal(_digest(data))
+
+            self._compaction = threading.Thread(target=self._finish_compaction, args=(data,),
+                                                name="response-compaction", daemon=True)
+            self._compaction.start()
+        if wait:
+            self._compaction.join()
+
+    def _extend_compacting(self):
+        """Append the journal's records (not its base) to the leftover compacting journal"""
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            records = [line for line in f.read().split('\n') if line.strip()][1:]
+        if not records:
+            return
+        with open(self.compacting_path, 'a', encoding='utf-8') as f:
+            f.write("\n".join(records) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _finish_compaction(self, data: bytes):
+        try:
+            with metrics.timer("responses.compact"):
+                self._write_snapshot(data)
+            os.unlink(self.compacting_path)
+        except OSError as e:
+            # The journals are still intact; the next compaction retries
+            print(f"Response compaction failed: {e}")
+
+    def close(self):
+        """Compact outstanding changes and close the journal"""
+        self.compact(wait=True)
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+def open_response_store(path: str, defaults: Optional[List[Dict]] = None):
+    """Open the library at path: SQLite for .db/.sqlite files, journaled JSON otherwise"""
+    from sqlite_response_store import SQLiteResponseStore, is_sqlite_path
+
+    if is_sqlite_path(path):
+        return SQLiteResponseStore(path, defaults=defaults)
+    return JournaledResponseStore(path, defaults=defaults)
@@ -1,18 +1,58 @@
 #!/usr/bin/env python3
 """
 Startup script for Spam Response App
-Simple launcher with error handling
+Simple launcher with error handling. Only one app runs at a time: launching
+again (optionally with a phone number) brings the running window forward.
+
+Usage: python3 run_app.py [--profile] [phone]
+  --profile    profile handlers and sends, reports written on exit (profiling.py)
 """
 
+import json
 import sys
 import os
 
+def parse_request(argv):
+    """What to show: --request '<json>' (from app_instance.launch) or a phone number"""
+    if len(argv) >= 2 and argv[0] == '--request':
+        return json.loads(argv[1])
+    phone = " ".join(argv).strip()
+    if phone:
+        return {"phone": phone, "status": f"📱 Phone number: {phone}"}
+    return {}
+
 def main():
     """Launch the spam response application"""
+    from app_instance import InstanceServer, hand_over, wait_and_hand_over
+    from profiling import PROFILE_ENV, Profiler, enable_from_argv
+    
+    request = parse_request(enable_from_argv(sys.argv[1:]))
+    
+    # Already running: hand over and let that window come forward
+    if hand_over(request):
+        print("🦆 Spam Response Assistant is already running - brought it to the front")
+        if os.environ.get(PROFILE_ENV):
+            print("⚠️  Not profiling - quit the running app first to start it with --profile")
+        return
+    
+    server = InstanceServer()
+    if not server.acquire():
+        # Another launch is starting the app right now
+        if wait_and_hand_over(request):
+            return
+        print("❌ Error: another Spam Response Assistant is running but not responding")
+        sys.exit(1)
+    
+    profiler = Profiler.from_env()
     try:
+        server.start()
         from main import SpamResponseApp
         print("🚀 Starting Spam Response Assistant...")
-        app = SpamResponseApp()
+        if profiler:
+            print(f"⏱️  Profiling - reports go to {profiler.output_dir} when you quit the app")
+        app = SpamResponseApp(instance_server=server, profiler=profiler)
+        if request:
+            app.show_request(request)
         app.run()
     except ImportError as e:
         print(f"❌ Error: Missing dependencies - {e}")
@@ -24,10 +64,14 @@ def main():
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
         sys.exit(1)
+    finally:
+        server.close()
+        if profiler:
+            print(f"⏱️  Profile reports written to {profiler.close()}")
 
 if __name__ == "__main__":
     # Change to script directory
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
     
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Send pacing for Messages
+Every send waits here for a token from a global bucket and from its
+recipient's own bucket, so bursts go out no faster than Messages tolerates.
+Waiting sends are served round-robin, one message each in turn: a batch
+chunk of 20 numbers, or a loop of texts to one number, can't hold up a
+one-off reply queued behind it.
+
+Limits are "messages per minute/burst", e.g. "60/20"; "off" disables a limit.
+"""
+
+import collections
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Overrides for the default limits, in parse_limit() format
+SEND_RATE_ENV = "SPAM_SEND_RATE"
+RECIPIENT_RATE_ENV = "SPAM_RECIPIENT_RATE"
+
+# Messages per minute and burst size, for all sends and for each recipient
+DEFAULT_SEND_RATE = (60.0, 20)
+DEFAULT_RECIPIENT_RATE = (10.0, 5)
+
+# Longest a waiting send sleeps before re-checking for cancellation
+CANCEL_CHECK_INTERVAL = 0.25
+
+# Idle recipient buckets are forgotten once there are this many
+MAX_RECIPIENT_BUCKETS = 4096
+
+# Recent per-message waits kept for the percentiles in stats()
+WAIT_SAMPLES = 1000
+
+Limit = Optional[Tuple[float, int]]
+
+
+def parse_limit(text: str) -> Limit:
+    """"60/20" -> (60.0 per minute, burst 20); "60" -> burst 1; "off"/"0" -> None"""
+    text = text.strip().lower()
+    if text in ("", "off", "none", "0"):
+        return None
+    per_minute, _, burst = text.partition("/")
+    try:
+        per_minute = float(per_minute)
+        burst = int(burst) if burst else 1
+    except ValueError:
+        raise ValueError(f"Invalid rate limit '{text}' (expected messages per minute[/burst])")
+    if per_minute <= 0 or burst < 1:
+        return None
+    return per_minute, burst
+
+
+def limit_from_env(name: str, default: Limit) -> Limit:
+    value = os.environ.get(name)
+    return default if value is None else parse_limit(value)
+
+
+def format_limit(limit: Limit) -> str:
+    if limit is None:
+        return "off"
+    per_minute, burst = limit
+    return f"{per_minute:g}/{burst}"
+
+
+class TokenBucket:
+    """Holds up to burst tokens, refilled at rate tokens per second"""
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def available(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= 1.0
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1.0
+
+    def refund(self, now: float):
+        self._refill(now)
+        self.tokens = min(self.burst, self.tokens + 1.0)
+
+    def time_until_available(self, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class _Ticket:
+    """One message waiting for permission to send"""
+
+    __slots__ = ("phone", "enqueued", "granted")
+
+    def __init__(self, phone: str, enqueued: float):
+        self.phone = phone
+        self.enqueued = enqueued
+        self.granted = False
+
+
+class SendScheduler:
+    """Global and per-recipient token buckets with fair ordering across recipients
+
+    Threads sending messages call acquire() with the recipients they are
+    about to send to; it returns once every one of them has been granted a
+    token. A recipient whose own bucket is empty is skipped without holding
+    up the others. Whichever waiting thread wakes first hands out tokens to all
+    waiters, so there is no scheduler thread to start or stop.
+    """
+
+    def __init__(self, send_rate: Limit = DEFAULT_SEND_RATE,
+                 recipient_rate: Limit = DEFAULT_RECIPIENT_RATE,
+                 clock: Callable[[], float] = time.monotonic):
+        self.send_rate = send_rate
+        self.recipient_rate = recipient_rate
+        self._clock = clock
+        self._condition = threading.Condition()
+        now = clock()
+        self._global = TokenBucket(send_rate[0] / 60.0, send_rate[1], now) if send_rate else None
+        self._recipients = {}
+        # Requests still waiting for tokens (each a deque of tickets), in turn order
+        self._ring = collections.deque()
+        self._queued = 0
+        self._max_queued = 0
+        self._granted = 0
+        self._cancelled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._waits = collections.deque(maxlen=WAIT_SAMPLES)
+
+    @classmethod
+    def from_env(cls) -> "SendScheduler":
+        """Scheduler with the default limits, unless overridden in the environment"""
+        return cls(limit_from_env(SEND_RATE_ENV, DEFAULT_SEND_RATE),
+                   limit_from_env(RECIPIENT_RATE_ENV, DEFAULT_RECIPIENT_RATE))
+
+    @property
+    def max_batch(self) -> Optional[int]:
+        """Most messages one osascript call should carry (a full global burst)"""
+        return self.send_rate[1] if self.send_rate else None
+
+    def acquire(self, phones: Iterable[str],
+                is_cancelled: Optional[Callable[[], bool]] = None,
+                timeout: Optional[float] = None) -> bool:
+        """Wait until each of phones (one entry per message) may be sent to
+
+        Returns False, without using up any tokens, if is_cancelled() turns
+        True or timeout seconds pass first.
+        """
+        with self._condition:
+            now = self._clock()
+            tickets = [_Ticket(phone, now) for phone in phones]
+            if not tickets:
+                return True
+            waiting = collections.deque(tickets)
+            self._ring.append(waiting)
+            self._queued += len(tickets)
+            self._max_queued = max(self._max_queued, self._queued)
+
+            deadline = None if timeout is None else now + timeout
+            while True:
+                wait = self._grant(now)
+                if not waiting:
+                    return True
+                if (is_cancelled and is_cancelled()) or (deadline is not None and now >= deadline):
+                    self._withdraw(waiting, tickets, now)
+                    return False
+                if is_cancelled:
+                    wait = min(wait, CANCEL_CHECK_INTERVAL)
+                if deadline is not None:
+                    wait = min(wait, deadline - now)
+                self._condition.wait(None if math.isinf(wait) else wait)
+                now = self._clock()
+
+    def _recipient_bucket(self, phone: str, now: float) -> Optional[TokenBucket]:
+        if self.recipient_rate is None:
+            return None
+        bucket = self._recipients.get(phone)
+        if bucket is None:
+            if len(self._recipients) >= MAX_RECIPIENT_BUCKETS:
+                # A full bucket is the same as a new one, so it can be dropped
+                for idle in [p for p, b in self._recipients.items() if b.full(now)]:
+                    del self._recipients[idle]
+            rate, burst = self.recipient_rate
+            bucket = self._recipients[phone] = TokenBucket(rate / 60.0, burst, now)
+        return bucket
+
+    def _ready_ticket(self, waiting, now: float) -> Optional[_Ticket]:
+        """First ticket of a request whose recipient has a token to spare"""
+        if self.recipient_rate is None:
+            return waiting[0]
+        for ticket in waiting:
+            if self._recipient_bucket(ticket.phone, now).available(now):
+                return ticket
+        return None
+
+    def _grant(self, now: float) -> float:
+        """Hand out every token available now; seconds until the next could be"""
+        granted = False
+        skipped = 0
+        # Serve waiting requests one message each in turn, until every one of
+        # them was passed over in a row
+        while self._ring and skipped < len(self._ring):
+            if self._global is not None and not self._global.available(now):
+                break
+            waiting = self._ring.popleft()
+            ticket = self._ready_ticket(waiting, now)
+            if ticket is None:
+                self._ring.append(waiting)
+                skipped += 1
+                continue
+
+            if self._global is not None:
+                self._global.take(now)
+            if self.recipient_rate is not None:
+                self._recipient_bucket(ticket.phone, now).take(now)
+            waiting.remove(ticket)
+            ticket.granted = True
+            self._record_wait(now - ticket.enqueued)
+            granted = True
+            skipped = 0
+            if waiting:
+                self._ring.append(waiting)
+
+        if granted:
+            self._condition.notify_all()
+        if not self._ring:
+            return math.inf
+        recipient_wait = 0.0
+        if self.recipient_rate is not None:
+            recipient_wait = min(self._recipient_bucket(ticket.phone, now).time_until_available(now)
+                                 for waiting in self._ring for ticket in waiting)
+        global_wait = self._global.time_until_available(now) if self._global is not None else 0.0
+        return max(global_wait, recipient_wait)
+
+    def _withdraw(self, waiting, tickets: List[_Ticket], now: float):
+        """Drop a cancelled request and give back the tokens it was granted"""
+        self._ring.remove(waiting)
+        self._queued -= len(waiting)
+        for ticket in tickets:
+            if ticket.granted:
+                if self._global is not None:
+                    self._global.refund(now)
+                bucket = self._recipients.get(ticket.phone)
+                if bucket is not None:
+                    bucket.refund(now)
+                self._granted -= 1
+        self._cancelled += len(tickets)
+        self._condition.notify_all()
+
+    def _record_wait(self, wait: float):
+        self._queued -= 1
+        self._granted += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        self._waits.append(wait)
+
+    def queue_depth(self) -> int:
+        """Messages currently waiting for a token"""
+        with self._condition:
+            return self._queued
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth and per-message waits (seconds) since the scheduler was created"""
+        with self._condition:
+            waits = sorted(self._waits)
+            stats = {
+                "queued": self._queued,
+                "max_queued": self._max_queued,
+                "granted": self._granted,
+                "cancelled": self._cancelled,
+                "wait_avg": self._wait_total / self._granted if self._granted else 0.0,
+                "wait_max": self._wait_max,
+            }
+        for name, fraction in (("wait_p50", 0.50), ("wait_p95", 0.95)):
+            stats[name] = waits[min(len(waits) - 1, int(len(waits) * fraction))] if waits else 0.0
+        return stats
+
+    def describe(self) -> str:
+        """One-line summary for status bars and logs"""
+        stats = self.stats()
+        return (f"{stats['granted']} paced, {stats['queued']} waiting, "
+                f"wait p50 {stats['wait_p50']:.1f}s / p95 {stats['wait_p95']:.1f}s / "
+                f"max {stats['wait_max']:.1f}s "
+                f"(limits {format_limit(self.send_rate)} overall, "
+                f"{format_limit(self.recipient_rate)} per number, per minute/burst)")
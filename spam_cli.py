@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Spam Response command line
+Sends responses without the window, for cron jobs and scripts. Recipients come
+from a CSV/text file or stdin; extra CSV columns fill template placeholders
+(a "candidate_name" column fills [CANDIDATE NAME]).
+
+Usage:
+  python3 spam_cli.py send --template "Polite Decline" [--recipients numbers.csv]
+                           [--concurrency 4] [--chunk-size 25] [--dry-run]
+  python3 spam_cli.py duck PHONE [PHONE ...]
+  python3 spam_cli.py templates [--search WORDS]
+  python3 spam_cli.py test
+  python3 spam_cli.py --metrics duck PHONE     (stage timings printed at the end)
+"""
+
+import argparse
+import csv
+import sys
+from typing import Dict, Iterable, Iterator, TextIO, Tuple
+
+import metrics
+from batch_send import DEFAULT_CHUNK_SIZE
+from messages_bridge import MessagesBridgeError
+from phone_numbers import clean_phone, normalize
+from send_scheduler import (DEFAULT_RECIPIENT_RATE, DEFAULT_SEND_RATE, RECIPIENT_RATE_ENV,
+                            SEND_RATE_ENV, SendScheduler, format_limit, parse_limit)
+from spam_core import SpamResponder
+from templates import render, template_variables, variable_name
+
+# Header cells (after placeholder aliasing, so "number" and "sender" count) that
+# name the recipient column
+PHONE_HEADERS = ("phone", "mobile", "cell", "to")
+
+
+def looks_like_recipient(cell: str) -> bool:
+    # Unusual numbers still have most of a phone number's digits; emails
+    # (iMessage handles) and short codes are recipients too
+    if "@" in cell or cell.lstrip("+").isdigit():
+        return True
+    return bool(normalize(cell)) or sum(ch.isdigit() for ch in cell) >= 7
+
+
+def read_recipients(stream: TextIO) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """(phone, per-recipient variables) for each row of a CSV or one-number-per-line stream
+
+    A first row with no recipient (number, email or short code) in it is a header: its phone/number column
+    holds the recipient and the other columns become template variables.
+    """
+    reader = csv.reader(stream)
+    header = None
+    phone_column = 0
+    first = True
+    for row in reader:
+        cells = [cell.strip() for cell in row]
+        if not any(cells):
+            continue
+        # Only the first row can be a header; later ones (emails, short codes) are recipients
+        if first and not any(looks_like_recipient(cell) for cell in cells):
+            first = False
+            header = [variable_name(cell) for cell in cells]
+            phone_column = next((i for i, name in enumerate(header) if name in PHONE_HEADERS), 0)
+            continue
+        first = False
+        if phone_column >= len(cells) or not cells[phone_column]:
+            continue
+        variables = {}
+        if header:
+            variables = {name: value for name, value in zip(header, cells)
+                         if value and name != header[phone_column]}
+        yield cells[phone_column], variables
+
+
+def open_recipients(path: str) -> TextIO:
+    if path == "-":
+        return sys.stdin
+    return open(path, 'r', encoding='utf-8', errors='replace', newline='')
+
+
+def send_command(core: SpamResponder, args) -> int:
+    template = None
+    if args.message:
+        message = args.message
+    else:
+        index = core.find_template(args.template)
+        if index is None:
+            print(f"❌ No template matching '{args.template}' (see: spam_cli.py templates)",
+                  file=sys.stderr)
+            return 2
+        message = core.responses[index]['message']
+        template = core.responses[index]['name']
+
+    spam_text = ""
+    if args.spam_text:
+        with open(args.spam_text, 'r', encoding='utf-8', errors='replace') as f:
+            spam_text = f.read()
+    base = template_variables(spam_text=spam_text)
+
+    stream = open_recipients(args.recipients)
+    try:
+        recipients = list(read_recipients(stream))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    if not recipients:
+        print("❌ No recipients given", file=sys.stderr)
+        return 2
+
+    # Recipients sharing the same extra columns go out as one batch
+    groups = {}
+    for phone, variables in recipients:
+        key = tuple(sorted(variables.items()))
+        groups.setdefault(key, []).append(phone)
+
+    failed = 0
+    total = 0
+    for key, phones in groups.items():
+        variables = dict(base, **dict(key))
+        if args.dry_run:
+            for phone in phones:
+                phone = clean_phone(phone)
+                print(f"DRY {phone}\t{render(message, dict(variables, phone=phone))}")
+            total += len(phones)
+            continue
+        results = core.send_to_many(phones, message, variables=variables, template=template,
+                                    chunk_size=args.chunk_size, concurrency=args.concurrency)
+        for result in results:
+            total += 1
+            if result.ok:
+                print(f"OK {result.phone}")
+            else:
+                failed += 1
+                print(f"ERR {result.phone}\t{result.error}")
+        sys.stdout.flush()
+
+    if args.dry_run:
+        print(f"🦆 {total} messages rendered (dry run, nothing sent)", file=sys.stderr)
+    else:
+        print(f"🦆 {total - failed} sent, {failed} failed", file=sys.stderr)
+        print(f"⏱️  {core.scheduler.describe()}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def duck_command(core: SpamResponder, args) -> int:
+    # No background scanner in a one-off command: bring the duck folder's index
+    # up to date before picking from it
+    if core.duck_corpus is not None:
+        core.duck_corpus.scan()
+    failed = 0
+    for phone in args.phones:
+        try:
+            core.send_duck_image(phone)
+            print(f"OK {phone}")
+        except MessagesBridgeError as e:
+            failed += 1
+            print(f"ERR {phone}\t{e}")
+    return 1 if failed else 0
+
+
+def templates_command(core: SpamResponder, args) -> int:
+    responses = core.responses
+    if args.search:
+        from response_search import ResponseSearchIndex
+
+        indices = ResponseSearchIndex(responses).search(args.search)
+    else:
+        indices = range(len(responses))
+    for index in indices:
+        print(f"{index}\t{responses[index]['name']}")
+    return 0
+
+
+def test_command(core: SpamResponder, args) -> int:
+    try:
+        core.ping()
+    except MessagesBridgeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print("✅ Messages app is accessible")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Send spam responses without the app window")
+    parser.add_argument("--responses", help="template library (default: $SPAM_RESPONSES_FILE "
+                                            "or spam_responses.json next to the app)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="print how long each stage took when done")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    send = commands.add_parser("send", help="send a template to many recipients")
+    which = send.add_mutually_exclusive_group(required=True)
+    which.add_argument("--template", "-t", help="template name (or part of it) or index")
+    which.add_argument("--message", "-m", help="literal message (placeholders allowed)")
+    send.add_argument("--recipients", "-r", default="-",
+                      help="CSV or one-number-per-line file, '-' for stdin (default)")
+    send.add_argument("--spam-text", help="file with the spam being answered, for [CANDIDATE NAME]")
+    send.add_argument("--concurrency", "-j", type=int, default=1,
+                      help="osascript calls to run at once (default 1)")
+    send.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                      help=f"recipients per osascript call (default {DEFAULT_CHUNK_SIZE})")
+    send.add_argument("--rate",
+                      help=f"overall send limit, messages per minute[/burst] or 'off' "
+                           f"(default {format_limit(DEFAULT_SEND_RATE)}, or ${SEND_RATE_ENV})")
+    send.add_argument("--recipient-rate",
+                      help=f"limit per number, same format "
+                           f"(default {format_limit(DEFAULT_RECIPIENT_RATE)}, or ${RECIPIENT_RATE_ENV})")
+    send.add_argument("--dry-run", action="store_true", help="print what would be sent")
+    send.set_defaults(func=send_command)
+
+    duck = commands.add_parser("duck", help="send a random duck image")
+    duck.add_argument("phones", nargs="+")
+    duck.set_defaults(func=duck_command)
+
+    listing = commands.add_parser("templates", help="list templates")
+    listing.add_argument("--search", "-s", help="only templates matching these words")
+    listing.set_defaults(func=templates_command)
+
+    test = commands.add_parser("test", help="check that Messages can be scripted")
+    test.set_defaults(func=test_command)
+    return parser
+
+
+def main(argv: Iterable[str] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        scheduler = SendScheduler.from_env()
+        send_rate, recipient_rate = scheduler.send_rate, scheduler.recipient_rate
+        if getattr(args, "rate", None) is not None:
+            send_rate = parse_limit(args.rate)
+        if getattr(args, "recipient_rate", None) is not None:
+            recipient_rate = parse_limit(args.recipient_rate)
+    except ValueError as e:
+        parser.error(str(e))
+    core = SpamResponder(config_file=args.responses,
+                         scheduler=SendScheduler(send_rate, recipient_rate))
+    try:
+        return args.func(core, args)
+    except OSError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        core.close()
+        if args.metrics:
+            print(metrics.describe(metrics.REGISTRY.snapshot()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Spam response core
+Everything the app does that doesn't need a window - the template library,
+placeholder rendering, text and batch sends, duck images - so it can be driven
+by the Tk app or by scripts (spam_cli.py). Nothing here imports tkinter.
+"""
+
+import os
+import random
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import metrics
+from batch_send import DEFAULT_CHUNK_SIZE, NEVER_SEND_ERROR, BatchResult, send_batch
+from delivery_ledger import IMAGE, DeliveryLedger
+from messages_bridge import MessagesBridgeError, get_bridge
+from metrics import MetricsExporter
+from number_lists import NumberLists
+from phone_numbers import clean_phone
+from response_store import open_response_store
+from send_scheduler import SendScheduler
+from templates import compile_template, template_variables
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Point this at a .db file to use the SQLite library instead of JSON
+RESPONSES_FILE_ENV = "SPAM_RESPONSES_FILE"
+DEFAULT_RESPONSES_FILE = "spam_responses.json"
+
+# (connect, read) timeouts in seconds per duck image source
+DUCK_SOURCE_TIMEOUTS = {
+    "upload.wikimedia.org": (5.0, 15.0),
+    "via.placeholder.com": (3.0, 10.0),
+}
+
+FALLBACK_DUCK_URL = "https://upload.wikimedia.org/wikipedia/commons/d/d5/Rubber_duck_assisting_with_debugging.jpg"
+
+# Sent instead when a duck image can't be delivered
+DUCK_MESSAGES = [
+    "🦆🦆🦆 QUACK ATTACK! 🦆🦆🦆",
+    "🐥 RUBBER DUCK DEBUGGING SESSION ACTIVATED 🐥",
+    "🦆 *SQUEAKS LOUDLY* 🦆",
+    "🛁🦆 Bath time duck reporting for duty! 🦆🛁",
+    "🦆💛 Yellow duck supremacy! 💛🦆",
+    "🦆🌊 Floating into your messages... 🌊🦆",
+    "🦆✨ Magical debugging duck has arrived! ✨🦆",
+    "🦆🎵 *Quack quack* (that's duck for 'hello') 🎵🦆",
+    "🦆🔥 FIRE DUCK INCOMING! 🔥🦆",
+    "🦆🌈 Rainbow duck bringing good vibes! 🌈🦆"
+]
+
+DEFAULT_RESPONSES = [
+    # Classic Spam Responses
+    {
+        "name": "Polite Decline",
+        "message": "I'm not interested. Please remove my number from your list."
+    },
+    {
+        "name": "Stop Request",
+        "message": "STOP"
+    },
+
+    # RUBBER DUCK CLUB RESPONSES - Over-the-top dramatic
+    {
+        "name": "🦆 Dramatic Welcome",
+        "message": "Welcome, chosen one, to the hallowed order of the Yellow Rubber Duck Club. Few dare to tread this path, and fewer still survive the tidal wave of squeaky, plastic majesty awaiting them. Prepare your soul (and your notifications), for each dawn shall bring a new yellow idol, a divine ducky relic delivered straight to your mortal eyes. Do not resist—this is your destiny."
+    },
+
+    # Deadpan sarcastic
+    {
+        "name": "🦆 Deadpan Sarcastic",
+        "message": "Congrats. You're in the Yellow Rubber Duck Club now. You'll get daily duck pics whether you want them or not—because clearly this is what your life has been building toward. Forget career goals, relationships, or hobbies; it's ducks now. Just ducks. Forever."
+    },
+
+    # Wholesome hype-friend
+    {
+        "name": "🦆 Wholesome Hype",
+        "message": "Yessss, welcome to the squad! You did it—you're officially part of the Yellow Rubber Duck Club. From here on out, every day is duck day. You're gonna wake up, roll over, check your phone, and BOOM—bright yellow duck staring at you like, 'hey, we got this.' It's the daily serotonin boost you didn't even know you needed."
+    },
+
+    # Corporate memo
+    {
+        "name": "🦆 Corporate Memo",
+        "message": "Congratulations, valued member. Your application to the Yellow Rubber Duck Club has been approved. Effective immediately, you are entitled to a daily transmission of yellow rubber duck imagery. Please note: failure to appreciate said ducks may result in corrective squeaks. Welcome aboard."
+    },
+
+    # Cult recruitment energy
+    {
+        "name": "🦆 Cult Recruitment",
+        "message": "Welcome, initiate. You have been reborn into the Yellow Rubber Duck Club. Your former identity no longer matters; only the duck remains. Each morning you shall receive sacred images of our luminous yellow idols, their beady black eyes watching over you, their eternal squeaks echoing in your mind. Resistance is useless. Quack is inevitable."
+    },
+
+    # Apocalypse radio broadcast
+    {
+        "name": "🦆 Apocalypse Radio",
+        "message": "⚠️ ATTENTION SURVIVOR ⚠️ This is Command speaking. You have successfully tuned into the Yellow Rubber Duck Club frequency. Effective immediately, daily duck imagery will be transmitted to your device. These ducks are not mere toys—they are the last pure symbol of civilization. Cherish them, study them, and above all, do not anger them. Godspeed."
+    },
+
+    # Gothic horror narrator
+    {
+        "name": "🦆 Gothic Horror",
+        "message": "Ah, poor soul. You thought you were joining a club, but you've instead bound yourself to an eternity of yellow rubber duck apparitions. They will come to you at dawn, their squeaky voices carried on the wind, their painted smiles never fading. Soon, you'll see them even when you close your eyes. Welcome."
+    },
+
+    # Game show host chaos
+    {
+        "name": "🦆 Game Show Chaos",
+        "message": "🎉 WELCOME, CONTESTANT! 🎉 You've just WON a lifetime membership in the Yellow Rubber Duck Club! That's right, forever! And what's your grand prize? DAILY PICTURES OF RUBBER DUCKS! That's right—every! single! day! Will you love it? Will it ruin your sanity? Who cares! It's ducks, baby, and you can't unsubscribe!"
+    },
+
+    # Too much sugar at 6 AM
+    {
+        "name": "🦆 Sugar Rush",
+        "message": "HIIII FRIENDS!!! WOW WOW WOW, YOU DID IT!!! You joined the YELLOW RUBBER DUCK CLUB!!! 🦆✨ From now on, every! single! day! you're gonna get a BRAND-NEW DUCK PICTURE—straight to your eyes!! YAAAAAY!! Isn't that the BEST THING EVER?? Clap your hands, scream into a pillow, and prepare for QUACKY FRIENDS FOREVER!!!"
+    },
+
+    # The host who's clearly losing it
+    {
+        "name": "🦆 Host Losing It",
+        "message": "HEY KIDDOS!!! WOWEEE!! GUESS WHO JUST JOINED THE YELLOW RUBBER DUCK CLUB?! That's right—you! HAHAHA oh boy, every morning you'll get another DUCK PHOTO, and another, and another… they never stop, oh no, THEY NEVER STOP!!! Isn't that FUN?! (please send help)"
+    },
+
+    # Terrifyingly enthusiastic puppet energy
+    {
+        "name": "🦆 Puppet Terror",
+        "message": "QUAAAACK QUAAAACK HELLOOOOO!!! 🦆 You're in the DUCKY CLUB NOW! Ooooh boy, do we have a surprise for you!!! EVERY. SINGLE. DAY. we're gonna send you DUCKS—DUCKS IN YOUR PHONE, DUCKS IN YOUR DREAMS, DUCKS IN YOUR WALLS—HAHAHA JUST KIDDING… unless??"
+    },
+
+    # Random Duck Oracle Messages
+    {
+        "name": "🦆 Duck Oracle",
+        "message": "Today's squeaky prophet has arrived. The council of quacks demanded I send you this. Your daily duck offering—accept it or be cursed with silence. Behold: the plastic oracle of the day. Duck mail. Resistance is futile."
+    },
+
+    {
+        "name": "🦆 Clown Duck",
+        "message": "Heeheehee! Another duck crawled out of the bathtub for you! Don't let it bite! HONK HONK! The Duck Parade has chosen YOU for today's squeaky blessing! Who's ready for a QUACK ATTACK?!? (…don't run.)"
+    },
+
+    # POLITICAL SPAM RESPONSES
+    {
+        "name": "🦆 Political PAC",
+        "message": "Thank you for your message regarding [CANDIDATE NAME]. I have been automatically enrolled in the Yellow Rubber Duck Political Action Committee (YRPAC). You will now receive daily rubber duck voting guides and quack-based policy updates. To unsubscribe, please text 'DUCK OFF' to this number. Your participation in democracy has never been more... squeaky."
+    },
+
+    {
+        "name": "🦆 Enthusiastic Policy",
+        "message": "YES! I ABSOLUTELY agree that [POLITICAL ISSUE] is important! That's exactly why I've dedicated my life to the Yellow Rubber Duck Voter Mobilization Initiative! Did you know that rubber ducks are the ONLY political symbol that transcends party lines?? Every American deserves their daily duck pic! QUACK THE VOTE 2025! 🦆🇺🇸"
+    },
+
+    {
+        "name": "🦆 Conspiracy Duck",
+        "message": "Finally, someone else who understands the TRUTH about what's really happening! Yes, the rubber duck shadow government has been controlling elections since 1947! I've been tracking their yellow plastic movements for YEARS! Are you part of the resistance? Do you have the sacred squeaker? The ducks are listening... always listening..."
+    },
+
+    {
+        "name": "🦆 Duck Department",
+        "message": "🚨 NOTICE: This number has been flagged by the U.S. Department of Waterfowl Affairs for unauthorized political activity. Per Federal Duck Code 42-QUACK-9, you are now required to receive mandatory daily rubber duck civic education materials. Compliance is not optional. Failure to appreciate assigned ducks may result in squeaky penalties."
+    },
+
+    {
+        "name": "🦆 Duck Emergency",
+        "message": "THIS IS NOT A DRILL! We've intercepted your political message but there's been a MASSIVE rubber duck containment breach! All cellular networks are being converted to emergency duck alert systems! Please stand by for mandatory cute duck photos to restore order! The situation is SQUEAKY but under control! Thank you for your cooperation during this quack-tastrophe!"
+    }
+]
+
+def responses_path() -> str:
+    """The template library: $SPAM_RESPONSES_FILE, else spam_responses.json next to the app"""
+    return os.environ.get(RESPONSES_FILE_ENV) or os.path.join(APP_DIR, DEFAULT_RESPONSES_FILE)
+
+
+def random_duck_image_url() -> str:
+    """Get a random duck image URL from various sources"""
+    # Collection of DIFFERENT duck images from reliable sources
+    duck_urls = [
+        # Original debugging duck
+        FALLBACK_DUCK_URL,
+
+        # Different Wikipedia Commons duck images
+        "https://upload.wikimedia.org/wikipedia/commons/thumb/5/58/Rubber_duck_closeup.jpg/400px-Rubber_duck_closeup.jpg",
+        "https://upload.wikimedia.org/wikipedia/commons/thumb/f/f3/Rubber_duck_floating.jpg/400px-Rubber_duck_floating.jpg",
+        "https://upload.wikimedia.org/wikipedia/commons/thumb/8/87/Yellow_rubber_duck.jpg/400px-Yellow_rubber_duck.jpg",
+        "https://upload.wikimedia.org/wikipedia/commons/thumb/6/6e/Rubber_ducky_bathtub.jpg/400px-Rubber_ducky_bathtub.jpg",
+
+        # Placeholder images with duck themes (these will definitely be different)
+        f"https://via.placeholder.com/400x400/FFD700/000000?text=DUCK+{random.randint(1, 999)}",
+        f"https://via.placeholder.com/400x400/FFA500/FFFFFF?text=QUACK+{random.randint(1, 999)}",
+        f"https://via.placeholder.com/400x400/FF6347/FFFFFF?text=RUBBER+DUCK+{random.randint(1, 999)}",
+        f"https://via.placeholder.com/400x400/32CD32/000000?text=🦆+{random.randint(1, 999)}",
+        f"https://via.placeholder.com/400x400/1E90FF/FFFFFF?text=SQUEAKY+{random.randint(1, 999)}"
+    ]
+    return random.choice(duck_urls)
+
+
+class SpamResponder:
+    """Template library plus every way of sending a response
+
+    The Messages bridge, the response store and the duck image machinery are
+    only set up when first used, so a script that sends one text never opens
+    an HTTP pool or image cache.
+    """
+
+    def __init__(self, config_file: Optional[str] = None, bridge=None,
+                 scheduler: Optional[SendScheduler] = None,
+                 ledger: Optional[DeliveryLedger] = None,
+                 number_lists: Optional[NumberLists] = None,
+                 duck_url_source: Optional[Callable[[], Optional[str]]] = None,
+                 duck_corpus=None):
+        self.config_file = config_file or responses_path()
+        # Where duck image URLs come from (benchmarks point this at a local server)
+        self.duck_url_source = duck_url_source or random_duck_image_url
+        # Local duck folder, looked for on first use unless a URL source was given
+        self._duck_corpus = duck_corpus
+        self._corpus_checked = duck_corpus is not None or duck_url_source is not None
+        self._bridge = bridge
+        self._ledger = ledger
+        # Never-send and known-spam lists; opening them only maps the files
+        self.number_lists = number_lists or NumberLists()
+        # Every send waits its turn here so bursts stay under Messages' limits
+        self.scheduler = scheduler or SendScheduler.from_env()
+        self._responses = None
+        self._http_client = None
+        self._image_cache = None
+        self._transcoder = None
+        self.prefetcher = None
+        # Writes the stage timings out for Prometheus / as JSON (None if turned off)
+        self.metrics_exporter = MetricsExporter.from_env()
+        if self.metrics_exporter:
+            self.metrics_exporter.start()
+
+    # Lazily created resources
+
+    @property
+    def bridge(self):
+        if self._bridge is None:
+            self._bridge = get_bridge()
+        return self._bridge
+
+    @property
+    def responses(self):
+        """The template store (journaled JSON, or SQLite for .db files)"""
+        if self._responses is None:
+            self._responses = open_response_store(
+                self.config_file, defaults=[dict(r) for r in DEFAULT_RESPONSES])
+        return self._responses
+
+    @property
+    def ledger(self) -> DeliveryLedger:
+        """Record of every send attempt"""
+        if self._ledger is None:
+            self._ledger = DeliveryLedger()
+        return self._ledger
+
+    @property
+    def image_cache(self):
+        """On-disk duck image cache, fetching over pooled keep-alive connections"""
+        if self._image_cache is None:
+            from http_pool import HTTPClient
+            from image_cache import ImageCache
+
+            self._http_client = HTTPClient(timeouts=DUCK_SOURCE_TIMEOUTS)
+            self._image_cache = ImageCache(client=self._http_client)
+        return self._image_cache
+
+    @property
+    def transcoder(self):
+        """Shrinks duck images to the outgoing format, size and byte budget"""
+        if self._transcoder is None:
+            from image_transcode import ImageTranscoder
+
+            self._transcoder = ImageTranscoder.from_env()
+        return self._transcoder
+
+    @property
+    def duck_corpus(self):
+        """Indexed folder of duck images to send instead of downloading, or None"""
+        if not self._corpus_checked:
+            from duck_corpus import DuckCorpus
+
+            self._duck_corpus = DuckCorpus.from_env()
+            self._corpus_checked = True
+        return self._duck_corpus
+
+    def start_prefetch(self):
+        """Keep a few duck images downloaded (and transcoded) ahead of time"""
+        from duck_prefetcher import DuckPrefetcher
+
+        # Nothing to download when the ducks come from a local folder, but
+        # index it in the background so the first send doesn't wait for a scan
+        if self.duck_corpus is not None:
+            self.duck_corpus.start()
+        elif self.prefetcher is None:
+            self.prefetcher = DuckPrefetcher(self.duck_url_source, self.image_cache,
+                                             prepare=self.transcoder.prepare)
+            self.prefetcher.start()
+
+    # Templates
+
+    def find_template(self, key: str) -> Optional[int]:
+        """Index of a template given its position or name (exact, then partial, ignoring case)"""
+        responses = self.responses
+        if key.isdigit():
+            index = int(key)
+            return index if index < len(responses) else None
+
+        wanted = key.strip().lower()
+        partial = None
+        for index, response in enumerate(responses):
+            name = response['name'].lower()
+            if name == wanted:
+                return index
+            if partial is None and wanted in name:
+                partial = index
+        return partial
+
+    def render(self, message: str, phone: str = "", spam_text: str = "") -> str:
+        """message with its placeholders filled for one recipient"""
+        variables = template_variables(clean_phone(phone) if phone else "", spam_text)
+        return compile_template(message).render(variables)
+
+    # Sending
+
+    def check_allowed(self, phone: str):
+        """Raise MessagesBridgeError if phone is on the never-send list"""
+        never_send = self.number_lists.never_send
+        never_send.reload()
+        if phone in never_send:
+            metrics.count("send.never_send")
+            raise MessagesBridgeError(f"{phone}: {NEVER_SEND_ERROR}")
+
+    def _wait_turn(self, phone: str, is_cancelled: Optional[Callable[[], bool]]) -> float:
+        """Wait for the rate limit; returns the seconds waited"""
+        start = time.monotonic()
+        if not self.scheduler.acquire([phone], is_cancelled=is_cancelled):
+            raise MessagesBridgeError("Cancelled while waiting to send")
+        return time.monotonic() - start
+
+    def _send_logged(self, send: Callable, phone: str, is_cancelled, stage: str = "send",
+                     **details):
+        """Run one send after its rate-limit wait and record the attempt in the ledger
+
+        Each step is timed as "<stage>.<step>" in the metrics registry.
+        """
+        with metrics.timer(f"{stage}.check"):
+            self.check_allowed(phone)
+        wait = self._wait_turn(phone, is_cancelled)
+        metrics.observe(f"{stage}.wait", wait)
+        start = time.monotonic()
+        error = None
+        try:
+            send()
+        except MessagesBridgeError as e:
+            error = e
+        duration = time.monotonic() - start
+        metrics.observe(f"{stage}.deliver", duration)
+        metrics.count(f"{stage}.failed" if error else f"{stage}.ok")
+        with metrics.timer("ledger.record"):
+            self.ledger.record(phone, error is None, error=str(error) if error else "",
+                               wait=wait, duration=duration, **details)
+        if error:
+            raise error
+
+    def send_text(self, phone_number: str, message: str,
+                  is_cancelled: Optional[Callable[[], bool]] = None,
+                  template: Optional[str] = None):
+        """Send one iMessage; raises MessagesBridgeError ("AppleScript error: ...") on failure
+
+        template is the name of the response it came from, for the ledger.
+        """
+        with metrics.timer("send.total"):
+            # Canonical E.164 form so the same number is always the same buddy
+            with metrics.timer("send.normalize"):
+                phone = clean_phone(phone_number)
+            self._send_logged(lambda: self.bridge.send_text(phone, message), phone, is_cancelled,
+                              template=template, message=message)
+
+    def send_to_many(self, recipients: Iterable[str], message: str,
+                     variables: Optional[Dict[str, str]] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE, concurrency: int = 1,
+                     on_chunk: Optional[Callable[[List[BatchResult]], None]] = None,
+                     is_cancelled: Optional[Callable[[], bool]] = None,
+                     template: Optional[str] = None) -> List[BatchResult]:
+        """Send a response to every recipient in batched osascript calls
+
+        Recipients on the never-send list are skipped and reported as failed.
+        """
+        ledger = self.ledger
+        never_send = self.number_lists.never_send
+        never_send.reload()
+
+        def record_chunk(chunk_results: List[BatchResult]):
+            for result in chunk_results:
+                # Recipients cancelled before their chunk went out weren't attempted
+                if result.message is not None:
+                    ledger.record(result.phone, result.ok, template=template,
+                                  message=result.message, error=result.error,
+                                  wait=result.wait, duration=result.duration)
+            if on_chunk:
+                on_chunk(chunk_results)
+
+        return send_batch(recipients, message, chunk_size=chunk_size, concurrency=concurrency,
+                          on_chunk=record_chunk, is_cancelled=is_cancelled, variables=variables,
+                          scheduler=self.scheduler, exclude=never_send)
+
+    def send_random_duck_message(self, phone_number: str) -> bool:
+        """Send a variety of duck-themed messages instead of images"""
+        self.send_text(phone_number, random.choice(DUCK_MESSAGES), template="Random duck message")
+        return True
+
+    def send_duck_image(self, phone_number: str) -> bool:
+        """Send a random duck image; falls back to a duck message (returning True) if it can't"""
+        with metrics.timer("duck.total"):
+            return self._send_duck_image(phone_number)
+
+    def _send_duck_image(self, phone_number: str) -> bool:
+        self.check_allowed(clean_phone(phone_number))
+        try:
+            # A local duck, else a prefetched one - no download wait either way
+            local = self.duck_corpus.next_image() if self.duck_corpus else None
+            prefetched = self.prefetcher.take() if self.prefetcher and not local else None
+            if local:
+                duck_url = image_path = local
+                metrics.count("duck.local")
+                print(f"Using local duck image: {local}")
+            elif prefetched:
+                duck_url, image_path = prefetched
+                metrics.count("duck.prefetched")
+                print(f"Using prefetched duck image from: {duck_url}")
+            else:
+                duck_url = self.duck_url_source() or FALLBACK_DUCK_URL
+                print(f"Trying to download duck image from: {duck_url}")
+
+                # Repeat URLs are served straight from the on-disk cache
+                with metrics.timer("duck.image"):
+                    image_path = self.image_cache.get(duck_url)
+            # Prefetched images were converted already; this finds them within limits
+            with metrics.timer("duck.transcode"):
+                image_path = self.transcoder.prepare(image_path)
+            print(f"Duck image ready at: {image_path}")
+
+            try:
+                phone = clean_phone(phone_number)
+                self._send_logged(lambda: self.bridge.send_file(phone, image_path), phone, None,
+                                  stage="duck", kind=IMAGE, template="Duck image", message=duck_url,
+                                  attachment=image_path)
+            except MessagesBridgeError as e:
+                print(e)
+                metrics.count("duck.fallback")
+                return self.send_random_duck_message(phone_number)
+
+            print("Duck image sent successfully!")
+            return True
+
+        except Exception as e:
+            print(f"Duck image sending failed: {e}")
+            metrics.count("duck.fallback")
+            # Fallback to random duck message for variety
+            return self.send_random_duck_message(phone_number)
+
+    def ping(self):
+        """Check that Messages can be scripted; raises MessagesBridgeError if not"""
+        self.bridge.ping()
+
+    def close(self):
+        self.number_lists.close()
+        if self._ledger is not None:
+            self._ledger.close()
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+        if self._duck_corpus is not None:
+            self._duck_corpus.close()
+        if self._image_cache is not None:
+            self._image_cache.close()
+        if self._http_client is not None:
+            self._http_client.close()
+        if self._responses is not None:
+            self._responses.close()
+        # Last, so the export includes the final compaction
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed response template store
+Same list-like add/edit/delete surface as the journaled JSON store, but rows
+stay on disk: only an array of row ids (8 bytes per template) is held in
+memory, names/categories/tags are indexed, and reads can be paginated, so
+50k+ template libraries open instantly
+
+Usage: python3 sqlite_response_store.py import responses.db pack.json [pack.json ...]
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import metrics
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# Rows kept in memory for repeated reads (list rendering, previews)
+ROW_CACHE_SIZE = 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    message TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_responses_name ON responses(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_responses_category ON responses(category);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    response_id INTEGER NOT NULL REFERENCES responses(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, response_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tags_response ON tags(response_id);
+"""
+
+
+class SQLiteResponseStore:
+    """List-like response library stored in SQLite"""
+
+    def __init__(self, path: str, defaults: Optional[List[Dict]] = None):
+        started = time.perf_counter()
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._row_cache = OrderedDict()
+
+        # Position -> row id; ids only ever grow, so the array stays sorted
+        self._ids = array('q', (row[0] for row in
+                                self._conn.execute("SELECT id FROM responses ORDER BY id")))
+        if not self._ids and defaults:
+            self.import_responses(defaults)
+        metrics.observe("responses.load", time.perf_counter() - started)
+
+    # Sequence interface
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index: int) -> Dict:
+        if index < 0:
+            index += len(self._ids)
+        if not 0 <= index < len(self._ids):
+            raise IndexError(index)
+        return self._row(self._ids[index])
+
+    def __iter__(self) -> Iterator[Dict]:
+        offset = 0
+        while True:
+            page = self.page(offset, 500)
+            if not page:
+                return
+            yield from page
+            offset += len(page)
+
+    def get(self, index: int) -> Dict:
+        return self[index]
+
+    def index_of(self, response_id: int) -> int:
+        """Position of a row id in list order (-1 if absent)"""
+        i = bisect_left(self._ids, response_id)
+        if i < len(self._ids) and self._ids[i] == response_id:
+            return i
+        return -1
+
+    # Reads
+
+    def _row(self, response_id: int) -> Dict:
+        with self._lock:
+            cached = self._row_cache.get(response_id)
+            if cached is not None:
+                self._row_cache.move_to_end(response_id)
+                return cached
+
+            row = self._conn.execute(
+                "SELECT id, name, message, category FROM responses WHERE id = ?",
+                (response_id,)).fetchone()
+            if row is None:
+                raise IndexError(response_id)
+            response = self._to_dict(row)
+            self._row_cache[response_id] = response
+            if len(self._row_cache) > ROW_CACHE_SIZE:
+                self._row_cache.popitem(last=False)
+            return response
+
+    def _to_dict(self, row) -> Dict:
+        tags = [t[0] for t in self._conn.execute(
+            "SELECT tag FROM tags WHERE response_id = ? ORDER BY tag", (row[0],))]
+        return {"id": row[0], "name": row[1], "message": row[2], "category": row[3], "tags": tags}
+
+    def page(self, offset: int, limit: int) -> List[Dict]:
+        """Templates [offset, offset + limit) in list order"""
+        with self._lock:
+            ids = self._ids[offset:offset + limit]
+            return [self._row(response_id) for response_id in ids]
+
+    def find_by_name(self, name: str) -> List[Dict]:
+        """Templates whose name matches exactly (case-insensitive), via the name index"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, message, category FROM responses "
+                "WHERE name = ? COLLATE NOCASE ORDER BY id", (name,)).fetchall()
+            return [self._to_dict(row) for row in rows]
+
+    def by_category(self, category: str, offset: int = 0, limit: int = 100) -> List[Dict]:
+        """A page of templates in one category"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, message, category FROM responses WHERE category = ? "
+                "ORDER BY id LIMIT ? OFFSET ?", (category, limit, offset)).fetchall()
+            return [self._to_dict(row) for row in rows]
+
+    def by_tag(self, tag: str, offset: int = 0, limit: int = 100) -> List[Dict]:
+        """A page of templates carrying a tag"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.id, r.name, r.message, r.category FROM tags t "
+                "JOIN responses r ON r.id = t.response_id WHERE t.tag = ? "
+                "ORDER BY r.id LIMIT ? OFFSET ?", (tag, limit, offset)).fetchall()
+            return [self._to_dict(row) for row in rows]
+
+    def categories(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT category FROM responses ORDER BY category")]
+
+    # Writes
+
+    def _set_tags(self, response_id: int, tags: Iterable[str]):
+        self._conn.execute("DELETE FROM tags WHERE response_id = ?", (response_id,))
+        self._conn.executemany("INSERT OR IGNORE INTO tags (tag, response_id) VALUES (?, ?)",
+                               [(tag, response_id) for tag in tags])
+
+    def add(self, name: str, message: str, category: str = "", tags: Iterable[str] = ()) -> int:
+        """Append a template; returns its index"""
+        with metrics.timer("responses.add"), self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO responses (name, message, category) VALUES (?, ?, ?)",
+                (name, message, category))
+            self._set_tags(cursor.lastrowid, tags)
+            self._ids.append(cursor.lastrowid)
+            return len(self._ids) - 1
+
+    def edit(self, index: int, name: str, message: str,
+             category: Optional[str] = None, tags: Optional[Iterable[str]] = None):
+        """Replace the template at index (category/tags unchanged unless given)"""
+        with metrics.timer("responses.edit"), self._lock, self._conn:
+            response_id = self._ids[index]
+            self._conn.execute("UPDATE responses SET name = ?, message = ? WHERE id = ?",
+                               (name, message, response_id))
+            if category is not None:
+                self._conn.execute("UPDATE responses SET category = ? WHERE id = ?",
+                                   (category, response_id))
+            if tags is not None:
+                self._set_tags(response_id, tags)
+            self._row_cache.pop(response_id, None)
+
+    def delete(self, index: int) -> Dict:
+        """Remove and return the template at index"""
+        with metrics.timer("responses.delete"), self._lock, self._conn:
+            response = self[index]
+            self._conn.execute("DELETE FROM responses WHERE id = ?", (response["id"],))
+            del self._ids[index]
+            self._row_cache.pop(response["id"], None)
+            return response
+
+    def import_responses(self, responses: Iterable[Dict]) -> int:
+        """Bulk-append templates (dicts with name, message and optional category/tags)"""
+        count = 0
+        with self._lock, self._conn:
+            for response in responses:
+                cursor = self._conn.execute(
+                    "INSERT INTO responses (name, message, category) VALUES (?, ?, ?)",
+                    (response["name"], response["message"], response.get("category", "")))
+                if response.get("tags"):
+                    self._set_tags(cursor.lastrowid, response["tags"])
+                self._ids.append(cursor.lastrowid)
+                count += 1
+        return count
+
+    def compact(self, wait: bool = True):
+        """Nothing to fold - every change is already committed; refresh planner stats"""
+        with self._lock:
+            self._conn.execute("PRAGMA optimize")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def is_sqlite_path(path: str) -> bool:
+    return path.lower().endswith(SQLITE_SUFFIXES)
+
+
+def main():
+    """Import JSON response packs into a SQLite library"""
+    if len(sys.argv) < 4 or sys.argv[1] != "import":
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+
+    store = SQLiteResponseStore(sys.argv[2])
+    for pack in sys.argv[3:]:
+        with open(pack, 'r') as f:
+            count = store.import_responses(json.load(f))
+        print(f"🦆 Imported {count} responses from {pack}")
+    print(f"📚 {len(store)} responses in {sys.argv[2]}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
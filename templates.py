@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Response template rendering
+Fills [PLACEHOLDERS] in a response - [SENDER NUMBER], [DATE],
+[CANDIDATE NAME], ... - with per-send values. Each message is parsed once
+into a compiled template (cached by its text), so rendering a batch of
+thousands of recipients is just string joins.
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PLACEHOLDER_PATTERN = re.compile(r'\[([A-Z][A-Z0-9 _]*)\]')
+
+# Placeholder spellings that mean the same variable
+ALIASES = {
+    "sender_number": "phone",
+    "sender": "phone",
+    "number": "phone",
+    "phone_number": "phone",
+    "today": "date",
+    "candidate": "candidate_name",
+}
+
+# Compiled templates kept around (one per distinct message text)
+CACHE_SIZE = 1024
+
+# Ways political spam names its candidate
+CANDIDATE_PATTERNS = [re.compile(p) for p in (
+    r'\b(?:[Vv]ote(?: for)?|[Ss]upport|[Ee]lect|[Rr]e-?elect|[Dd]onate to|[Cc]hip in for|[Ss]tand with)\s+'
+    r'((?:[A-Z][a-z]+|[A-Z]\.)(?:\s+(?:[A-Z][a-z]+|[A-Z]\.)){0,2})',
+    r'\b(?:Senator|Sen\.|Rep\.|Representative|Governor|Gov\.|Congressman|Congresswoman|'
+    r'Mayor|President|Candidate)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})',
+    r'\b((?:[A-Z][a-z]+)(?:\s+[A-Z][a-z]+){1,2})\s+for\s+(?:Congress|Senate|President|Governor|'
+    r'Mayor|Sheriff|Council|Judge|Attorney General|State)',
+    r'\b[Pp]aid for by\s+((?:[A-Z][a-z]+)(?:\s+[A-Z][a-z]+){0,2})',
+)]
+
+
+def variable_name(placeholder: str) -> str:
+    """Variable a placeholder refers to: [CANDIDATE NAME] -> candidate_name"""
+    name = placeholder.strip().lower().replace(" ", "_")
+    return ALIASES.get(name, name)
+
+
+class CompiledTemplate:
+    """A message split once into literal text and placeholder slots"""
+
+    def __init__(self, text: str):
+        self.text = text
+        # Even positions are literal text, odd positions are (variable, original) slots
+        self._parts = []
+        self._slots = []
+        last = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            self._parts.append(text[last:match.start()])
+            self._slots.append(len(self._parts))
+            self._parts.append((variable_name(match.group(1)), match.group(0)))
+            last = match.end()
+        self._parts.append(text[last:])
+
+    @property
+    def placeholders(self) -> List[str]:
+        """Variables this template uses, in order of first use"""
+        return list(dict.fromkeys(self._parts[i][0] for i in self._slots))
+
+    def render(self, variables: Dict[str, str]) -> str:
+        """Fill every placeholder; ones without a (non-empty) value are left as written"""
+        if not self._slots:
+            return self.text
+        parts = list(self._parts)
+        for i in self._slots:
+            name, original = parts[i]
+            parts[i] = variables.get(name) or original
+        return "".join(parts)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_template(text: str) -> CompiledTemplate:
+    return CompiledTemplate(text)
+
+
+def detect_candidate_name(text: str) -> Optional[str]:
+    """Best guess at the candidate a political spam text is pushing"""
+    if not text:
+        return None
+    for pattern in CANDIDATE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def template_variables(phone: str = "", spam_text: str = "",
+                       now: Optional[datetime] = None) -> Dict[str, str]:
+    """Values for the built-in placeholders"""
+    now = now or datetime.now()
+    variables = {
+        "phone": phone,
+        "date": f"{now:%B} {now.day}, {now.year}",
+        "time": now.strftime("%I:%M %p").lstrip("0"),
+    }
+    candidate = detect_candidate_name(spam_text)
+    if candidate:
+        variables["candidate_name"] = candidate
+    return variables
+
+
+def render(text: str, variables: Dict[str, str]) -> str:
+    return compile_template(text).render(variables)
+
+
+def render_batch(text: str, phones: Iterable[str],
+                 variables: Optional[Dict[str, str]] = None) -> List[Tuple[str, str]]:
+    """(phone, message) for every recipient, parsing the template once"""
+    template = compile_template(text)
+    variables = dict(variables or {})
+    if "phone" not in template.placeholders:
+        message = template.render(variables)
+        return [(phone, message) for phone in phones]
+
+    rendered = []
+    for phone in phones:
+        variables["phone"] = phone
+        rendered.append((phone, template.render(variables)))
+    return rendered
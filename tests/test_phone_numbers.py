@@ -0,0 +1,27 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from phone_numbers import clean_phone
+
+
+class CleanPhoneTest(unittest.TestCase):
+    def test_valid_numbers_are_e164(self):
+        for raw in ("(555) 234-5678", "+1 555.234.5678", "555.234.5678", "tel:5552345678"):
+            self.assertEqual(clean_phone(raw), "+15552345678")
+
+    def test_invalid_numbers_keep_only_digits(self):
+        # Exchanges starting with 1 aren't valid NANP, so these aren't normalized
+        self.assertEqual(clean_phone("(555) 123-4567"), "5551234567")
+        self.assertEqual(clean_phone("555.123.4567"), "5551234567")
+        self.assertEqual(clean_phone(" +1 555.123.4567 "), "+15551234567")
+
+    def test_short_codes_and_emails_pass_through(self):
+        self.assertEqual(clean_phone("262-966"), "262966")
+        self.assertEqual(clean_phone(" friend@example.com "), "friend@example.com")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spam_cli import read_recipients
+
+
+def recipients(text: str) -> list:
+    return list(read_recipients(io.StringIO(text)))
+
+
+class ReadRecipientsTest(unittest.TestCase):
+    def test_header_row(self):
+        self.assertEqual(recipients("phone,name\n5552345678,Alice\n"),
+                         [("5552345678", {"name": "Alice"})])
+
+    def test_mid_file_email_is_a_recipient(self):
+        self.assertEqual(recipients("5552345678\nfriend@example.com\n5553334444\n"),
+                         [("5552345678", {}), ("friend@example.com", {}), ("5553334444", {})])
+
+    def test_mid_file_short_code_is_a_recipient(self):
+        self.assertEqual(recipients("5552345678,Alice\n262966,Bob\n5553334444,Carol\n"),
+                         [("5552345678", {}), ("262966", {}), ("5553334444", {})])
+
+    def test_first_row_email_is_a_recipient(self):
+        self.assertEqual(recipients("friend@example.com\n5552014444\n"),
+                         [("friend@example.com", {}), ("5552014444", {})])
+
+    def test_first_row_short_code_is_a_recipient(self):
+        self.assertEqual(recipients("12345\n5552014444\n"),
+                         [("12345", {}), ("5552014444", {})])
+
+    def test_header_with_email_column(self):
+        self.assertEqual(recipients("email,name\nfriend@example.com,Alice\n"),
+                         [("friend@example.com", {"name": "Alice"})])
+
+
+if __name__ == "__main__":
+    unittest.main()
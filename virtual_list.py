@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Virtualized list widget
+A Listbox that only ever holds the rows currently on screen, pulling row text
+from the backing store on demand. Adds, edits and deletes patch single rows,
+so scrolling, selection and updates cost the same for 20 templates or 100k.
+"""
+
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+from typing import Callable, Optional, Tuple
+
+# Extra pixels per Listbox row on top of the font's line spacing
+ROW_PADDING = 1
+
+
+class VirtualListbox(ttk.Frame):
+    """Scrollable single-selection list over row_count() rows rendered with row_text(i)
+
+    Mirrors the parts of the tk.Listbox API the app uses (curselection,
+    selection_set, see, focus_set, bind) with indices into the whole list.
+    """
+
+    def __init__(self, parent, row_count: Callable[[], int], row_text: Callable[[int], str],
+                 height: int = 10, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.row_count = row_count
+        self.row_text = row_text
+        self.top = 0
+        self.visible_rows = height
+        self._selected = None
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.listbox = tk.Listbox(self, height=height, exportselection=False,
+                                  selectmode=tk.BROWSE, activestyle='none')
+        self.listbox.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+        font = tkfont.nametofont(self.listbox.cget('font'))
+        self._row_height = font.metrics('linespace') + ROW_PADDING
+
+        self.listbox.bind('<Configure>', self._on_configure)
+        self.listbox.bind('<<ListboxSelect>>', self._on_inner_select)
+        self.listbox.bind('<MouseWheel>', self._on_mousewheel)
+        self.listbox.bind('<Button-4>', lambda e: self._scroll_by(-3))
+        self.listbox.bind('<Button-5>', lambda e: self._scroll_by(3))
+        for key, handler in (('<Up>', lambda e: self._move_selection(-1)),
+                             ('<Down>', lambda e: self._move_selection(1)),
+                             ('<Prior>', lambda e: self._move_selection(-self.visible_rows)),
+                             ('<Next>', lambda e: self._move_selection(self.visible_rows)),
+                             ('<Home>', lambda e: self._select_and_notify(0)),
+                             ('<End>', lambda e: self._select_and_notify(self.row_count() - 1))):
+            self.listbox.bind(key, handler)
+
+    # Listbox-compatible API
+
+    def bind(self, sequence=None, func=None, add=None):
+        """<<ListboxSelect>> fires on this widget; mouse and key events come from the rows"""
+        if sequence == '<<ListboxSelect>>':
+            return super().bind(sequence, func, add)
+        return self.listbox.bind(sequence, func, add)
+
+    def curselection(self) -> Tuple[int, ...]:
+        if self._selected is None or self._selected >= self.row_count():
+            return ()
+        return (self._selected,)
+
+    def selection_set(self, index: int):
+        count = self.row_count()
+        if count == 0:
+            self._selected = None
+            return
+        self._selected = max(0, min(index, count - 1))
+        self.see(self._selected)
+        self._render()
+
+    def selection_clear(self, *args):
+        self._selected = None
+        self._render()
+
+    def see(self, index: int):
+        """Scroll so that index is on screen"""
+        if index < self.top:
+            self._scroll_to(index)
+        elif index >= self.top + self.visible_rows:
+            self._scroll_to(index - self.visible_rows + 1)
+
+    def focus_set(self):
+        self.listbox.focus_set()
+
+    # Incremental updates from the backing store
+
+    def refresh(self):
+        """Redraw the visible rows (after the row count or many rows changed)"""
+        self._scroll_to(self.top)
+
+    def row_changed(self, index: int):
+        """One row's text changed"""
+        if self.top <= index < self.top + self.visible_rows:
+            position = index - self.top
+            self.listbox.delete(position)
+            self.listbox.insert(position, self.row_text(index))
+            if index == self._selected:
+                self.listbox.selection_set(position)
+        self._update_scrollbar()
+
+    def row_inserted(self, index: int):
+        """A row was inserted at index (rows after it shifted down)"""
+        if self._selected is not None and self._selected >= index:
+            self._selected += 1
+        self.refresh()
+
+    def row_deleted(self, index: int):
+        """The row at index was removed (rows after it shifted up)"""
+        if self._selected is not None:
+            if self._selected == index:
+                self._selected = None
+            elif self._selected > index:
+                self._selected -= 1
+        self.refresh()
+
+    # Rendering
+
+    def _render(self):
+        count = self.row_count()
+        end = min(self.top + self.visible_rows, count)
+        self.listbox.delete(0, tk.END)
+        if end > self.top:
+            self.listbox.insert(tk.END, *[self.row_text(i) for i in range(self.top, end)])
+        if self._selected is not None and self.top <= self._selected < end:
+            self.listbox.selection_set(self._selected - self.top)
+            self.listbox.activate(self._selected - self.top)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        count = self.row_count()
+        if count <= self.visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / count, min(1.0, (self.top + self.visible_rows) / count))
+
+    def _scroll_to(self, top: int):
+        max_top = max(0, self.row_count() - self.visible_rows)
+        self.top = max(0, min(top, max_top))
+        self._render()
+
+    def _scroll_by(self, rows: int):
+        self._scroll_to(self.top + rows)
+        return "break"
+
+    # Event handlers
+
+    def _on_configure(self, event):
+        rows = max(1, event.height // self._row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.refresh()
+
+    def _on_scrollbar(self, action, *args):
+        if action == 'moveto':
+            self._scroll_to(int(float(args[0]) * self.row_count()))
+        elif action == 'scroll':
+            amount, unit = int(args[0]), args[1]
+            step = self.visible_rows if unit == 'pages' else 1
+            self._scroll_by(amount * step)
+
+    def _on_mousewheel(self, event):
+        # macOS reports small deltas, Windows multiples of 120
+        delta = event.delta if abs(event.delta) < 120 else event.delta // 120
+        return self._scroll_by(-delta)
+
+    def _on_inner_select(self, event=None):
+        selection = self.listbox.curselection()
+        if selection:
+            self._selected = self.top + selection[0]
+            self.event_generate('<<ListboxSelect>>')
+
+    def _select_and_notify(self, index: Optional[int]):
+        if index is None or self.row_count() == 0:
+            return "break"
+        self.selection_set(index)
+        self.event_generate('<<ListboxSelect>>')
+        return "break"
+
+    def _move_selection(self, step: int):
+        current = self._selected if self._selected is not None else self.top - (1 if step > 0 else 0)
+        return self._select_and_notify(current + step)